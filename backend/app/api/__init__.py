@@ -13,6 +13,8 @@ from app.api import exports
 from app.api import announcements
 from app.api import public
 from app.api import logs
+from app.api import jobs
+from app.api import seasons
 
 __all__ = [
     "auth",
@@ -27,5 +29,7 @@ __all__ = [
     "exports",
     "announcements",
     "public",
-    "logs"
+    "logs",
+    "jobs",
+    "seasons"
 ]
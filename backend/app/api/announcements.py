@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.pagination import TOTAL_EXACT, TOTAL_PATTERN, page_response
 from app.services.announcement_service import AnnouncementService
 from app.api.deps import get_current_user, require_permission
 from app.models.user import User
@@ -22,6 +23,8 @@ router = APIRouter(prefix="/announcements", tags=["公示管理"])
 async def get_announcements(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    after: int = Query(None, description="游标：上一页最后一条记录的ID，传入时忽略page"),
+    total_mode: str = Query(TOTAL_EXACT, alias="total", pattern=TOTAL_PATTERN, description="总数计算方式（exact精确/estimate上限计数/none不计数）"),
     include_closed: bool = Query(False, description="是否包含已关闭的公示"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -35,11 +38,13 @@ async def get_announcements(
     announcements, total = announcement_service.get_announcement_list(
         page=page,
         page_size=page_size,
-        include_closed=include_closed
+        include_closed=include_closed,
+        after=after,
+        total=total_mode
     )
     
-    return {
-        "items": [
+    return page_response(
+        [
             AnnouncementInfo(
                 id=a.id,
                 title=a.title,
@@ -51,10 +56,11 @@ async def get_announcements(
                 closed_at=a.closed_at
             ) for a in announcements
         ],
-        "total": total,
-        "page": page,
-        "page_size": page_size
-    }
+        total,
+        page,
+        page_size,
+        total_mode
+    )
 
 
 @router.post("", response_model=AnnouncementCreateResponse, summary="创建公示")
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.services.base_service import BaseService
+from app.services.eligibility_service import EligibilityService
 from app.api.deps import get_current_user, require_permission
 from app.models.user import User
 from app.schemas import (
@@ -14,7 +15,8 @@ from app.schemas import (
     ClassCreate,
     ClassUpdate,
     ResponseBase,
-    DeleteResponse
+    DeleteResponse,
+    ClassEligibilityResponse
 )
 
 router = APIRouter(prefix="/classes", tags=["班级管理"])
@@ -78,6 +80,31 @@ async def create_class(
     )
 
 
+@router.get("/{class_id}/eligibility", response_model=ClassEligibilityResponse, summary="获取班级报名资格矩阵")
+async def get_class_eligibility(
+    class_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    获取班级报名资格矩阵
+    
+    一次返回本班 学生×项目 的可报名情况：
+    - **events**: 项目、组别及本班剩余名额
+    - **students**: 学生剩余可报项目数，及每个项目是否已报、是否可报、可参加的组别和不可报原因
+    """
+    eligibility_service = EligibilityService(db)
+    matrix, error = eligibility_service.get_class_eligibility(class_id)
+    
+    if error:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=error
+        )
+    
+    return matrix
+
+
 @router.put("/{class_id}", response_model=ClassInfo, summary="更新班级")
 async def update_class(
     class_id: int,
@@ -151,18 +178,23 @@ async def clear_all_classes(
     清空所有班级（同时会清空所有学生）
     """
     from app.models.base import Class, Student
-    from sqlalchemy import text
-    
-    # 先删除学生
-    student_count = db.query(Student).delete()
-    # 再删除班级
-    class_count = db.query(Class).delete()
-    db.commit()
-    
-    # 重置自增ID（MySQL语法）
-    db.execute(text("ALTER TABLE students AUTO_INCREMENT = 1"))
-    db.execute(text("ALTER TABLE classes AUTO_INCREMENT = 1"))
-    db.commit()
+    from app.models.registration import Registration, ClassEventQuota, StudentQuota
+    from app.core.database import truncate_tables
+    from app.core.dimension_cache import dimension_cache
+    from app.core.student_index import student_index
+    
+    if db.query(Registration.id).first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="存在报名记录，请先清空报名或归档本届数据"
+        )
+    
+    student_count = db.query(Student).count()
+    class_count = db.query(Class).count()
+    # 整表清空并重置自增ID，报名计数一并清空
+    truncate_tables(db, (Student, Class, ClassEventQuota, StudentQuota))
+    student_index.invalidate()
+    dimension_cache.invalidate()
     
     return ResponseBase(message=f"已清空 {class_count} 个班级、{student_count} 个学生")
 
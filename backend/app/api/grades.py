@@ -144,21 +144,24 @@ async def clear_all_grades(
     清空所有年级（同时会清空所有班级和学生）
     """
     from app.models.base import Grade, Class, Student
-    from sqlalchemy import text
-    
-    # 先删除学生
-    student_count = db.query(Student).delete()
-    # 再删除班级
-    class_count = db.query(Class).delete()
-    # 最后删除年级
-    grade_count = db.query(Grade).delete()
-    db.commit()
-    
-    # 重置自增ID（MySQL语法）
-    db.execute(text("ALTER TABLE students AUTO_INCREMENT = 1"))
-    db.execute(text("ALTER TABLE classes AUTO_INCREMENT = 1"))
-    db.execute(text("ALTER TABLE grades AUTO_INCREMENT = 1"))
-    db.commit()
+    from app.models.registration import Registration, ClassEventQuota, StudentQuota
+    from app.core.database import truncate_tables
+    from app.core.dimension_cache import dimension_cache
+    from app.core.student_index import student_index
+    
+    if db.query(Registration.id).first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="存在报名记录，请先清空报名或归档本届数据"
+        )
+    
+    student_count = db.query(Student).count()
+    class_count = db.query(Class).count()
+    grade_count = db.query(Grade).count()
+    # 整表清空并重置自增ID，报名计数一并清空
+    truncate_tables(db, (Student, Class, Grade, ClassEventQuota, StudentQuota))
+    student_index.invalidate()
+    dimension_cache.invalidate()
     
     return ResponseBase(message=f"已清空 {grade_count} 个年级、{class_count} 个班级、{student_count} 个学生")
 
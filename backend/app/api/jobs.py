@@ -0,0 +1,103 @@
+"""
+后台任务API路由模块
+"""
+from typing import Any, Callable, Union
+
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.error_report import iter_report_csv, build_report_xlsx
+from app.core.ingestion import ImportResult
+from app.core.jobs import ImportJob, job_manager
+from app.api.deps import get_current_user
+from app.models.user import User
+from app.schemas import ImportJobInfo, ImportResponse
+
+router = APIRouter(prefix="/jobs", tags=["后台任务"])
+
+
+async def run_import_job(
+    kind: str,
+    work: Callable[[Session, ImportResult], Any],
+    created_by: int,
+    background: bool = False
+) -> Union[ImportResponse, ImportJobInfo]:
+    """
+    在工作线程中执行导入任务
+    
+    background=True 时立即返回任务信息，否则等待任务结束后返回导入结果；
+    两种方式下导入都不会阻塞事件循环
+    """
+    job = job_manager.submit(kind, work, created_by=created_by)
+    if background:
+        return ImportJobInfo(**job.to_dict())
+    
+    result = await job.wait()
+    return ImportResponse(**result.to_dict())
+
+
+@router.get("/{job_id}", response_model=ImportJobInfo, summary="查询后台任务进度")
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """查询后台任务进度（仅任务创建者和管理员可见）"""
+    job = _get_visible_job(job_id, current_user)
+    return ImportJobInfo(**job.to_dict())
+
+
+@router.get("/{job_id}/errors", summary="下载导入错误报告")
+async def download_job_errors(
+    job_id: str,
+    format: str = Query("xlsx", pattern="^(xlsx|csv)$", description="报告格式：xlsx 或 csv"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    下载导入任务的完整错误报告（文件、工作表、行号、列、错误代码、错误信息）
+    报告在导入过程中逐条写入磁盘，下载时流式输出
+    """
+    job = _get_visible_job(job_id, current_user)
+    if not job.done:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="任务尚未结束")
+    
+    report = job.result.report
+    if not report.count or not report.path:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="该任务没有错误记录")
+    
+    filename = quote(f"导入错误_{job.kind}.{format}")
+    headers = {"Content-Disposition": f"attachment; filename*=UTF-8''{filename}"}
+    
+    if format == "csv":
+        return StreamingResponse(iter_report_csv(report.path), media_type="text/csv", headers=headers)
+    
+    # 在线程池中生成Excel，避免阻塞事件循环
+    output = await run_in_threadpool(build_report_xlsx, report.path)
+    
+    def iter_output():
+        try:
+            while True:
+                chunk = output.read(settings.UPLOAD_READ_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            output.close()
+    
+    return StreamingResponse(
+        iter_output(),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers=headers
+    )
+
+
+def _get_visible_job(job_id: str, current_user: User) -> ImportJob:
+    """获取任务，仅任务创建者和管理员可见"""
+    job = job_manager.get(job_id)
+    if not job or (job.created_by != current_user.id and not current_user.is_admin):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="任务不存在")
+    return job
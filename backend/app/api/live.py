@@ -0,0 +1,74 @@
+"""
+实时推送API路由模块
+无需认证，供大屏和手机通过 Server-Sent Events 订阅排名和榜单的变化，代替轮询统计接口
+"""
+import asyncio
+import json
+from typing import Dict
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.live import RESYNC, LiveSubscriber, live_hub
+from app.services.statistics_service import seed_live_topics
+
+router = APIRouter(prefix="/live", tags=["实时推送"])
+
+
+def sse_message(message: Dict) -> str:
+    """编码为一条 SSE 消息，事件名为消息类型"""
+    lines = []
+    if "seq" in message:
+        lines.append(f"id: {message['seq']}")
+    lines.append(f"event: {message['type']}")
+    lines.append("data: " + json.dumps(message, ensure_ascii=False, default=str))
+    return "\n".join(lines) + "\n\n"
+
+
+async def live_stream(subscriber: LiveSubscriber):
+    """先发送快照，之后逐条发送变化；积压过多时重发快照，长时间无消息时发送心跳"""
+    yield sse_message(live_hub.snapshot(subscriber))
+    while True:
+        try:
+            message = await asyncio.wait_for(subscriber.queue.get(), settings.LIVE_HEARTBEAT_SECONDS)
+        except asyncio.TimeoutError:
+            yield ": ping\n\n"
+            continue
+        if message is RESYNC:
+            yield sse_message(live_hub.snapshot(subscriber))
+        elif message["seq"] > subscriber.seq:
+            yield sse_message(message)
+
+
+@router.get("", summary="订阅排名和榜单变化")
+async def live(
+    event_id: int = Query(None, description="只接收该项目的排名变化（榜单变化总是推送）"),
+    db: Session = Depends(get_db)
+):
+    """
+    订阅排名和榜单变化（text/event-stream，无需登录）
+    
+    - 连接后先收到 snapshot 事件：班级总分榜、年级奖牌榜和已推送项目排名的完整结果
+    - 之后成绩录入、修改、作废改变结果时收到 event-ranking / class-total / grade-medals 事件：
+      upsert 为新增或变化的行，remove 为移除的行主键（成绩ID、班级ID、年级ID）
+    - 客户端读取过慢时丢弃积压的变化，重新收到 snapshot 事件
+    """
+    subscriber = live_hub.subscribe(event_id)
+    try:
+        seed_live_topics(db, event_id)
+    except Exception:
+        live_hub.unsubscribe(subscriber)
+        raise
+    finally:
+        # 快照准备完毕后释放数据库连接，长连接期间不占用
+        db.close()
+    
+    return StreamingResponse(
+        live_stream(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(live_hub.unsubscribe, subscriber)
+    )
@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.pagination import TOTAL_EXACT, TOTAL_PATTERN, paginate, page_response
 from app.api.deps import get_admin_user
 from app.models.user import User
 from app.models.log import OperationLog
@@ -18,6 +19,8 @@ router = APIRouter(prefix="/logs", tags=["操作日志"])
 async def get_logs(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    after: int = Query(None, description="游标：上一页最后一条记录的ID，传入时忽略page"),
+    total_mode: str = Query(TOTAL_EXACT, alias="total", pattern=TOTAL_PATTERN, description="总数计算方式（exact精确/estimate上限计数/none不计数）"),
     user_id: int = Query(None, description="按操作人筛选"),
     action: str = Query(None, description="按操作类型筛选"),
     target_type: str = Query(None, description="按目标类型筛选"),
@@ -49,14 +52,11 @@ async def get_logs(
     if end_date:
         query = query.filter(OperationLog.created_at <= end_date)
     
-    # 按时间倒序
-    query = query.order_by(OperationLog.created_at.desc())
+    # 按时间倒序（ID与记录时间同序，按ID倒序可用游标定位）
+    logs, total = paginate(query, OperationLog.id, page, page_size, after, total_mode, descending=True)
     
-    total = query.count()
-    logs = query.offset((page - 1) * page_size).limit(page_size).all()
-    
-    return {
-        "items": [
+    return page_response(
+        [
             {
                 "id": log.id,
                 "user_id": log.user_id,
@@ -68,10 +68,11 @@ async def get_logs(
                 "created_at": log.created_at.isoformat() if log.created_at else None
             } for log in logs
         ],
-        "total": total,
-        "page": page,
-        "page_size": page_size
-    }
+        total,
+        page,
+        page_size,
+        total_mode
+    )
 
 
 @router.get("/actions", summary="获取操作类型列表")
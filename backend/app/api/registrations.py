@@ -1,21 +1,33 @@
 """
 报名管理API路由模块
 """
+import hashlib
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
-from typing import List
+from typing import List, Union
 from sqlalchemy.orm import Session
 
+from app.core import import_cache
 from app.core.database import get_db
+from app.core.pagination import TOTAL_EXACT, TOTAL_PATTERN, page_response
+from app.core.ingestion import spool_upload, is_import_file, is_archive_file
 from app.services.registration_service import RegistrationService
+from app.services.seeding_service import SeedingService
 from app.api.deps import get_current_user, require_permission
+from app.api.jobs import run_import_job
 from app.models.user import User
 from app.schemas import (
     RegistrationInfo,
     RegistrationCreate,
+    RegistrationBatchCreate,
+    RegistrationBatchItem,
+    RegistrationBatchResponse,
     RegistrationLaneUpdate,
+    SeedingRequest,
+    SeedingResponse,
     DuplicateCheckResponse,
     ResponseBase,
-    ImportResponse
+    ImportResponse,
+    ImportJobInfo
 )
 
 router = APIRouter(prefix="/registrations", tags=["报名管理"])
@@ -25,6 +37,8 @@ router = APIRouter(prefix="/registrations", tags=["报名管理"])
 async def get_registrations(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    after: int = Query(None, description="游标：上一页最后一条记录的ID，传入时忽略page"),
+    total_mode: str = Query(TOTAL_EXACT, alias="total", pattern=TOTAL_PATTERN, description="总数计算方式（exact精确/estimate上限计数/none不计数）"),
     event_id: int = Query(None, description="按项目筛选"),
     group_id: int = Query(None, description="按组别ID筛选"),
     group_name: str = Query(None, description="按组别名称筛选"),
@@ -57,16 +71,19 @@ async def get_registrations(
         class_id=class_id,
         grade_id=grade_id,
         student_id=student_id,
-        student_name=student_name
+        student_name=student_name,
+        after=after,
+        total=total_mode
     )
     
-    return {
-        "items": [
+    return page_response(
+        [
             RegistrationInfo(
                 id=r.id,
                 student_id=r.student_id,
                 event_id=r.event_id,
                 group_id=r.group_id,
+                heat_no=r.heat_no,
                 lane_no=r.lane_no,
                 student_name=r.student.name if r.student else None,
                 student_no=r.student.student_no if r.student else None,
@@ -77,10 +94,11 @@ async def get_registrations(
                 created_at=r.created_at
             ) for r in registrations
         ],
-        "total": total,
-        "page": page,
-        "page_size": page_size
-    }
+        total,
+        page,
+        page_size,
+        total_mode
+    )
 
 
 @router.post("", response_model=RegistrationInfo, summary="创建报名")
@@ -120,6 +138,7 @@ async def create_registration(
         student_id=registration.student_id,
         event_id=registration.event_id,
         group_id=registration.group_id,
+        heat_no=registration.heat_no,
         lane_no=registration.lane_no,
         student_name=registration.student.name if registration.student else None,
         student_no=registration.student.student_no if registration.student else None,
@@ -130,6 +149,40 @@ async def create_registration(
     )
 
 
+@router.post("/batch", response_model=RegistrationBatchResponse, summary="批量创建报名")
+async def create_registrations_batch(
+    request: RegistrationBatchCreate,
+    current_user: User = Depends(require_permission("registration_manage")),
+    db: Session = Depends(get_db)
+):
+    """
+    批量创建报名记录（如班主任一次为全班学生报名）
+    
+    - **items**: 报名条目列表，每条包含 student_id、event_id、group_id（可选）
+    
+    校验规则与单条创建相同，批次内的条目相互计入重复和限报校验；
+    通过校验的条目在同一事务中写入，逐条返回结果
+    """
+    reg_service = RegistrationService(db)
+    verdicts = reg_service.create_registrations(
+        [(item.student_id, item.event_id, item.group_id) for item in request.items],
+        created_by=current_user.id
+    )
+    
+    items = [
+        RegistrationBatchItem(
+            student_id=item.student_id,
+            event_id=item.event_id,
+            group_id=item.group_id,
+            success=not error,
+            registration_id=registration_id,
+            error=error
+        ) for item, (registration_id, error) in zip(request.items, verdicts)
+    ]
+    success = sum(1 for item in items if item.success)
+    return RegistrationBatchResponse(success=success, failed=len(items) - success, items=items)
+
+
 @router.get("/check-duplicate", response_model=DuplicateCheckResponse, summary="查重检测")
 async def check_duplicate(
     student_id: int = Query(..., description="学生ID"),
@@ -150,6 +203,7 @@ async def check_duplicate(
             student_id=existing.student_id,
             event_id=existing.event_id,
             group_id=existing.group_id,
+            heat_no=existing.heat_no,
             lane_no=existing.lane_no,
             student_name=existing.student.name if existing.student else None,
             student_no=existing.student.student_no if existing.student else None,
@@ -165,6 +219,32 @@ async def check_duplicate(
     )
 
 
+@router.post("/seeding", response_model=SeedingResponse, summary="自动分组编排")
+async def seed_registrations(
+    request: SeedingRequest,
+    current_user: User = Depends(require_permission("registration_manage")),
+    db: Session = Depends(get_db)
+):
+    """
+    按项目-组别自动分组并编排组次和道次
+    
+    - **event_ids**: 要编排的项目ID，为空时编排全部项目
+    - **lane_count**: 跑道数（每组最多人数）
+    - **draw**: 无预赛成绩时的抽签方式（serpentine按班级蛇形分组/random随机）
+    - **seed**: 随机种子（可选，相同种子得到相同的编排结果）
+    
+    有预赛成绩的项目按成绩排定种子，重新编排会覆盖已有的组次和道次
+    """
+    seeding_service = SeedingService(db)
+    result = seeding_service.seed_events(
+        event_ids=request.event_ids,
+        lane_count=request.lane_count,
+        draw=request.draw,
+        seed=request.seed
+    )
+    return SeedingResponse(**result)
+
+
 @router.put("/{registration_id}/lane", response_model=ResponseBase, summary="更新道次")
 async def update_lane(
     registration_id: int,
@@ -218,56 +298,81 @@ async def clear_all_registrations(
     """
     清空所有报名记录
     
-    同时清空相关的学生数据
+    同时清空相关的学生数据；已有成绩时需先归档本届数据
     """
     reg_service = RegistrationService(db)
-    count = reg_service.clear_all_registrations()
+    count, error = reg_service.clear_all_registrations()
+    
+    if error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error
+        )
     
     return ResponseBase(message=f"已清空 {count} 条报名记录")
 
 
-@router.post("/import", response_model=ImportResponse, summary="批量导入报名")
+@router.post("/import", response_model=Union[ImportResponse, ImportJobInfo], summary="批量导入报名")
 async def import_registrations(
-    files: List[UploadFile] = File(..., description="Excel文件（支持多选）"),
+    files: List[UploadFile] = File(..., description="Excel或CSV/TSV文件（支持多选），或包含这些文件的ZIP压缩包"),
+    background: bool = Query(False, description="是否后台执行（立即返回任务信息）"),
+    dry_run: bool = Query(False, description="试运行：只校验并返回导入结果，不写入数据"),
     current_user: User = Depends(require_permission("registration_manage")),
     db: Session = Depends(get_db)
 ):
     """
-    批量导入报名（支持多文件上传）
+    批量导入报名（支持多文件上传，或上传导出的班级报名表ZIP压缩包）
     
-    Excel格式要求：
+    多个文件并行解析后在同一事务中写入，响应中 files 为各文件的导入结果
+    
+    Excel/CSV格式要求（CSV/TSV支持UTF-8和GBK编码，文件名为"年级-班级"时自动识别班级）：
     - 第一行为表头
     - 列顺序：学号, 项目名称, 组别名称(可选)
     
-    系统会自动执行查重和限制校验
+    系统会自动执行查重和限制校验；
+    background=true 时立即返回任务信息，通过 GET /api/jobs/{id} 查询进度；
+    dry_run=true 时只校验并返回将会导入、重复和失败的行数，不写入任何数据
     """
-    total_success = 0
-    total_failed = 0
-    all_errors = []
+    rejected = []
+    uploads = []
+    # 所有上传文件按顺序计算一个摘要，文件名列表一并作为缓存参数
+    hasher = hashlib.sha256()
     
-    for file in files:
-        # 检查文件类型
-        if not file.filename.endswith(('.xlsx', '.xls')):
-            all_errors.append(f"文件 {file.filename}: 只支持Excel文件格式(.xlsx, .xls)")
-            total_failed += 1
-            continue
-        
-        # 读取文件内容
-        content = await file.read()
-        
-        reg_service = RegistrationService(db)
-        success, failed, errors = reg_service.import_registrations(
-            content,
-            created_by=current_user.id,
-            filename=file.filename
-        )
-        
-        total_success += success
-        total_failed += failed
-        all_errors.extend(errors)
+    try:
+        for file in files:
+            # 检查文件类型
+            if not is_import_file(file.filename) and not is_archive_file(file.filename):
+                rejected.append(file.filename)
+                continue
+            
+            # 分块读取上传文件
+            uploads.append((file.filename, await spool_upload(file, hasher)))
+    except Exception:
+        for _, upload in uploads:
+            upload.close()
+        raise
     
-    return ImportResponse(
-        success=total_success,
-        failed=total_failed,
-        errors=all_errors
+    user_id = current_user.id
+    cache_key = import_cache.make_key(
+        "registration_import", hasher.hexdigest(),
+        filenames=[name for name, _ in uploads], dry_run=dry_run
     )
+    
+    def work(job_db, result):
+        try:
+            for name in rejected:
+                result.add_file_error("只支持Excel、CSV文件或ZIP压缩包(.xlsx, .xls, .csv, .tsv, .zip)", file=name)
+            import_cache.run_cached(
+                job_db, result, "registration_import", cache_key,
+                lambda: RegistrationService(job_db).import_registration_files(
+                    uploads,
+                    created_by=user_id,
+                    result=result,
+                    dry_run=dry_run
+                )
+            )
+        finally:
+            for _, upload in uploads:
+                upload.close()
+    
+    return await run_import_job("registration_import", work, user_id, background)
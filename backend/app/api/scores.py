@@ -1,12 +1,20 @@
 """
 成绩管理API路由模块
 """
+import hashlib
+import os
+from typing import Union
+
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from sqlalchemy.orm import Session
 
+from app.core import import_cache
 from app.core.database import get_db
+from app.core.pagination import TOTAL_EXACT, TOTAL_PATTERN, page_response
+from app.core.ingestion import spool_upload, is_import_file, IMPORT_FORMAT_ERROR
 from app.services.score_service import ScoreService
 from app.api.deps import get_current_user, require_permission
+from app.api.jobs import run_import_job
 from app.models.user import User
 from app.schemas import (
     ScoreInfo,
@@ -15,7 +23,8 @@ from app.schemas import (
     ScoreInvalidate,
     ScoreDuplicateCheckResponse,
     ResponseBase,
-    ImportResponse
+    ImportResponse,
+    ImportJobInfo
 )
 
 router = APIRouter(prefix="/scores", tags=["成绩管理"])
@@ -25,6 +34,8 @@ router = APIRouter(prefix="/scores", tags=["成绩管理"])
 async def get_scores(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    after: int = Query(None, description="游标：上一页最后一条记录的ID，传入时忽略page"),
+    total_mode: str = Query(TOTAL_EXACT, alias="total", pattern=TOTAL_PATTERN, description="总数计算方式（exact精确/estimate上限计数/none不计数）"),
     event_id: int = Query(None, description="按项目筛选"),
     class_id: int = Query(None, description="按班级筛选"),
     grade_id: int = Query(None, description="按年级筛选"),
@@ -54,11 +65,13 @@ async def get_scores(
         grade_id=grade_id,
         student_id=student_id,
         round=round,
-        include_invalid=include_invalid
+        include_invalid=include_invalid,
+        after=after,
+        total=total_mode
     )
     
-    return {
-        "items": [
+    return page_response(
+        [
             ScoreInfo(
                 id=s.id,
                 registration_id=s.registration_id,
@@ -75,10 +88,11 @@ async def get_scores(
                 event_name=s.registration.event.name if s.registration and s.registration.event else None
             ) for s in scores
         ],
-        "total": total,
-        "page": page,
-        "page_size": page_size
-    }
+        total,
+        page,
+        page_size,
+        total_mode
+    )
 
 
 @router.post("", response_model=ScoreInfo, summary="录入成绩")
@@ -285,41 +299,58 @@ async def invalidate_score(
     )
 
 
-@router.post("/import", response_model=ImportResponse, summary="批量导入成绩")
+@router.post("/import", response_model=Union[ImportResponse, ImportJobInfo], summary="批量导入成绩")
 async def import_scores(
-    file: UploadFile = File(..., description="Excel文件"),
+    file: UploadFile = File(..., description="Excel或CSV/TSV文件"),
     round: str = Query("final", description="轮次（preliminary/final）"),
+    background: bool = Query(False, description="是否后台执行（立即返回任务信息）"),
+    dry_run: bool = Query(False, description="试运行：只校验并返回导入结果，不写入数据"),
     current_user: User = Depends(require_permission("score_manage")),
     db: Session = Depends(get_db)
 ):
     """
     批量导入成绩
     
-    Excel格式要求：
-    - 第一行为表头
-    - 列顺序：学号, 项目名称, 成绩
+    Excel/CSV格式要求（CSV/TSV支持UTF-8和GBK编码）：
+    - 第一行为表头，按表头名称识别列
+    - 默认列顺序：学号, 项目名称, 成绩
     
     系统会自动匹配学生和项目，已存在的成绩会被覆盖
+    
+    background=true 时立即返回任务信息，通过 GET /api/jobs/{id} 查询进度；
+    dry_run=true 时只校验并返回将会导入、重复和失败的行数，不写入任何数据
     """
     # 检查文件类型
-    if not file.filename.endswith(('.xlsx', '.xls')):
+    if not is_import_file(file.filename):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="只支持Excel文件格式(.xlsx, .xls)"
+            detail=IMPORT_FORMAT_ERROR
         )
     
-    # 读取文件内容
-    content = await file.read()
-    
-    score_service = ScoreService(db)
-    success, failed, errors = score_service.import_scores(
-        content,
-        round=round,
-        created_by=current_user.id
+    # 分块读取上传文件
+    hasher = hashlib.sha256()
+    upload = await spool_upload(file, hasher)
+    filename = file.filename
+    user_id = current_user.id
+    cache_key = import_cache.make_key(
+        "score_import", hasher.hexdigest(),
+        extension=os.path.splitext(filename)[1].lower(), round=round, dry_run=dry_run
     )
+
+    def work(job_db, result):
+        try:
+            import_cache.run_cached(
+                job_db, result, "score_import", cache_key,
+                lambda: ScoreService(job_db).import_scores(
+                    upload,
+                    round=round,
+                    created_by=user_id,
+                    result=result,
+                    filename=filename,
+                    dry_run=dry_run
+                )
+            )
+        finally:
+            upload.close()
     
-    return ImportResponse(
-        success=success,
-        failed=failed,
-        errors=errors
-    )
+    return await run_import_job("score_import", work, user_id, background)
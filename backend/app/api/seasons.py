@@ -0,0 +1,51 @@
+"""
+届次归档API路由模块
+"""
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.services.season_service import SeasonService
+from app.api.deps import get_current_user, get_admin_user
+from app.models.user import User
+from app.schemas import SeasonInfo, SeasonArchiveRequest
+
+router = APIRouter(prefix="/seasons", tags=["届次归档"])
+
+
+@router.get("", response_model=List[SeasonInfo], summary="获取已归档届次列表")
+async def get_seasons(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    获取已归档的届次列表（最近的在前）
+    """
+    season_service = SeasonService(db)
+    return season_service.get_season_list()
+
+
+@router.post("/archive", response_model=SeasonInfo, summary="归档本届数据")
+async def archive_season(
+    request: SeasonArchiveRequest,
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    归档本届数据并开始新一届（需要管理员权限）
+    
+    - **name**: 届次名称，如"2024年秋季运动会"
+    
+    年级、班级、学生、报名、成绩复制到归档表后清空，项目设置复制到归档表并保留
+    """
+    season_service = SeasonService(db)
+    season, error = season_service.archive_season(request.name, archived_by=current_user.id)
+    
+    if error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error
+        )
+    
+    return season
@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.stats_cache import stats_cache
 from app.services.statistics_service import StatisticsService
 from app.api.deps import get_current_user, require_permission
 from app.models.user import User
@@ -40,10 +41,11 @@ async def get_event_ranking(
     - 田赛：成绩降序（距离/高度越大越好）
     """
     stats_service = StatisticsService(db)
-    rankings = stats_service.get_event_ranking(
-        event_id=event_id,
-        round=round,
-        top_n=top_n
+    rankings = stats_cache.get_or_compute(
+        "event-ranking",
+        (event_id, round, top_n),
+        lambda: stats_service.get_event_ranking(event_id=event_id, round=round, top_n=top_n),
+        event_id=event_id
     )
     
     return {"rankings": rankings}
@@ -63,7 +65,9 @@ async def get_class_total(
     按总分降序排列，同时显示金银铜牌数
     """
     stats_service = StatisticsService(db)
-    rankings = stats_service.get_class_total(grade_id=grade_id)
+    rankings = stats_cache.get_or_compute(
+        "class-total", (grade_id,), lambda: stats_service.get_class_total(grade_id=grade_id)
+    )
     
     return {"rankings": rankings}
 
@@ -79,7 +83,7 @@ async def get_grade_medals(
     按金牌数、银牌数、铜牌数依次排序
     """
     stats_service = StatisticsService(db)
-    rankings = stats_service.get_grade_medals()
+    rankings = stats_cache.get_or_compute("grade-medals", (), stats_service.get_grade_medals)
     
     return {"rankings": rankings}
 
@@ -95,11 +99,23 @@ async def get_scoring_rules(
     返回名次与得分的对应关系
     """
     stats_service = StatisticsService(db)
-    rules = stats_service.get_scoring_rules()
+    rules = stats_cache.get_or_compute("scoring-rules", (), stats_service.get_scoring_rules)
     
     return {"rules": rules}
 
 
+@router.get("/cache", summary="获取统计缓存状态")
+async def get_cache_stats(
+    current_user: User = Depends(get_current_user)
+) -> Dict:
+    """
+    获取统计结果缓存状态
+    
+    返回条目数、命中/未命中次数和当前数据版本
+    """
+    return stats_cache.stats()
+
+
 @router.put("/scoring-rules", response_model=ResponseBase, summary="更新计分规则")
 async def update_scoring_rules(
     request: ScoringRulesUpdate,
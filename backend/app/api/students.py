@@ -1,12 +1,20 @@
 """
 学生管理API路由模块
 """
+import hashlib
+import os
+from typing import List, Union
+
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from sqlalchemy.orm import Session
 
+from app.core import import_cache
 from app.core.database import get_db
+from app.core.pagination import TOTAL_EXACT, TOTAL_PATTERN, page_response
+from app.core.ingestion import spool_upload, is_import_file, IMPORT_FORMAT_ERROR
 from app.services.base_service import BaseService
 from app.api.deps import get_current_user, require_permission
+from app.api.jobs import run_import_job
 from app.models.user import User
 from app.schemas import (
     StudentInfo,
@@ -14,6 +22,7 @@ from app.schemas import (
     StudentUpdate,
     DeleteResponse,
     ImportResponse,
+    ImportJobInfo,
     ResponseBase
 )
 
@@ -24,6 +33,8 @@ router = APIRouter(prefix="/students", tags=["学生管理"])
 async def get_students(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    after: int = Query(None, description="游标：上一页最后一条记录的ID，传入时忽略page"),
+    total_mode: str = Query(TOTAL_EXACT, alias="total", pattern=TOTAL_PATTERN, description="总数计算方式（exact精确/estimate上限计数/none不计数）"),
     grade_id: int = Query(None, description="按年级筛选"),
     class_id: int = Query(None, description="按班级筛选"),
     keyword: str = Query(None, description="搜索关键词（姓名或学号）"),
@@ -41,11 +52,13 @@ async def get_students(
         grade_id=grade_id,
         class_id=class_id,
         keyword=keyword,
-        gender=gender
+        gender=gender,
+        after=after,
+        total=total_mode
     )
     
-    return {
-        "items": [
+    return page_response(
+        [
             StudentInfo(
                 id=s.id,
                 class_id=s.class_id,
@@ -57,10 +70,11 @@ async def get_students(
                 created_at=s.created_at
             ) for s in students
         ],
-        "total": total,
-        "page": page,
-        "page_size": page_size
-    }
+        total,
+        page,
+        page_size,
+        total_mode
+    )
 
 
 @router.post("", response_model=StudentInfo, summary="创建学生")
@@ -93,6 +107,34 @@ async def create_student(
 
 
 # 固定路径路由必须在动态路径之前定义
+@router.get("/search", response_model=List[StudentInfo], summary="搜索学生")
+async def search_students(
+    q: str = Query(..., min_length=1, max_length=50, description="姓名片段、学号前缀或姓名拼音首字母"),
+    limit: int = Query(20, ge=1, le=50, description="最多返回条数"),
+    grade_id: int = Query(None, description="按年级筛选"),
+    class_id: int = Query(None, description="按班级筛选"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    边输入边搜索学生（内存索引，不查询数据库）
+    """
+    base_service = BaseService(db)
+    students = base_service.search_students(q, limit, class_id=class_id, grade_id=grade_id)
+    
+    return [
+        StudentInfo(
+            id=s.id,
+            class_id=s.class_id,
+            student_no=s.student_no,
+            name=s.name,
+            gender=s.gender,
+            class_name=s.class_name,
+            grade_name=s.grade_name
+        ) for s in students
+    ]
+
+
 @router.get("/template", summary="下载班级学生导入模板")
 async def download_student_template(
     class_id: int = Query(..., description="班级ID"),
@@ -187,18 +229,66 @@ async def download_student_template(
     )
 
 
-@router.post("/import-by-class", response_model=ImportResponse, summary="按班级批量导入学生")
+@router.post("/import", response_model=Union[ImportResponse, ImportJobInfo], summary="批量导入学生")
+async def import_students(
+    file: UploadFile = File(..., description="Excel或CSV/TSV文件"),
+    background: bool = Query(False, description="是否后台执行（立即返回任务信息）"),
+    dry_run: bool = Query(False, description="试运行：只校验并返回导入结果，不写入数据"),
+    current_user: User = Depends(require_permission("base_manage")),
+    db: Session = Depends(get_db)
+):
+    """
+    批量导入学生
+    
+    Excel/CSV格式要求（CSV/TSV支持UTF-8和GBK编码）：
+    - 第一行为表头，按表头名称识别列
+    - 默认列顺序：学号, 姓名, 性别(男/女), 年级, 班级
+    
+    background=true 时立即返回任务信息，通过 GET /api/jobs/{id} 查询进度；
+    dry_run=true 时只校验并返回将会导入、重复和失败的行数，不写入任何数据
+    """
+    if not is_import_file(file.filename):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=IMPORT_FORMAT_ERROR
+        )
+    
+    hasher = hashlib.sha256()
+    upload = await spool_upload(file, hasher)
+    filename = file.filename
+    cache_key = import_cache.make_key(
+        "student_import", hasher.hexdigest(),
+        extension=os.path.splitext(filename)[1].lower(), dry_run=dry_run
+    )
+    
+    def work(job_db, result):
+        try:
+            import_cache.run_cached(
+                job_db, result, "student_import", cache_key,
+                lambda: BaseService(job_db).import_students(
+                    upload, result=result, filename=filename, dry_run=dry_run
+                )
+            )
+        finally:
+            upload.close()
+    
+    return await run_import_job("student_import", work, current_user.id, background)
+
+
+@router.post("/import-by-class", response_model=Union[ImportResponse, ImportJobInfo], summary="按班级批量导入学生")
 async def import_students_by_class(
     class_id: int = Query(..., description="班级ID"),
-    file: UploadFile = File(..., description="Excel文件"),
+    file: UploadFile = File(..., description="Excel或CSV/TSV文件"),
+    background: bool = Query(False, description="是否后台执行（立即返回任务信息）"),
+    dry_run: bool = Query(False, description="试运行：只校验并返回导入结果，不写入数据"),
     current_user: User = Depends(require_permission("base_manage")),
     db: Session = Depends(get_db)
 ):
     """按班级批量导入学生"""
-    if not file.filename.endswith(('.xlsx', '.xls')):
+    if not is_import_file(file.filename):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="只支持Excel文件格式(.xlsx, .xls)"
+            detail=IMPORT_FORMAT_ERROR
         )
     
     from app.models.base import Class
@@ -206,11 +296,26 @@ async def import_students_by_class(
     if not class_obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="班级不存在")
     
-    content = await file.read()
-    base_service = BaseService(db)
-    success, failed, errors = base_service.import_students_by_class(content, class_id)
+    hasher = hashlib.sha256()
+    upload = await spool_upload(file, hasher)
+    filename = file.filename
+    cache_key = import_cache.make_key(
+        "student_import", hasher.hexdigest(),
+        extension=os.path.splitext(filename)[1].lower(), class_id=class_id, dry_run=dry_run
+    )
+
+    def work(job_db, result):
+        try:
+            import_cache.run_cached(
+                job_db, result, "student_import", cache_key,
+                lambda: BaseService(job_db).import_students_by_class(
+                    upload, class_id, result=result, filename=filename, dry_run=dry_run
+                )
+            )
+        finally:
+            upload.close()
     
-    return ImportResponse(success=success, failed=failed, errors=errors)
+    return await run_import_job("student_import", work, current_user.id, background)
 
 
 @router.delete("/clear-all", response_model=ResponseBase, summary="清空所有学生")
@@ -220,14 +325,20 @@ async def clear_all_students(
 ):
     """清空所有学生"""
     from app.models.base import Student
-    from sqlalchemy import text
+    from app.models.registration import Registration, ClassEventQuota, StudentQuota
+    from app.core.database import truncate_tables
+    from app.core.student_index import student_index
     
-    student_count = db.query(Student).delete()
-    db.commit()
+    if db.query(Registration.id).first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="存在报名记录，请先清空报名或归档本届数据"
+        )
     
-    # 重置自增ID（MySQL语法）
-    db.execute(text("ALTER TABLE students AUTO_INCREMENT = 1"))
-    db.commit()
+    student_count = db.query(Student).count()
+    # 整表清空并重置自增ID，报名计数一并清空
+    truncate_tables(db, (Student, ClassEventQuota, StudentQuota))
+    student_index.invalidate()
     
     return ResponseBase(message=f"已清空 {student_count} 个学生")
 
@@ -4,7 +4,9 @@
 """
 from pydantic_settings import BaseSettings
 from typing import Optional
+import os
 import secrets
+import tempfile
 
 
 class Settings(BaseSettings):
@@ -40,9 +42,29 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS: list = [".xlsx", ".xls"]
     
+    # 批量导入配置
+    IMPORT_CHUNK_SIZE: int = 1000  # 批量写入每批行数
+    UPLOAD_SPOOL_MAX_MEMORY: int = 1024 * 1024  # 上传文件超过该大小后落盘（字节）
+    UPLOAD_READ_CHUNK_SIZE: int = 256 * 1024  # 上传文件分块读取大小（字节）
+    IMPORT_JOB_WORKERS: int = 2  # 后台导入任务工作线程数
+    IMPORT_JOB_RETENTION: int = 200  # 内存中保留的导入任务数
+    IMPORT_PARSE_WORKERS: int = min(4, os.cpu_count() or 1)  # 多文件导入时解析进程数（1为不使用进程池）
+    MAX_ZIP_EXTRACT_SIZE: int = 200 * 1024 * 1024  # ZIP解压后允许的总大小（字节）
+    IMPORT_CACHE_ENABLED: bool = True  # 重复上传相同文件时复用上次导入结果
+    IMPORT_CACHE_DIR: str = os.path.join(tempfile.gettempdir(), "sports_meeting_import_cache")
+    IMPORT_CACHE_MAX_ENTRIES: int = 500  # 导入结果缓存最大条目数
+    IMPORT_CACHE_MAX_BYTES: int = 20 * 1024 * 1024  # 导入结果缓存最大占用空间（字节）
+    IMPORT_ERROR_PREVIEW_LIMIT: int = 100  # 导入响应中最多返回的错误条数，完整错误通过错误报告下载
+    IMPORT_ERROR_REPORT_DIR: str = os.path.join(tempfile.gettempdir(), "sports_meeting_import_errors")
+    SEEDING_LANE_COUNT: int = 8  # 分组编排默认跑道数（每组人数）
+    STATS_CACHE_MAX_ENTRIES: int = 256  # 统计结果缓存最大条目数
+    LIVE_QUEUE_SIZE: int = 100  # 实时推送每个连接最多积压的消息数，超过后改为重发快照
+    LIVE_HEARTBEAT_SECONDS: int = 15  # 实时推送无消息时的心跳间隔（秒）
+    
     # 分页配置
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
+    PAGINATION_ESTIMATE_LIMIT: int = 10000  # total=estimate 时最多计数的行数
     
     # 跨域配置
     CORS_ORIGINS: list = ["http://localhost:5173", "http://127.0.0.1:5173"]
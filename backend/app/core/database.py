@@ -1,8 +1,8 @@
 """
 数据库连接与ORM配置模块
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 from app.models.base_model import Base
 
@@ -32,13 +32,72 @@ def get_db():
         db.close()
 
 
+def insert_ignore(db: Session, model):
+    """
+    构造忽略唯一约束冲突的批量插入语句
+    MySQL 使用 INSERT IGNORE，SQLite/PostgreSQL 使用 ON CONFLICT DO NOTHING；
+    执行结果的 rowcount 为实际插入行数
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        return mysql_insert(model).prefix_with("IGNORE")
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(model).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(model).on_conflict_do_nothing()
+    return insert(model)
+
+
+def supports_window_functions(db: Session) -> bool:
+    """数据库是否支持窗口函数（MySQL 8.0+、MariaDB 10.2+、SQLite 3.25+、PostgreSQL）"""
+    dialect = db.connection().dialect  # 连接后才有服务器版本信息
+    version = dialect.server_version_info or ()
+    if dialect.name == "mysql":
+        return version >= ((10, 2) if getattr(dialect, "is_mariadb", False) else (8, 0))
+    if dialect.name == "sqlite":
+        return version >= (3, 25)
+    return True
+
+
+def truncate_tables(db: Session, models) -> None:
+    """
+    清空数据表并重置自增ID（models 按外键依赖顺序，被引用的表在后）
+    MySQL 使用 TRUNCATE TABLE（临时关闭外键检查），不逐行删除、不产生长时间行锁；
+    TRUNCATE 会隐式提交当前事务，调用前应先提交需要保留的写入
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        db.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
+        try:
+            for model in models:
+                db.execute(text(f"TRUNCATE TABLE {model.__tablename__}"))
+        finally:
+            db.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
+    elif dialect == "postgresql":
+        names = ", ".join(model.__tablename__ for model in models)
+        db.execute(text(f"TRUNCATE TABLE {names} RESTART IDENTITY CASCADE"))
+    else:
+        # SQLite 没有 TRUNCATE；无 AUTOINCREMENT 的表清空后ID从1重新开始
+        for model in models:
+            db.query(model).delete(synchronize_session=False)
+    db.commit()
+    
+    # 会话中已加载的这些表的对象对应的行已不存在
+    models = tuple(models)
+    for instance in [obj for obj in db.identity_map.values() if isinstance(obj, models)]:
+        db.expunge(instance)
+
+
 def init_db():
     """
     初始化数据库
     创建所有表结构
     """
     # 导入所有模型以确保它们被注册
-    from app.models import user, base, event, registration, score, announcement, log
+    from app.models import user, base, event, registration, score, announcement, log, archive
     
     # 创建所有表
     Base.metadata.create_all(bind=engine)
@@ -0,0 +1,199 @@
+"""
+维度数据缓存模块
+年级、班级、项目、组别数据量小且很少变化，在进程内存中缓存一份只读快照：
+按ID查行、按自然键（年级名称、(年级ID, 班级名称)、项目名称、(项目ID, 组别名称)）查ID，
+排名、导出、奖状、导入等热点路径据此渲染名称和解析键值，不再逐行懒加载或查询。
+首次使用时加载（每张表一次查询），对应的服务写入提交后标记失效，下次使用时重新加载；
+按ID查找缺失时也重新加载一次。
+写事务中需要读取未提交的修改（如修改计分规则后重新计算得分）时仍直接查询数据库
+"""
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.base import Grade, Class
+from app.models.event import Event, EventGroup
+
+
+class GradeRow(NamedTuple):
+    """年级"""
+    id: int
+    name: str
+    sort_order: int
+
+
+class ClassRow(NamedTuple):
+    """班级（附所属年级名称）"""
+    id: int
+    grade_id: int
+    name: str
+    grade_name: str
+
+
+class EventRow(NamedTuple):
+    """项目"""
+    id: int
+    name: str
+    type: str
+    category: Optional[str]
+    unit: str
+    max_per_class: int
+    max_per_student: int
+    has_preliminary: bool
+    scoring_rule: Any
+    sort_order: int
+
+
+class GroupRow(NamedTuple):
+    """组别"""
+    id: int
+    event_id: int
+    name: str
+    gender: str
+    grade_ids: Any
+
+
+class Dimensions:
+    """某一时刻的维度数据快照（只读）"""
+    
+    def __init__(
+        self,
+        grades: List[GradeRow],
+        classes: List[ClassRow],
+        events: List[EventRow],
+        groups: List[GroupRow]
+    ):
+        # 各列表按ID排序；同名记录以ID最小的为准，与按ID排序取 first() 的结果一致
+        self.grades: Dict[int, GradeRow] = {row.id: row for row in grades}
+        self.classes: Dict[int, ClassRow] = {row.id: row for row in classes}
+        self.events: Dict[int, EventRow] = {row.id: row for row in events}
+        self.groups: Dict[int, GroupRow] = {row.id: row for row in groups}
+        self.grade_ids: Dict[str, int] = {}
+        self.class_ids: Dict[Tuple[int, str], int] = {}
+        self.event_ids: Dict[str, int] = {}
+        self.group_ids: Dict[Tuple[int, str], int] = {}
+        self.event_groups: Dict[int, List[GroupRow]] = {}
+        for row in grades:
+            self.grade_ids.setdefault(row.name, row.id)
+        for row in classes:
+            self.class_ids.setdefault((row.grade_id, row.name), row.id)
+        for row in events:
+            self.event_ids.setdefault(row.name, row.id)
+        for row in groups:
+            self.group_ids.setdefault((row.event_id, row.name), row.id)
+            self.event_groups.setdefault(row.event_id, []).append(row)
+    
+    def has(
+        self,
+        grade_ids: Iterable[int] = (),
+        class_ids: Iterable[int] = (),
+        event_ids: Iterable[int] = (),
+        group_ids: Iterable[int] = ()
+    ) -> bool:
+        """快照是否包含给定的全部ID"""
+        return (
+            all(i in self.grades for i in grade_ids)
+            and all(i in self.classes for i in class_ids)
+            and all(i in self.events for i in event_ids)
+            and all(i in self.groups for i in group_ids)
+        )
+    
+    def grade_name(self, grade_id: int) -> Optional[str]:
+        row = self.grades.get(grade_id)
+        return row.name if row else None
+    
+    def class_name(self, class_id: int) -> Optional[str]:
+        row = self.classes.get(class_id)
+        return row.name if row else None
+    
+    def event_name(self, event_id: int) -> Optional[str]:
+        row = self.events.get(event_id)
+        return row.name if row else None
+    
+    def classes_of_grade(self, grade_id: int) -> List[int]:
+        """年级下的班级ID"""
+        return [row.id for row in self.classes.values() if row.grade_id == grade_id]
+    
+    def sorted_classes(self) -> List[ClassRow]:
+        """按年级排序序号、班级名称排序的班级"""
+        return sorted(
+            self.classes.values(),
+            key=lambda row: (self.grades[row.grade_id].sort_order, row.name)
+        )
+    
+    def sorted_events(self) -> List[EventRow]:
+        """按项目名称排序的项目"""
+        return sorted(self.events.values(), key=lambda row: row.name)
+
+
+class DimensionCache:
+    """维度数据缓存"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dimensions: Optional[Dimensions] = None
+        self._bind = None  # 加载快照的数据库引擎，引擎不同时（如测试）重新加载
+        self._version = 0  # 每次失效加一，加载期间失效时加载结果不保存
+    
+    @property
+    def stale(self) -> bool:
+        """缓存是否需要重新加载"""
+        return self._dimensions is None
+    
+    def invalidate(self) -> None:
+        """标记缓存失效（年级、班级、项目、组别写入提交后调用）"""
+        with self._lock:
+            self._version += 1
+            self._dimensions = None
+    
+    def load(self, db: Session) -> Dimensions:
+        """从数据库加载快照（每张表一次查询）"""
+        version = self._version
+        grades = [GradeRow(*row) for row in db.query(Grade.id, Grade.name, Grade.sort_order).order_by(Grade.id)]
+        grade_names = {row.id: row.name for row in grades}
+        classes = [
+            ClassRow(class_id, grade_id, name, grade_names.get(grade_id))
+            for class_id, grade_id, name in db.query(Class.id, Class.grade_id, Class.name).order_by(Class.id)
+        ]
+        events = [
+            EventRow(*row) for row in db.query(
+                Event.id, Event.name, Event.type, Event.category, Event.unit, Event.max_per_class,
+                Event.max_per_student, Event.has_preliminary, Event.scoring_rule, Event.sort_order
+            ).order_by(Event.id)
+        ]
+        groups = [
+            GroupRow(*row) for row in db.query(
+                EventGroup.id, EventGroup.event_id, EventGroup.name, EventGroup.gender, EventGroup.grade_ids
+            ).order_by(EventGroup.id)
+        ]
+        dimensions = Dimensions(grades, classes, events, groups)
+        
+        with self._lock:
+            if self._version == version:
+                self._dimensions = dimensions
+                self._bind = db.get_bind()
+        return dimensions
+    
+    def get(
+        self,
+        db: Session,
+        grade_ids: Iterable[int] = (),
+        class_ids: Iterable[int] = (),
+        event_ids: Iterable[int] = (),
+        group_ids: Iterable[int] = ()
+    ) -> Dimensions:
+        """
+        取得快照，失效时重新加载
+        grade_ids/class_ids/event_ids/group_ids: 接下来要查找的ID，快照中缺少时重新加载一次
+        """
+        dimensions = self._dimensions
+        if dimensions is None or self._bind is not db.get_bind():
+            return self.load(db)
+        if not dimensions.has(set(grade_ids), set(class_ids), set(event_ids), set(group_ids)):
+            return self.load(db)
+        return dimensions
+
+
+# 全局维度数据缓存
+dimension_cache = DimensionCache()
@@ -0,0 +1,160 @@
+"""
+导入错误报告模块
+导入过程中逐条将错误写入磁盘上的CSV文件（文件、工作表、行号、列、错误代码、错误信息），
+接口响应只返回错误数量和前若干条错误，完整报告可下载为CSV或Excel
+"""
+import csv
+import os
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional
+
+from openpyxl import Workbook
+
+from app.core.config import settings
+
+# 错误代码
+ERROR_FILE = "file_error"  # 文件无法解析或写入失败
+ERROR_INVALID = "invalid_value"  # 单元格格式错误
+ERROR_NOT_FOUND = "not_found"  # 引用的学生、项目、年级、班级不存在
+ERROR_DUPLICATE = "duplicate"  # 数据已存在
+ERROR_LIMIT = "limit_exceeded"  # 超出限报人数或项目数
+ERROR_ROW = "row_error"  # 其他行级错误
+
+# 错误记录字段及报告表头
+ERROR_FIELDS = ("file", "sheet", "row", "column", "code", "message")
+ERROR_HEADERS = ("文件", "工作表", "行号", "列", "错误代码", "错误信息")
+
+ErrorRecord = Dict[str, Any]
+
+
+def make_error(
+    message: str,
+    row: Optional[int] = None,
+    column: Optional[str] = None,
+    code: str = ERROR_ROW,
+    sheet: Optional[str] = None,
+    file: Optional[str] = None
+) -> ErrorRecord:
+    """构建一条错误记录"""
+    return {"file": file, "sheet": sheet, "row": row, "column": column, "code": code, "message": message}
+
+
+def format_error(record: ErrorRecord) -> str:
+    """
+    将错误记录格式化为一行文本
+    如: [a.xlsx] [一年级-1班] 第4行: 项目'铅球'不存在
+    """
+    prefix = ""
+    if record.get("file"):
+        prefix += f"[{record['file']}] "
+    if record.get("sheet"):
+        prefix += f"[{record['sheet']}] "
+    if record.get("row"):
+        return f"{prefix}第{record['row']}行: {record['message']}"
+    return f"{prefix}{record['message']}"
+
+
+def _row_values(record: ErrorRecord) -> list:
+    return ["" if record.get(field) is None else record[field] for field in ERROR_FIELDS]
+
+
+class ErrorReport:
+    """
+    导入错误报告
+    第一条错误写入时才创建文件，没有错误的导入不产生文件
+    """
+    
+    def __init__(self, report_id: str):
+        self.id = report_id
+        self.path: Optional[str] = None
+        self.count = 0
+        self._file = None
+        self._writer = None
+    
+    @property
+    def url(self) -> str:
+        """报告下载地址"""
+        return f"/api/jobs/{self.id}/errors"
+    
+    def write(self, record: ErrorRecord) -> None:
+        """追加一条错误记录"""
+        if self._writer is None:
+            os.makedirs(settings.IMPORT_ERROR_REPORT_DIR, exist_ok=True)
+            fd, self.path = tempfile.mkstemp(
+                dir=settings.IMPORT_ERROR_REPORT_DIR, prefix=f"{self.id}-", suffix=".csv"
+            )
+            # 带BOM的UTF-8，Excel可直接打开
+            self._file = os.fdopen(fd, "w", encoding="utf-8-sig", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(ERROR_HEADERS)
+        self._writer.writerow(_row_values(record))
+        self.count += 1
+    
+    def flush(self) -> None:
+        """将已写入的记录刷新到磁盘"""
+        if self._file is not None:
+            self._file.flush()
+    
+    def close(self) -> None:
+        """写入结束，关闭文件"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def remove(self) -> None:
+        """删除报告文件"""
+        self.close()
+        if self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+
+def write_report_file(path: str, records: Iterable[ErrorRecord]) -> None:
+    """将错误记录写入指定的报告文件"""
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(ERROR_HEADERS)
+        for record in records:
+            writer.writerow(_row_values(record))
+
+
+def read_report_file(path: str) -> Iterator[ErrorRecord]:
+    """逐条读取报告文件中的错误记录"""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for values in reader:
+            record = {field: value or None for field, value in zip(ERROR_FIELDS, values)}
+            if record["row"]:
+                record["row"] = int(record["row"])
+            yield record
+
+
+def iter_report_csv(path: str) -> Iterator[bytes]:
+    """按块读取CSV报告，用于流式下载"""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(settings.UPLOAD_READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def build_report_xlsx(path: str) -> BinaryIO:
+    """
+    将CSV报告转换为Excel文件（只写模式逐行写入，内存占用与错误数无关）
+    返回已定位到开头的临时文件，由调用方负责关闭
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("导入错误")
+    ws.append(list(ERROR_HEADERS))
+    for record in read_report_file(path):
+        ws.append([record[field] for field in ERROR_FIELDS])
+    
+    output = tempfile.SpooledTemporaryFile(max_size=settings.UPLOAD_SPOOL_MAX_MEMORY)
+    wb.save(output)
+    output.seek(0)
+    return output
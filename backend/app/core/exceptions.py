@@ -179,6 +179,20 @@ class FileTypeError(BusinessException):
         )
 
 
+class FileTooLargeError(BusinessException):
+    """文件过大"""
+    def __init__(self, max_size: int = None):
+        message = "上传文件过大"
+        if max_size:
+            message = f"上传文件不能超过{max_size // (1024 * 1024)}MB"
+        super().__init__(
+            code="FILE_TOO_LARGE",
+            message=message,
+            detail={"max_size": max_size},
+            status_code=413
+        )
+
+
 # ========== 系统异常 ==========
 
 class SystemError(BusinessException):
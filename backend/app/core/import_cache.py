@@ -0,0 +1,218 @@
+"""
+导入结果缓存模块
+以 上传内容SHA-256 + 导入接口 + 导入参数 为键，在磁盘上缓存导入结果；
+相同文件重复上传且相关数据表未发生变化时，直接返回缓存结果而不重新解析文件。
+缓存按最近使用时间（文件修改时间）淘汰，受条目数和总大小限制
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.error_report import read_report_file, write_report_file
+from app.core.ingestion import ImportResult
+from app.models.base import Grade, Class, Student
+from app.models.event import Event, EventGroup
+from app.models.registration import Registration
+from app.models.score import Score
+
+# 各导入接口依赖的数据表，任一表变化时缓存失效
+IMPORT_TABLES = {
+    "student_import": (Grade, Class, Student),
+    "score_import": (Student, Event, Registration, Score),
+    "registration_import": (Grade, Class, Student, Event, EventGroup, Registration),
+}
+
+_lock = threading.Lock()
+
+
+def make_key(kind: str, digest: str, **params: Any) -> str:
+    """根据导入接口、上传内容摘要和导入参数生成缓存键"""
+    payload = json.dumps({"kind": kind, "digest": digest, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def table_fingerprint(db: Session, kind: str) -> List[List[Any]]:
+    """
+    计算相关数据表的指纹：(行数, 最大ID, 最大更新时间)
+    新增、删除、修改记录都会改变指纹
+    """
+    fingerprint = []
+    for model in IMPORT_TABLES[kind]:
+        count, max_id, max_updated = db.query(
+            func.count(model.id), func.max(model.id), func.max(model.updated_at)
+        ).one()
+        fingerprint.append([model.__tablename__, count, max_id, str(max_updated)])
+    return fingerprint
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(settings.IMPORT_CACHE_DIR, f"{key}.json")
+
+
+def _report_path(entry_path: str) -> str:
+    """缓存条目对应的错误报告文件"""
+    return entry_path[:-len(".json")] + ".errors.csv"
+
+
+def get(db: Session, kind: str, key: str) -> Optional[Dict[str, Any]]:
+    """读取缓存的导入结果，相关数据表已变化时删除缓存并返回None"""
+    path = _entry_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    # 数据表已变化或错误报告已丢失时缓存失效
+    if entry.get("fingerprint") != table_fingerprint(db, kind) or (
+        entry["result"].get("error_count") and not os.path.exists(_report_path(path))
+    ):
+        _remove(path)
+        return None
+    
+    # 更新修改时间，作为最近使用时间
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return entry["result"]
+
+
+def put(db: Session, kind: str, key: str, result: ImportResult) -> None:
+    """
+    保存导入结果（记录导入完成后的数据表指纹）及完整错误报告，并按容量淘汰旧条目
+    """
+    entry = {
+        "kind": kind,
+        "fingerprint": table_fingerprint(db, kind),
+        "result": result.to_dict(),
+        "created_at": datetime.utcnow().isoformat()
+    }
+    
+    os.makedirs(settings.IMPORT_CACHE_DIR, exist_ok=True)
+    path = _entry_path(key)
+    if result.error_count:
+        if result.report is not None and result.report.path:
+            result.report.flush()
+            shutil.copyfile(result.report.path, _report_path(path))
+        else:
+            write_report_file(_report_path(path), result.error_records)
+    
+    # 先写临时文件再替换，避免并发读取到不完整的内容
+    fd, tmp_path = tempfile.mkstemp(dir=settings.IMPORT_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+    
+    _evict()
+
+
+def clear() -> None:
+    """清空导入结果缓存"""
+    with _lock:
+        for path, _, _ in _list_entries():
+            _remove(path)
+
+
+def _list_entries() -> List[tuple]:
+    """列出缓存条目 (路径, 大小, 最近使用时间)"""
+    entries = []
+    try:
+        names = os.listdir(settings.IMPORT_CACHE_DIR)
+    except OSError:
+        return entries
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(settings.IMPORT_CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        size = stat.st_size
+        try:
+            size += os.path.getsize(_report_path(path))
+        except OSError:
+            pass
+        entries.append((path, size, stat.st_mtime))
+    return entries
+
+
+def _evict() -> None:
+    """超出条目数或总大小时，按最近使用时间淘汰最旧的条目"""
+    with _lock:
+        entries = sorted(_list_entries(), key=lambda entry: entry[2])
+        total_size = sum(size for _, size, _ in entries)
+        while entries and (
+            len(entries) > settings.IMPORT_CACHE_MAX_ENTRIES
+            or total_size > settings.IMPORT_CACHE_MAX_BYTES
+        ):
+            path, size, _ = entries.pop(0)
+            _remove(path)
+            total_size -= size
+
+
+def _remove(path: str) -> None:
+    for target in (path, _report_path(path)):
+        try:
+            os.remove(target)
+        except OSError:
+            pass
+
+
+def _apply_cached(result: ImportResult, cached: Dict[str, Any], report_path: str) -> None:
+    """
+    将缓存结果写入本次导入结果，错误从缓存的错误报告中逐条读回
+    试运行直接复用上次结果；实际导入时上次写入的行本次均为重复数据，计入跳过数
+    """
+    result.dry_run = cached.get("dry_run", False)
+    result.cached = True
+    result.failed += cached["failed"]
+    if cached.get("error_count"):
+        for record in read_report_file(report_path):
+            result.add_record(record)
+    if result.dry_run:
+        result.success += cached["success"]
+        result.skipped += cached.get("skipped", 0)
+        result.files.extend(cached.get("files", []))
+    else:
+        result.skipped += cached["success"] + cached.get("skipped", 0)
+        result.files.extend(
+            dict(summary, success=0, skipped=summary["success"] + summary["skipped"])
+            for summary in cached.get("files", [])
+        )
+    result.processed = result.success + result.failed + result.skipped
+
+
+def run_cached(
+    db: Session,
+    result: ImportResult,
+    kind: str,
+    key: str,
+    run: Callable[[], Any]
+) -> None:
+    """
+    带结果缓存执行导入：命中时不执行导入，
+    未命中时执行导入并在没有文件级错误时保存结果
+    """
+    if not settings.IMPORT_CACHE_ENABLED:
+        run()
+        return
+    
+    cached = get(db, kind, key)
+    if cached is not None:
+        _apply_cached(result, cached, _report_path(_entry_path(key)))
+        return
+    
+    run()
+    if not result.file_errors:
+        put(db, kind, key, result)
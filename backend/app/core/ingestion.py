@@ -0,0 +1,435 @@
+"""
+文件导入公共模块
+提供上传文件分块落盘、只读方式打开工作簿、流式解析CSV/TSV、表头列识别、
+按批次迭代数据行等能力，保证导入时内存占用与文件大小无关
+"""
+import codecs
+import csv
+import os
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from fastapi import UploadFile
+from openpyxl import load_workbook
+from openpyxl.workbook.workbook import Workbook
+
+from app.core.config import settings
+from app.core.error_report import (
+    ERROR_FILE,
+    ERROR_ROW,
+    ErrorRecord,
+    ErrorReport,
+    format_error,
+    make_error
+)
+from app.core.exceptions import FileTooLargeError
+
+# 导入数据来源：文件内容或可读取的二进制文件对象
+UploadSource = Union[bytes, BinaryIO]
+
+# 支持导入的文件格式
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+CSV_EXTENSIONS = ('.csv', '.tsv')
+IMPORT_EXTENSIONS = EXCEL_EXTENSIONS + CSV_EXTENSIONS
+IMPORT_FORMAT_ERROR = "只支持Excel或CSV文件格式(.xlsx, .xls, .csv, .tsv)"
+ARCHIVE_EXTENSIONS = ('.zip',)
+
+# CSV 编码按顺序尝试：UTF-8（可带BOM）、GBK（使用其超集 GB18030 解码）
+CSV_ENCODINGS = ('utf-8-sig', 'gb18030')
+
+
+class ImportResult:
+    """
+    导入结果
+    导入过程中实时累计，后台任务可随时读取当前进度；
+    errors 只保留前 IMPORT_ERROR_PREVIEW_LIMIT 条错误文本，完整的结构化错误
+    写入 report（错误报告文件），未设置 report 时保存在 error_records 中（如子进程解析结果）
+    """
+    
+    def __init__(self, report: Optional[ErrorReport] = None):
+        self.processed = 0  # 已处理的数据行数
+        self.success = 0
+        self.failed = 0
+        self.skipped = 0  # 因已存在而跳过的行数（不计入失败）
+        self.errors: List[str] = []  # 前若干条错误文本
+        self.error_count = 0  # 错误总数（含文件级错误）
+        self.error_records: List[ErrorRecord] = []
+        self.report = report
+        self.files: List[Dict[str, Any]] = []  # 多文件导入时各文件的结果汇总
+        self.dry_run = False  # 试运行：success 为将会写入的行数，未写入任何数据
+        self.cached = False  # 结果来自导入结果缓存（文件与上次相同且数据未变化）
+        self.file_errors = 0  # 文件级错误数（无法解析、写入失败等）
+    
+    def add_error(
+        self,
+        message: str,
+        row: Optional[int] = None,
+        column: Optional[str] = None,
+        code: str = ERROR_ROW,
+        sheet: Optional[str] = None,
+        file: Optional[str] = None
+    ) -> None:
+        """记录一条失败行"""
+        self.failed += 1
+        self.add_record(make_error(message, row, column, code, sheet, file))
+    
+    def add_file_error(self, message: str, file: Optional[str] = None) -> None:
+        """记录文件级错误（整个文件无法解析或写入失败）"""
+        self.file_errors += 1
+        self.add_record(make_error(message, code=ERROR_FILE, file=file))
+    
+    def add_record(self, record: ErrorRecord) -> None:
+        """记录一条错误（不改变失败数）"""
+        self.error_count += 1
+        if len(self.errors) < settings.IMPORT_ERROR_PREVIEW_LIMIT:
+            self.errors.append(format_error(record))
+        if self.report is not None:
+            self.report.write(record)
+        else:
+            self.error_records.append(record)
+    
+    def merge(self, other: "ImportResult") -> None:
+        """合并另一份导入结果（如单个文件的解析结果）"""
+        self.processed += other.processed
+        self.success += other.success
+        self.failed += other.failed
+        self.skipped += other.skipped
+        for record in other.error_records:
+            self.add_record(record)
+        self.files.extend(other.files)
+        self.file_errors += other.file_errors
+    
+    @property
+    def error_report_url(self) -> Optional[str]:
+        """错误报告下载地址，没有写入报告时为None"""
+        if self.report is None or not self.report.count:
+            return None
+        return self.report.url
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为导入响应字典"""
+        return {
+            "success": self.success,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "errors": list(self.errors),
+            "error_count": self.error_count,
+            "error_report": self.error_report_url,
+            "files": list(self.files),
+            "dry_run": self.dry_run,
+            "cached": self.cached
+        }
+
+
+async def spool_upload(file: UploadFile, hasher=None) -> BinaryIO:
+    """
+    将上传文件分块读入临时文件，读取过程中校验 MAX_UPLOAD_SIZE
+    
+    小文件保留在内存中，超过 UPLOAD_SPOOL_MAX_MEMORY 后自动落盘。
+    传入 hasher（如 hashlib.sha256()）时在读取过程中同时计算内容摘要。
+    返回的临时文件已定位到开头，由调用方负责关闭
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.UPLOAD_SPOOL_MAX_MEMORY)
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(settings.UPLOAD_READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > settings.MAX_UPLOAD_SIZE:
+                raise FileTooLargeError(settings.MAX_UPLOAD_SIZE)
+            if hasher is not None:
+                hasher.update(chunk)
+            spool.write(chunk)
+    except Exception:
+        spool.close()
+        raise
+    
+    spool.seek(0)
+    return spool
+
+
+def open_workbook(source: UploadSource) -> Workbook:
+    """以只读模式打开工作簿，按需流式解析工作表内容"""
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    return load_workbook(source, read_only=True)
+
+
+def iter_sheet_rows(
+    ws,
+    min_row: int = 1,
+    width: Optional[int] = None
+) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+    """
+    逐行迭代工作表，返回 (行号, 行数据)
+    
+    只读模式下各行长度取决于实际存在的单元格，指定 width 时用 None 补齐
+    """
+    # 部分软件生成的文件维度信息不准确，重置后按实际单元格读取
+    ws.reset_dimensions()
+    for row_idx, row in enumerate(ws.iter_rows(min_row=min_row, values_only=True), start=min_row):
+        if width is not None and len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
+        yield row_idx, row
+
+
+def is_import_file(filename: Optional[str]) -> bool:
+    """判断文件扩展名是否为支持导入的格式"""
+    return bool(filename) and filename.lower().endswith(IMPORT_EXTENSIONS)
+
+
+def is_archive_file(filename: Optional[str]) -> bool:
+    """判断文件是否为ZIP压缩包"""
+    return bool(filename) and filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def save_to_temp(source: UploadSource, directory: str, filename: str) -> str:
+    """将导入数据保存为目录下的临时文件（保留扩展名），返回文件路径"""
+    suffix = os.path.splitext(filename)[1]
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=suffix, delete=False) as target:
+        if isinstance(source, (bytes, bytearray)):
+            target.write(source)
+        else:
+            source.seek(0)
+            shutil.copyfileobj(source, target, settings.UPLOAD_READ_CHUNK_SIZE)
+        return target.name
+
+
+def _zip_member_name(info: zipfile.ZipInfo) -> str:
+    """获取压缩包内文件名，兼容Windows压缩工具使用GBK编码的中文文件名"""
+    name = info.filename
+    if not info.flag_bits & 0x800:
+        try:
+            name = name.encode('cp437').decode('gbk')
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            pass
+    return os.path.basename(name)
+
+
+def extract_import_files(source: UploadSource, directory: str) -> List[Tuple[str, str]]:
+    """
+    将ZIP中支持导入的文件解压到目录，返回 (文件名, 文件路径) 列表
+    跳过目录、隐藏文件及系统生成的文件，解压总大小受 MAX_ZIP_EXTRACT_SIZE 限制
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    
+    extracted = []
+    with zipfile.ZipFile(source) as archive:
+        members = []
+        for info in archive.infolist():
+            name = _zip_member_name(info)
+            if info.is_dir() or not name or name.startswith(('.', '~$')) or '__MACOSX' in info.filename:
+                continue
+            if is_import_file(name):
+                members.append((name, info))
+        
+        if sum(info.file_size for _, info in members) > settings.MAX_ZIP_EXTRACT_SIZE:
+            raise FileTooLargeError(settings.MAX_ZIP_EXTRACT_SIZE)
+        
+        for name, info in sorted(members, key=lambda member: member[1].filename):
+            with archive.open(info) as member:
+                suffix = os.path.splitext(name)[1]
+                with tempfile.NamedTemporaryFile(dir=directory, suffix=suffix, delete=False) as target:
+                    shutil.copyfileobj(member, target, settings.UPLOAD_READ_CHUNK_SIZE)
+                    extracted.append((name, target.name))
+    return extracted
+
+
+def _is_csv(filename: Optional[str]) -> bool:
+    return bool(filename) and filename.lower().endswith(CSV_EXTENSIONS)
+
+
+class TableSheet:
+    """表格数据中的一个工作表（CSV/TSV 文件视为单个工作表）"""
+    
+    def __init__(self, title: str, rows_factory):
+        self.title = title
+        self._rows_factory = rows_factory
+    
+    def iter_rows(
+        self,
+        min_row: int = 1,
+        width: Optional[int] = None
+    ) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+        """逐行迭代，返回 (行号, 行数据)，空单元格统一为 None"""
+        return self._rows_factory(min_row, width)
+
+
+class TableReader:
+    """
+    统一读取 Excel 工作簿和 CSV/TSV 文件
+    
+    Excel 以只读模式流式解析；CSV/TSV 使用标准库 csv 逐行解析，
+    不需要解压和解析XML，工作表名称取文件名（不含扩展名）
+    """
+    
+    def __init__(self, source: UploadSource, filename: Optional[str] = None):
+        if isinstance(source, (bytes, bytearray)):
+            source = BytesIO(source)
+        self._workbook = None
+        
+        if _is_csv(filename):
+            title = os.path.splitext(os.path.basename(filename))[0] or "Sheet1"
+            delimiter = '\t' if filename.lower().endswith('.tsv') else None
+            self.sheets = [TableSheet(
+                title,
+                lambda min_row, width: _iter_csv_rows(source, delimiter, min_row, width)
+            )]
+        else:
+            self._workbook = open_workbook(source)
+            self.sheets = [self._excel_sheet(ws) for ws in self._workbook.worksheets]
+            self.active = self._excel_sheet(self._workbook.active)
+            return
+        
+        self.active = self.sheets[0]
+    
+    @staticmethod
+    def _excel_sheet(ws) -> TableSheet:
+        return TableSheet(
+            ws.title,
+            lambda min_row, width: iter_sheet_rows(ws, min_row=min_row, width=width)
+        )
+    
+    def close(self) -> None:
+        """释放工作簿资源"""
+        if self._workbook is not None:
+            self._workbook.close()
+
+
+def open_table(source: UploadSource, filename: Optional[str] = None) -> TableReader:
+    """按文件扩展名打开表格数据，未提供文件名时按 Excel 处理"""
+    return TableReader(source, filename)
+
+
+def _detect_csv_format(stream: BinaryIO, delimiter: Optional[str]) -> Tuple[str, str]:
+    """根据文件开头的内容识别编码和分隔符，返回 (编码, 分隔符)"""
+    head = stream.read(settings.UPLOAD_READ_CHUNK_SIZE)
+    stream.seek(0)
+    
+    encoding = CSV_ENCODINGS[-1]
+    for candidate in CSV_ENCODINGS:
+        try:
+            # 非最终解码：允许截断在多字节字符中间
+            text = codecs.getincrementaldecoder(candidate)().decode(head, final=False)
+        except UnicodeDecodeError:
+            continue
+        encoding = candidate
+        break
+    else:
+        text = head.decode(encoding, errors='replace')
+    
+    if delimiter is None:
+        first_line = text.split('\n', 1)[0]
+        delimiter = '\t' if '\t' in first_line and ',' not in first_line else ','
+    return encoding, delimiter
+
+
+def _iter_csv_rows(
+    stream: BinaryIO,
+    delimiter: Optional[str],
+    min_row: int,
+    width: Optional[int]
+) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+    """流式解析CSV/TSV，逐行解码，内存占用与文件大小无关"""
+    stream.seek(0)
+    encoding, delimiter = _detect_csv_format(stream, delimiter)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    # 按字节行切分后解码：UTF-8 和 GBK 的多字节字符都不包含换行符字节
+    lines = (decoder.decode(line) for line in stream)
+    
+    for row_idx, cells in enumerate(csv.reader(lines, delimiter=delimiter), start=1):
+        if row_idx < min_row:
+            continue
+        row = tuple(cell if cell != '' else None for cell in cells)
+        if width is not None and len(row) < width:
+            row = row + (None,) * (width - len(row))
+        yield row_idx, row
+
+
+def detect_column_mapping(header_row: List[str]) -> Dict[str, int]:
+    """
+    根据表头行检测列映射
+    返回字段名到列序号的映射，字段包括: student_no, student_name, gender,
+    event_name, group_name, grade_name, class_name, value
+    """
+    mapping = {}
+    
+    for idx, cell in enumerate(header_row):
+        cell_lower = cell.lower() if cell else ''
+        
+        # 学号列
+        if '学号' in cell or cell_lower == 'student_no':
+            mapping['student_no'] = idx
+        # 姓名列
+        elif '姓名' in cell or cell_lower == 'name':
+            mapping['student_name'] = idx
+        # 性别列
+        elif '性别' in cell or cell_lower == 'gender':
+            mapping['gender'] = idx
+        # 项目名称列
+        elif '项目' in cell or cell_lower in ['event', 'event_name']:
+            mapping['event_name'] = idx
+        # 组别名称列
+        elif '组别' in cell or cell_lower in ['group', 'group_name']:
+            mapping['group_name'] = idx
+        # 年级列
+        elif '年级' in cell or cell_lower in ['grade', 'grade_name']:
+            mapping['grade_name'] = idx
+        # 班级列
+        elif '班级' in cell or cell_lower in ['class', 'class_name']:
+            mapping['class_name'] = idx
+        # 成绩列
+        elif '成绩' in cell or cell_lower in ['score', 'value']:
+            mapping['value'] = idx
+    
+    # 如果没有找到学号列，尝试其他方式
+    if 'student_no' not in mapping:
+        for idx, cell in enumerate(header_row):
+            if cell in ['编号', 'ID', '学生编号']:
+                mapping['student_no'] = idx
+                break
+    
+    return mapping
+
+
+def is_header_row(row_values: List[str]) -> bool:
+    """
+    判断是否是表头行
+    """
+    header_keywords = ['学号', '项目', '组别', '姓名', '性别', '序号', 'ID', '编号']
+    match_count = sum(1 for cell in row_values if any(kw in cell for kw in header_keywords))
+    return match_count >= 2
+
+
+def resolve_columns(header: Sequence[Any], fields: Sequence[str]) -> List[int]:
+    """
+    根据表头确定各字段所在的列序号
+    表头无法识别出全部字段时按字段的默认顺序（第1列起）取值
+    """
+    header_values = [str(cell).strip() if cell is not None else '' for cell in header]
+    mapping = detect_column_mapping(header_values)
+    if all(field in mapping for field in fields):
+        return [mapping[field] for field in fields]
+    return list(range(len(fields)))
+
+
+def select_columns(row: Sequence[Any], columns: Sequence[int]) -> Tuple[Any, ...]:
+    """按列序号取出单元格，超出行长度的列为 None"""
+    return tuple(row[idx] if idx < len(row) else None for idx in columns)
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """将可迭代对象按固定大小切分为批次"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
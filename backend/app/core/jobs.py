@@ -0,0 +1,157 @@
+"""
+后台任务模块
+导入等耗时操作提交到独立的工作线程池执行，避免阻塞事件循环；
+任务状态保存在当前进程内存中，通过任务ID轮询进度。
+本模块与学生搜索索引、统计缓存、维度缓存、实时推送一样只在当前进程内存中保存状态，
+应用须按单进程部署（不使用多个 worker），否则各进程的状态互不可见
+"""
+import asyncio
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.error_report import ErrorReport
+from app.core.ingestion import ImportResult
+
+
+class ImportJob:
+    """导入任务"""
+    
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    
+    def __init__(self, kind: str, created_by: int = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.created_by = created_by
+        self.status = self.PENDING
+        self.result = ImportResult(report=ErrorReport(self.id))
+        self.message = ""
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.future: Optional[Future] = None
+    
+    @property
+    def done(self) -> bool:
+        """任务是否已结束"""
+        return self.status in (self.SUCCEEDED, self.FAILED)
+    
+    async def wait(self) -> ImportResult:
+        """在事件循环中等待任务结束（不阻塞其他请求）"""
+        await asyncio.wrap_future(self.future)
+        return self.result
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为任务信息字典"""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "processed": self.result.processed,
+            "success": self.result.success,
+            "failed": self.result.failed,
+            "skipped": self.result.skipped,
+            "errors": list(self.result.errors),
+            "error_count": self.result.error_count,
+            "error_report": self.result.error_report_url,
+            "files": list(self.result.files),
+            "dry_run": self.result.dry_run,
+            "cached": self.result.cached,
+            "message": self.message,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobManager:
+    """
+    后台任务管理器
+    每个任务在工作线程中使用独立的数据库会话执行
+    """
+    
+    def __init__(self, max_workers: int, max_jobs: int):
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def submit(
+        self,
+        kind: str,
+        work: Callable[[Session, ImportResult], Any],
+        created_by: int = None
+    ) -> ImportJob:
+        """
+        提交任务，立即返回任务对象
+        work: 任务函数，接收 (数据库会话, 导入结果)
+        """
+        job = ImportJob(kind, created_by=created_by)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="import-job"
+                )
+            job.future = self._executor.submit(self._run, job, work)
+        return job
+    
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        """根据ID获取任务"""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def shutdown(self) -> None:
+        """关闭工作线程池，等待进行中的任务结束"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+    
+    def _run(self, job: ImportJob, work: Callable[[Session, ImportResult], Any]) -> None:
+        """在工作线程中执行任务"""
+        job.status = ImportJob.RUNNING
+        job.started_at = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            work(db, job.result)
+            job.status = ImportJob.SUCCEEDED
+        except Exception as e:
+            job.status = ImportJob.FAILED
+            job.message = str(e)
+            print(f"Import job {job.id} failed: {e}")
+            print(traceback.format_exc())
+            raise
+        finally:
+            db.close()
+            job.result.report.close()
+            job.finished_at = datetime.utcnow()
+    
+    def _prune(self) -> None:
+        """超出保留数量时移除最早结束的任务及其错误报告"""
+        while len(self._jobs) > self.max_jobs:
+            oldest_done = next((job_id for job_id, job in self._jobs.items() if job.done), None)
+            if oldest_done is None:
+                break
+            self._jobs.pop(oldest_done).result.report.remove()
+
+
+# 全局任务管理器
+job_manager = JobManager(
+    max_workers=settings.IMPORT_JOB_WORKERS,
+    max_jobs=settings.IMPORT_JOB_RETENTION
+)
@@ -0,0 +1,156 @@
+"""
+实时推送模块
+成绩写入提交后计算一次排名和榜单，与上次推送的结果比较，只把变化的行推送给所有实时连接：
+每条消息按行的主键给出新增/变化的行（upsert）和移除的主键（remove），重复应用结果不变。
+每个连接有独立的有界队列；客户端读取过慢导致队列写满时丢弃积压的变化，改为重发完整快照。
+没有连接时不保存状态也不计算
+"""
+import asyncio
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from app.core.config import settings
+
+# 主题：("event-ranking", 项目ID, 轮次)、("class-total",)、("grade-medals",)
+Topic = Tuple[Hashable, ...]
+
+# 各主题的行主键
+ROW_KEYS = {
+    "event-ranking": lambda row: row["score"]["id"],
+    "class-total": lambda row: row["class"]["id"],
+    "grade-medals": lambda row: row["grade"]["id"],
+}
+
+# 队列写满后放入的重发快照标记
+RESYNC = object()
+
+
+def topic_message(topic: Topic) -> Dict[str, Any]:
+    """主题对应的消息头"""
+    if topic[0] == "event-ranking":
+        return {"type": topic[0], "event_id": topic[1], "round": topic[2]}
+    return {"type": topic[0]}
+
+
+def diff_rows(topic: Topic, old: Dict[Any, dict], new: Dict[Any, dict]) -> Optional[Dict[str, Any]]:
+    """比较两次结果，没有变化时返回 None"""
+    upsert = [row for key, row in new.items() if old.get(key) != row]
+    remove = [key for key in old if key not in new]
+    if not upsert and not remove:
+        return None
+    return {**topic_message(topic), "upsert": upsert, "remove": remove}
+
+
+class LiveSubscriber:
+    """一个实时连接"""
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue_size: int, event_id: int = None):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.event_id = event_id  # 只接收该项目的排名变化（榜单总是接收）
+        self.seq = 0  # 已通过快照发送到的序号，序号不大于它的变化不再发送
+        self.lagged = False
+    
+    def wants(self, topic: Topic) -> bool:
+        return self.event_id is None or topic[0] != "event-ranking" or topic[1] == self.event_id
+    
+    def offer(self, message: Dict[str, Any]) -> None:
+        """放入一条变化（在连接的事件循环中执行）"""
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # 客户端过慢：丢弃积压的变化，下次读取时重发快照
+            self.lagged = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class LiveHub:
+    """实时推送中心"""
+    
+    def __init__(self, queue_size: int = None):
+        self.queue_size = queue_size or settings.LIVE_QUEUE_SIZE
+        self._lock = threading.Lock()
+        self._subscribers: List[LiveSubscriber] = []
+        self._state: Dict[Topic, Dict[Any, dict]] = {}  # 各主题上次推送的结果
+        self._seq = 0
+    
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+    
+    def has_topic(self, topic: Topic) -> bool:
+        return topic in self._state
+    
+    def event_topics(self) -> List[Topic]:
+        """当前保存了结果的项目排名主题"""
+        with self._lock:
+            return [topic for topic in self._state if topic[0] == "event-ranking"]
+    
+    def subscribe(self, event_id: int = None) -> LiveSubscriber:
+        """新建连接（在连接的事件循环中调用）"""
+        subscriber = LiveSubscriber(asyncio.get_running_loop(), self.queue_size, event_id)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber: LiveSubscriber) -> None:
+        """关闭连接，最后一个连接关闭时丢弃保存的结果"""
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+            if not self._subscribers:
+                self._state.clear()
+    
+    def seed(self, topic: Topic, rows: List[dict]) -> None:
+        """保存主题的初始结果（已有结果时保留较新的结果）"""
+        with self._lock:
+            if self._subscribers and topic not in self._state:
+                self._state[topic] = {ROW_KEYS[topic[0]](row): row for row in rows}
+    
+    def snapshot(self, subscriber: LiveSubscriber) -> Dict[str, Any]:
+        """连接关注的全部主题的当前结果，并记录快照序号"""
+        with self._lock:
+            subscriber.seq = self._seq
+            subscriber.lagged = False
+            return {
+                "type": "snapshot",
+                "seq": self._seq,
+                "topics": [
+                    {**topic_message(topic), "rows": list(rows.values())}
+                    for topic, rows in self._state.items() if subscriber.wants(topic)
+                ]
+            }
+    
+    def publish(self, results: Dict[Topic, List[dict]]) -> int:
+        """
+        与上次推送的结果比较，把变化放入所有连接的队列（可在任意线程调用）
+        返回发出的变化消息数
+        """
+        with self._lock:
+            if not self._subscribers:
+                return 0
+            messages = []
+            for topic, rows in results.items():
+                new = {ROW_KEYS[topic[0]](row): row for row in rows}
+                message = diff_rows(topic, self._state.get(topic, {}), new)
+                self._state[topic] = new
+                if message is not None:
+                    self._seq += 1
+                    messages.append((topic, {**message, "seq": self._seq}))
+            for subscriber in self._subscribers:
+                for topic, message in messages:
+                    if not subscriber.wants(topic):
+                        continue
+                    try:
+                        subscriber.loop.call_soon_threadsafe(subscriber.offer, message)
+                    except RuntimeError:  # 连接的事件循环已关闭，等待其取消订阅
+                        break
+            return len(messages)
+
+
+# 全局实时推送中心
+live_hub = LiveHub()
@@ -0,0 +1,217 @@
+"""
+数据库迁移模块
+按版本号顺序执行结构变更，已执行的版本记录在 schema_migrations 表中；
+新部署由 create_all 直接创建最新结构后标记全部版本为已执行，已有部署执行未完成的版本。
+每个迁移都先检查数据库现状再变更，重复执行不会出错
+"""
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import (
+    Column, DateTime, Integer, String, Table, and_, bindparam, case, column, func, inspect, literal,
+    select, table, text, update
+)
+from sqlalchemy.engine import Connection, Engine
+
+from app.models.base_model import Base
+
+schema_migrations = Table(
+    "schema_migrations",
+    Base.metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False, comment="迁移版本号"),
+    Column("name", String(100), nullable=False, comment="迁移名称"),
+    Column("applied_at", DateTime, nullable=False, default=datetime.utcnow, comment="执行时间"),
+)
+
+
+class Migration(NamedTuple):
+    """一个版本的结构变更"""
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+def _has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    """字段不存在时添加"""
+    if not _has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _create_indexes(conn: Connection, *models) -> None:
+    """创建模型上声明、数据库中尚不存在的索引"""
+    inspector = inspect(conn)
+    for model in models:
+        existing = {index["name"] for index in inspector.get_indexes(model.__tablename__)}
+        for index in model.__table__.indexes:
+            if index.name not in existing:
+                index.create(conn)
+
+
+def _add_event_category(conn: Connection) -> None:
+    _add_column(conn, "events", "category", "VARCHAR(50)")
+
+
+def _create_quota_counters(conn: Connection) -> None:
+    from app.models.registration import ClassEventQuota, StudentQuota
+    Base.metadata.create_all(conn, tables=[ClassEventQuota.__table__, StudentQuota.__table__])
+
+
+def _add_registration_heat_no(conn: Connection) -> None:
+    _add_column(conn, "registrations", "heat_no", "INTEGER NULL")
+
+
+def _create_season_archive(conn: Connection) -> None:
+    from app.models.archive import Season, ARCHIVE_TABLES
+    Base.metadata.create_all(conn, tables=[Season.__table__, *ARCHIVE_TABLES.values()])
+
+
+def _add_query_indexes(conn: Connection) -> None:
+    from app.models.base import Class, Student
+    from app.models.event import Event, EventGroup
+    from app.models.registration import Registration
+    from app.models.score import Score
+    from app.models.log import OperationLog
+    _create_indexes(conn, Class, Student, Event, EventGroup, Registration, Score, OperationLog)
+
+
+# 以下数据迁移使用固定的表和列定义，不调用服务代码，已执行的迁移不随服务修改而改变
+_events = table("events", column("id"), column("type"), column("scoring_rule"))
+_registrations = table("registrations", column("id"), column("student_id"), column("event_id"))
+_students = table("students", column("id"), column("class_id"))
+_classes = table("classes", column("id"), column("grade_id"))
+_scores = table(
+    "scores", column("id"), column("registration_id"), column("value"), column("round"),
+    column("rank"), column("points"), column("is_valid")
+)
+
+
+def _store_event_rankings(conn: Connection) -> None:
+    # 排名改为在成绩写入时保存，已有成绩补算一次名次和得分：
+    # 按 (项目, 轮次) 分区，径赛升序、田赛降序，成绩相同时先录入的在前，得分按计分规则查找，作废成绩清空
+    events = {}
+    for event_id, event_type, scoring_rule in conn.execute(
+        select(_events.c.id, _events.c.type, _events.c.scoring_rule)
+    ):
+        if isinstance(scoring_rule, str):
+            scoring_rule = json.loads(scoring_rule)
+        events[event_id] = (event_type, scoring_rule or {})
+    
+    partitions = defaultdict(list)
+    for score_id, event_id, round_, value in conn.execute(
+        select(_scores.c.id, _registrations.c.event_id, _scores.c.round, _scores.c.value).select_from(
+            _scores.join(_registrations, _scores.c.registration_id == _registrations.c.id)
+        ).where(_scores.c.is_valid == True)
+    ):
+        partitions[(event_id, round_)].append((score_id, value))
+    
+    changes = []
+    for (event_id, _), scores in partitions.items():
+        event_type, scoring_rule = events.get(event_id, ("track", {}))
+        sign = 1 if event_type == "track" else -1
+        scores.sort(key=lambda item: (sign * item[1], item[0]))
+        for position, (score_id, _) in enumerate(scores, 1):
+            changes.append({"b_id": score_id, "b_rank": position, "b_points": scoring_rule.get(str(position), 0)})
+    
+    if changes:
+        conn.execute(
+            update(_scores).where(_scores.c.id == bindparam("b_id")).values(
+                rank=bindparam("b_rank"), points=bindparam("b_points")
+            ),
+            changes
+        )
+    conn.execute(update(_scores).where(_scores.c.is_valid == False).values(rank=None, points=0))
+
+
+def _create_standings(conn: Connection) -> None:
+    # 创建班级总分榜、年级奖牌榜并从已有成绩汇总（决赛有效成绩的成绩数、得分、第1-3名数）
+    from app.models.score import ClassStanding, GradeStanding
+    Base.metadata.create_all(conn, tables=[ClassStanding.__table__, GradeStanding.__table__])
+    
+    counts = (
+        func.count(_scores.c.id),
+        func.coalesce(func.sum(_scores.c.points), 0),
+        func.sum(case((_scores.c.rank == 1, 1), else_=0)),
+        func.sum(case((_scores.c.rank == 2, 1), else_=0)),
+        func.sum(case((_scores.c.rank == 3, 1), else_=0)),
+    )
+    fields = ("score_count", "points", "gold", "silver", "bronze", "created_at")
+    now = literal(datetime.utcnow(), DateTime)
+    source = _scores.join(
+        _registrations, _scores.c.registration_id == _registrations.c.id
+    ).join(
+        _students, _registrations.c.student_id == _students.c.id
+    ).join(
+        _classes, _students.c.class_id == _classes.c.id
+    )
+    final_scores = and_(_scores.c.is_valid == True, _scores.c.round == "final")
+    
+    for name, key, key_column in (
+        ("class_standings", "class_id", _students.c.class_id),
+        ("grade_standings", "grade_id", _classes.c.grade_id),
+    ):
+        target = table(name, column(key), *(column(field) for field in fields))
+        conn.execute(target.delete())
+        conn.execute(target.insert().from_select(
+            [key, *fields],
+            select(key_column, *counts, now).select_from(source).where(final_scores).group_by(key_column)
+        ))
+
+
+# 按版本号顺序排列，新增迁移追加到末尾，已发布的版本不再修改
+MIGRATIONS: List[Migration] = [
+    Migration(1, "add_event_category", _add_event_category),
+    Migration(2, "create_quota_counters", _create_quota_counters),
+    Migration(3, "add_registration_heat_no", _add_registration_heat_no),
+    Migration(4, "add_query_indexes", _add_query_indexes),
+    Migration(5, "create_season_archive", _create_season_archive),
+    Migration(6, "store_event_rankings", _store_event_rankings),
+    Migration(7, "create_standings", _create_standings),
+]
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    """已执行的迁移版本"""
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        return [row[0] for row in conn.execute(
+            select(schema_migrations.c.version).order_by(schema_migrations.c.version)
+        )]
+
+
+def pending_migrations(engine: Engine) -> List[Migration]:
+    """尚未执行的迁移"""
+    applied = set(applied_versions(engine))
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+def upgrade(engine: Engine) -> List[Migration]:
+    """
+    按顺序执行尚未执行的迁移，返回本次执行的迁移
+    每个迁移与其版本记录在同一事务中提交（MySQL的DDL会隐式提交，迁移本身可重复执行）
+    """
+    executed = []
+    for migration in pending_migrations(engine):
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+            ))
+        executed.append(migration)
+    return executed
+
+
+def stamp(engine: Engine) -> None:
+    """将全部迁移标记为已执行（用于 create_all 新建的数据库，结构已是最新）"""
+    pending = pending_migrations(engine)
+    if pending:
+        with engine.begin() as conn:
+            conn.execute(schema_migrations.insert(), [
+                {"version": m.version, "name": m.name, "applied_at": datetime.utcnow()}
+                for m in pending
+            ])
@@ -0,0 +1,81 @@
+"""
+分页模块
+支持页码分页（page）和游标分页（after=上一页最后一条记录的ID），
+游标分页按ID定位，不随页数增加而变慢；总数可选精确计数、上限计数或不计数
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+
+# 总数计算方式
+TOTAL_EXACT = "exact"  # 精确计数
+TOTAL_ESTIMATE = "estimate"  # 最多计数到 PAGINATION_ESTIMATE_LIMIT 行
+TOTAL_NONE = "none"  # 不计数
+TOTAL_PATTERN = f"^({TOTAL_EXACT}|{TOTAL_ESTIMATE}|{TOTAL_NONE})$"
+
+
+def count_total(query: Query, mode: str = TOTAL_EXACT) -> Optional[int]:
+    """按指定方式计算总数，TOTAL_NONE 时返回None"""
+    if mode == TOTAL_NONE:
+        return None
+    if mode == TOTAL_ESTIMATE:
+        # 只数到上限，超过上限时返回上限值
+        return query.order_by(None).limit(settings.PAGINATION_ESTIMATE_LIMIT).count()
+    return query.order_by(None).count()
+
+
+def paginate(
+    query: Query,
+    id_column,
+    page: int = 1,
+    page_size: int = 20,
+    after: int = None,
+    total: str = TOTAL_EXACT,
+    descending: bool = False,
+    options: Sequence = ()
+) -> Tuple[List[Any], Optional[int]]:
+    """
+    按ID排序分页
+    after 不为空时从该ID之后开始取（倒序时为该ID之前），忽略 page；否则按 page 偏移
+    options: 只用于分页查询的加载策略（关联对象随本页一起加载，计数查询不受影响）
+    返回: (当前页记录, 总数)
+    """
+    count = count_total(query, total)
+    
+    query = query.options(*options).order_by(id_column.desc() if descending else id_column)
+    if after is not None:
+        query = query.filter(id_column < after if descending else id_column > after)
+    else:
+        query = query.offset((page - 1) * page_size)
+    
+    return query.limit(page_size).all(), count
+
+
+def _item_id(item: Any) -> int:
+    return item["id"] if isinstance(item, dict) else item.id
+
+
+def page_response(
+    items: List[Any],
+    total: Optional[int],
+    page: int,
+    page_size: int,
+    total_mode: str = TOTAL_EXACT
+) -> Dict[str, Any]:
+    """
+    构建分页响应
+    next_after: 下一页的游标（本页不足一页时为None）；
+    total_exact: 总数是否精确（上限计数达到上限时为False）
+    """
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "next_after": _item_id(items[-1]) if items and len(items) == page_size else None,
+        "total_exact": total_mode == TOTAL_EXACT or (
+            total_mode == TOTAL_ESTIMATE and total < settings.PAGINATION_ESTIMATE_LIMIT
+        ),
+    }
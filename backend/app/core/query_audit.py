@@ -0,0 +1,51 @@
+"""
+查询计划检查模块
+记录一段代码执行的SQL语句，并用数据库的执行计划找出其中SELECT语句的全表扫描
+支持 MySQL（EXPLAIN，type=ALL）和 SQLite（EXPLAIN QUERY PLAN，SCAN 且未使用索引）
+"""
+from contextlib import contextmanager
+from typing import Any, ContextManager, Iterator, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+CapturedQuery = Tuple[str, Any]
+
+
+@contextmanager
+def capture_statements(engine: Engine, selects_only: bool = False) -> Iterator[List[CapturedQuery]]:
+    """记录代码块内执行的SQL语句及参数（selects_only 为 True 时只记录SELECT语句）"""
+    captured: List[CapturedQuery] = []
+    
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if not selects_only or statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+    
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+
+def capture_selects(engine: Engine) -> ContextManager[List[CapturedQuery]]:
+    """记录代码块内执行的SELECT语句及参数"""
+    return capture_statements(engine, selects_only=True)
+
+
+def find_full_scans(conn: Connection, statement: str, parameters: Any = ()) -> List[str]:
+    """返回语句执行计划中全表扫描的描述，没有全表扫描时为空列表"""
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings()
+        return [
+            f"{row['table']}（全表扫描，预计{row['rows']}行）"
+            for row in rows if row["type"] == "ALL"
+        ]
+    if dialect == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [
+            row[-1] for row in rows
+            if row[-1].startswith("SCAN") and "USING" not in row[-1] and row[-1] != "SCAN CONSTANT ROW"
+        ]
+    return []
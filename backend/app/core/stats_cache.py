@@ -0,0 +1,98 @@
+"""
+统计结果缓存模块
+在进程内存中缓存统计接口的结果，键为 (接口, 参数, 数据版本)：
+成绩、报名、计分规则写入提交后递增数据版本，旧版本的条目不再命中，按最近使用顺序淘汰。
+项目排名只依赖本项目的版本，某个项目录入成绩不会使其他项目的排名缓存失效；
+影响所有项目的写入（计分规则、学生班级信息等）递增公共版本
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from app.core.config import settings
+
+
+class StatsCache:
+    """带版本的LRU缓存"""
+    
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or settings.STATS_CACHE_MAX_ENTRIES
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._version = 0  # 数据版本，任何写入都递增
+        self._base_version = 0  # 最近一次影响所有项目的写入时的版本
+        self._event_versions: Dict[int, int] = {}  # 各项目最近一次写入时的版本
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def version(self) -> int:
+        """当前数据版本"""
+        return self._version
+    
+    def bump_event(self, event_id: int) -> None:
+        """某个项目的成绩或报名已变化（事务提交后调用）"""
+        with self._lock:
+            self._version += 1
+            self._event_versions[event_id] = self._version
+    
+    def bump_all(self) -> None:
+        """影响所有项目的数据已变化（事务提交后调用）"""
+        with self._lock:
+            self._version += 1
+            self._base_version = self._version
+    
+    def _key(self, endpoint: str, params: Hashable, event_id: int = None) -> Tuple:
+        if event_id is None:
+            return endpoint, params, self._version
+        return endpoint, params, self._base_version, self._event_versions.get(event_id, 0)
+    
+    def get_or_compute(
+        self,
+        endpoint: str,
+        params: Hashable,
+        compute: Callable[[], Any],
+        event_id: int = None
+    ) -> Any:
+        """
+        读取缓存，未命中时计算并保存
+        event_id: 结果只依赖该项目的数据时传入（项目排名），否则结果依赖全部数据
+        计算期间有写入时，结果保存在旧版本下，之后不会再命中
+        """
+        with self._lock:
+            key = self._key(endpoint, params, event_id)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+    
+    def clear(self) -> None:
+        """清空缓存和命中计数"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> Dict[str, int]:
+        """缓存状态"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "version": self._version
+            }
+
+
+# 全局统计结果缓存
+stats_cache = StatsCache()
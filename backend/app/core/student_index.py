@@ -0,0 +1,221 @@
+"""
+学生搜索索引模块
+在进程内存中维护学生索引，供检录/成绩录入时边输入边搜索：
+姓名按单字和相邻二字建倒排表（n-gram），学号按有序列表做前缀查找，
+安装 pypinyin 时另按姓名拼音首字母做前缀查找。
+启动时全量构建，学生增删改时增量更新；批量导入、整表清空、班级年级改名等
+批量写入后标记失效，下次搜索时重新构建
+"""
+import bisect
+import threading
+from itertools import chain
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.base import Grade, Class, Student
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # 拼音首字母搜索为可选功能
+    lazy_pinyin = None
+
+
+class IndexedStudent(NamedTuple):
+    """索引中的学生条目"""
+    id: int
+    student_no: str
+    name: str
+    gender: str
+    class_id: int
+    class_name: str
+    grade_id: int
+    grade_name: str
+
+
+def name_grams(name: str) -> Set[str]:
+    """姓名的单字和相邻二字"""
+    name = name.casefold()
+    return set(name) | {name[i:i + 2] for i in range(len(name) - 1)}
+
+
+def name_initials(name: str) -> str:
+    """姓名的拼音首字母（小写），未安装 pypinyin 时为空"""
+    if lazy_pinyin is None:
+        return ""
+    return "".join(lazy_pinyin(name, style=Style.FIRST_LETTER, errors="ignore")).casefold()
+
+
+class StudentIndex:
+    """学生搜索索引"""
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._students: Dict[int, IndexedStudent] = {}
+        self._grams: Dict[str, Set[int]] = {}
+        self._numbers: List[Tuple[str, int]] = []  # 按学号排序的 (学号, 学生ID)
+        self._initials: List[Tuple[str, int]] = []  # 按首字母排序的 (首字母, 学生ID)
+        self._stale = True
+        self._version = 0  # 每次写入加一，构建期间有写入时构建结果仍视为失效
+    
+    @property
+    def stale(self) -> bool:
+        """索引是否需要重新构建"""
+        return self._stale
+    
+    def __len__(self) -> int:
+        return len(self._students)
+    
+    def build(self, db: Session) -> None:
+        """从数据库全量构建索引（一次查询）"""
+        version = self._version
+        rows = db.query(
+            Student.id, Student.student_no, Student.name, Student.gender,
+            Student.class_id, Class.name, Class.grade_id, Grade.name
+        ).join(Class, Student.class_id == Class.id).join(Grade, Class.grade_id == Grade.id)
+        entries = [IndexedStudent(*row) for row in rows]
+        
+        with self._lock:
+            self._students = {}
+            self._grams = {}
+            self._numbers = []
+            self._initials = []
+            for entry in entries:
+                self._students[entry.id] = entry
+                for gram in name_grams(entry.name):
+                    self._grams.setdefault(gram, set()).add(entry.id)
+                self._numbers.append((entry.student_no.casefold(), entry.id))
+                initials = name_initials(entry.name)
+                if initials:
+                    self._initials.append((initials, entry.id))
+            self._numbers.sort()
+            self._initials.sort()
+            self._stale = self._version != version
+    
+    def ensure_built(self, db: Session) -> None:
+        """索引失效时重新构建"""
+        if self._stale:
+            self.build(db)
+    
+    def invalidate(self) -> None:
+        """标记索引失效（批量写入后调用）"""
+        with self._lock:
+            self._version += 1
+            self._stale = True
+    
+    def put(self, student: Student) -> None:
+        """新增或更新一名学生（学生已提交，班级和年级通过关联加载）"""
+        with self._lock:
+            self._version += 1
+            if self._stale:
+                return
+            entry = IndexedStudent(
+                student.id, student.student_no, student.name, student.gender,
+                student.class_id, student.class_.name, student.class_.grade_id, student.class_.grade.name
+            )
+            self._discard(entry.id)
+            self._students[entry.id] = entry
+            for gram in name_grams(entry.name):
+                self._grams.setdefault(gram, set()).add(entry.id)
+            bisect.insort(self._numbers, (entry.student_no.casefold(), entry.id))
+            initials = name_initials(entry.name)
+            if initials:
+                bisect.insort(self._initials, (initials, entry.id))
+    
+    def remove(self, student_id: int) -> None:
+        """删除一名学生"""
+        with self._lock:
+            self._version += 1
+            if not self._stale:
+                self._discard(student_id)
+    
+    def _discard(self, student_id: int) -> None:
+        entry = self._students.pop(student_id, None)
+        if entry is None:
+            return
+        for gram in name_grams(entry.name):
+            ids = self._grams.get(gram)
+            if ids is not None:
+                ids.discard(student_id)
+                if not ids:
+                    del self._grams[gram]
+        _remove_sorted(self._numbers, (entry.student_no.casefold(), student_id))
+        initials = name_initials(entry.name)
+        if initials:
+            _remove_sorted(self._initials, (initials, student_id))
+    
+    def search(
+        self,
+        keyword: str,
+        limit: int = 20,
+        class_id: int = None,
+        grade_id: int = None
+    ) -> List[IndexedStudent]:
+        """
+        按姓名片段、学号前缀或拼音首字母前缀搜索
+        排序：学号前缀（完全匹配在前）、姓名（完全匹配、开头、包含）、拼音首字母
+        """
+        keyword = keyword.strip().casefold()
+        if not keyword:
+            return []
+        
+        with self._lock:
+            number_ids = _prefix_ids(self._numbers, keyword)
+            name_ids = self._name_ids(keyword)
+            initial_ids = _prefix_ids(self._initials, keyword) if keyword.isascii() else []
+            
+            students = self._students
+            name_ids.sort(key=lambda student_id: (
+                students[student_id].name.casefold() != keyword,
+                not students[student_id].name.casefold().startswith(keyword),
+                students[student_id].student_no
+            ))
+            
+            results: List[IndexedStudent] = []
+            seen: Set[int] = set()
+            for student_id in chain(number_ids, name_ids, initial_ids):
+                if student_id in seen:
+                    continue
+                seen.add(student_id)
+                entry = students[student_id]
+                if class_id is not None and entry.class_id != class_id:
+                    continue
+                if grade_id is not None and entry.grade_id != grade_id:
+                    continue
+                results.append(entry)
+                if len(results) >= limit:
+                    break
+            return results
+    
+    def _name_ids(self, keyword: str) -> List[int]:
+        """姓名包含关键词的学生：取各二字倒排表的交集，再核对是否连续出现"""
+        grams = [keyword] if len(keyword) == 1 else [keyword[i:i + 2] for i in range(len(keyword) - 1)]
+        postings = sorted((self._grams.get(gram, set()) for gram in grams), key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        if len(keyword) <= 2:
+            return list(candidates)
+        return [
+            student_id for student_id in candidates
+            if keyword in self._students[student_id].name.casefold()
+        ]
+
+
+def _prefix_ids(items: List[Tuple[str, int]], prefix: str) -> List[int]:
+    """有序列表中键以 prefix 开头的学生ID（按键排序）"""
+    ids = []
+    for i in range(bisect.bisect_left(items, (prefix,)), len(items)):
+        key, student_id = items[i]
+        if not key.startswith(prefix):
+            break
+        ids.append(student_id)
+    return ids
+
+
+def _remove_sorted(items: List[Tuple[str, int]], item: Tuple[str, int]) -> None:
+    i = bisect.bisect_left(items, item)
+    if i < len(items) and items[i] == item:
+        del items[i]
+
+
+# 全局学生搜索索引
+student_index = StudentIndex()
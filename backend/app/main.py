@@ -1,6 +1,9 @@
 """
 FastAPI 应用主入口
 """
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -8,6 +11,31 @@ from app.core.config import settings
 from app.core.exceptions import BusinessException
 from app.core.middleware import OperationLogMiddleware, ExceptionHandlerMiddleware
 
+logger = logging.getLogger(__name__)
+
+
+def build_student_index():
+    """构建学生搜索索引（数据库不可用时在首次搜索时构建）"""
+    from app.core.database import SessionLocal
+    from app.core.student_index import student_index
+    db = SessionLocal()
+    try:
+        student_index.build(db)
+    except Exception:
+        logger.exception("启动时构建学生搜索索引失败，将在首次搜索时重新构建")
+        student_index.invalidate()
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时构建学生搜索索引，关闭时关闭后台任务线程池"""
+    from app.core.jobs import job_manager
+    build_student_index()
+    yield
+    job_manager.shutdown()
+
 # 创建FastAPI应用实例
 app = FastAPI(
     title=settings.APP_NAME,
@@ -15,7 +43,8 @@ app = FastAPI(
     description="学校教师专属的校运会综合管理平台",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    lifespan=lifespan
 )
 
 # 存储debug模式
@@ -54,7 +83,7 @@ async def business_exception_handler(request: Request, exc: BusinessException):
 # 注册API路由
 from app.api import auth, users, grades, classes, students, events
 from app.api import registrations, scores, statistics, exports, announcements
-from app.api import public, logs
+from app.api import public, logs, jobs, seasons, live
 
 app.include_router(auth.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
@@ -69,6 +98,9 @@ app.include_router(exports.router, prefix="/api")
 app.include_router(announcements.router, prefix="/api")
 app.include_router(public.router, prefix="/api")
 app.include_router(logs.router, prefix="/api")
+app.include_router(jobs.router, prefix="/api")
+app.include_router(seasons.router, prefix="/api")
+app.include_router(live.router, prefix="/api")
 
 
 @app.get("/")
@@ -3,10 +3,11 @@ from app.models.base_model import BaseModel, TimestampMixin
 from app.models.user import User
 from app.models.base import Grade, Class, Student
 from app.models.event import Event, EventGroup
-from app.models.registration import Registration
-from app.models.score import Score
+from app.models.registration import Registration, ClassEventQuota, StudentQuota
+from app.models.score import Score, ClassStanding, GradeStanding
 from app.models.announcement import Announcement
 from app.models.log import OperationLog
+from app.models.archive import Season
 
 __all__ = [
     "BaseModel",
@@ -18,7 +19,12 @@ __all__ = [
     "Event",
     "EventGroup",
     "Registration",
+    "ClassEventQuota",
+    "StudentQuota",
     "Score",
+    "ClassStanding",
+    "GradeStanding",
     "Announcement",
     "OperationLog",
+    "Season",
 ]
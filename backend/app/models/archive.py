@@ -0,0 +1,49 @@
+"""
+届次归档模型模块
+每届运动会结束后，年级、班级、学生、报名、成绩及当届项目设置整体复制到归档表，
+归档表结构与在用表相同，另加届次ID，主键为 (届次ID, 原ID)
+"""
+from typing import Dict
+
+from sqlalchemy import Column, String, Integer, ForeignKey, Table
+from app.models.base_model import Base, BaseModel
+from app.models.base import Grade, Class, Student
+from app.models.event import Event, EventGroup
+from app.models.registration import Registration
+from app.models.score import Score
+
+
+class Season(BaseModel):
+    """届次模型"""
+    __tablename__ = "seasons"
+    
+    name = Column(String(100), unique=True, nullable=False, comment="届次名称")
+    archived_by = Column(Integer, ForeignKey("users.id"), nullable=True, comment="归档人ID")
+    grade_count = Column(Integer, default=0, comment="归档年级数")
+    class_count = Column(Integer, default=0, comment="归档班级数")
+    student_count = Column(Integer, default=0, comment="归档学生数")
+    registration_count = Column(Integer, default=0, comment="归档报名数")
+    score_count = Column(Integer, default=0, comment="归档成绩数")
+
+
+def _archive_table(model) -> Table:
+    """按在用表结构生成归档表：去掉外键和唯一约束，加届次ID"""
+    columns = [Column("season_id", Integer, primary_key=True, autoincrement=False, comment="届次ID")]
+    for column in model.__table__.columns:
+        columns.append(Column(
+            column.name,
+            column.type,
+            primary_key=column.primary_key,
+            autoincrement=False,
+            nullable=column.nullable,
+            comment=column.comment
+        ))
+    return Table(f"archive_{model.__tablename__}", Base.metadata, *columns)
+
+
+# 归档的在用表（按外键依赖顺序），项目设置只复制不清空
+ARCHIVED_MODELS = (Grade, Class, Student, Event, EventGroup, Registration, Score)
+
+ARCHIVE_TABLES: Dict[str, Table] = {
+    model.__tablename__: _archive_table(model) for model in ARCHIVED_MODELS
+}
@@ -2,7 +2,7 @@
 基础信息模型模块
 包含年级、班级、学生模型
 """
-from sqlalchemy import Column, String, Integer, Enum, ForeignKey
+from sqlalchemy import Column, String, Integer, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.models.base_model import BaseModel
 
@@ -21,6 +21,10 @@ class Grade(BaseModel):
 class Class(BaseModel):
     """班级模型"""
     __tablename__ = "classes"
+    __table_args__ = (
+        # 按年级+名称查找班级（导入时匹配班级）
+        Index("ix_classes_grade_name", "grade_id", "name"),
+    )
     
     grade_id = Column(Integer, ForeignKey("grades.id"), nullable=False, comment="所属年级ID")
     name = Column(String(50), nullable=False, comment="班级名称")
@@ -33,6 +37,10 @@ class Class(BaseModel):
 class Student(BaseModel):
     """学生模型"""
     __tablename__ = "students"
+    __table_args__ = (
+        # 按班级筛选学生并按学号排序
+        Index("ix_students_class_student_no", "class_id", "student_no"),
+    )
     
     class_id = Column(Integer, ForeignKey("classes.id"), nullable=False, comment="所属班级ID")
     student_no = Column(String(20), unique=True, nullable=False, index=True, comment="学号")
@@ -1,7 +1,7 @@
 """
 运动项目模型模块
 """
-from sqlalchemy import Column, String, Integer, Boolean, Enum, ForeignKey, JSON
+from sqlalchemy import Column, String, Integer, Boolean, Enum, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from app.models.base_model import BaseModel
 
@@ -9,6 +9,10 @@ from app.models.base_model import BaseModel
 class Event(BaseModel):
     """运动项目模型"""
     __tablename__ = "events"
+    __table_args__ = (
+        # 导入时按名称匹配项目
+        Index("ix_events_name", "name"),
+    )
     
     name = Column(String(100), nullable=False, comment="项目名称")
     type = Column(String(20), nullable=False, comment="类型：track径赛/field田赛")
@@ -28,6 +32,10 @@ class Event(BaseModel):
 class EventGroup(BaseModel):
     """项目组别模型"""
     __tablename__ = "event_groups"
+    __table_args__ = (
+        # 按项目+组别名称查找组别
+        Index("ix_event_groups_event_name", "event_id", "name"),
+    )
     
     event_id = Column(Integer, ForeignKey("events.id"), nullable=False, comment="所属项目ID")
     name = Column(String(50), nullable=False, comment="组别名称")
@@ -1,13 +1,17 @@
 """
 操作日志模型模块
 """
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Index
 from app.models.base_model import BaseModel
 
 
 class OperationLog(BaseModel):
     """操作日志模型"""
     __tablename__ = "operation_logs"
+    __table_args__ = (
+        # 按时间范围筛选、按时间倒序分页
+        Index("ix_operation_logs_created_at", "created_at"),
+    )
     
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True, comment="操作人ID")
     action = Column(String(50), nullable=False, comment="操作类型")
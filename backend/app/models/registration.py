@@ -1,7 +1,7 @@
 """
 报名模型模块
 """
-from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.models.base_model import BaseModel
 
@@ -11,11 +11,14 @@ class Registration(BaseModel):
     __tablename__ = "registrations"
     __table_args__ = (
         UniqueConstraint("student_id", "event_id", name="uq_student_event"),
+        # 按项目、组别筛选报名（报名列表、导出、分组编排）
+        Index("ix_registrations_event_group", "event_id", "group_id"),
     )
     
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False, comment="学生ID")
     event_id = Column(Integer, ForeignKey("events.id"), nullable=False, comment="项目ID")
     group_id = Column(Integer, ForeignKey("event_groups.id"), nullable=True, comment="组别ID")
+    heat_no = Column(Integer, nullable=True, comment="组次")
     lane_no = Column(Integer, nullable=True, comment="道次/序号")
     created_by = Column(Integer, ForeignKey("users.id"), nullable=True, comment="创建人ID")
     
@@ -24,3 +27,33 @@ class Registration(BaseModel):
     event = relationship("Event", back_populates="registrations")
     group = relationship("EventGroup", back_populates="registrations")
     scores = relationship("Score", back_populates="registration", cascade="all, delete-orphan")
+
+
+class ClassEventQuota(BaseModel):
+    """
+    班级-项目报名人数计数
+    报名时在同一事务中用条件UPDATE原子地累加，用于并发安全地校验班级限报人数；
+    计数行缺失时按当前报名记录重新生成，因此不设外键，可随时删除重建
+    """
+    __tablename__ = "class_event_quotas"
+    __table_args__ = (
+        UniqueConstraint("class_id", "event_id", name="uq_class_event_quota"),
+    )
+    
+    class_id = Column(Integer, nullable=False, comment="班级ID")
+    event_id = Column(Integer, nullable=False, comment="项目ID")
+    count = Column(Integer, nullable=False, default=0, comment="已报名人数")
+
+
+class StudentQuota(BaseModel):
+    """
+    学生报名项目数计数
+    与 ClassEventQuota 相同，用于并发安全地校验个人限报项目数
+    """
+    __tablename__ = "student_quotas"
+    __table_args__ = (
+        UniqueConstraint("student_id", name="uq_student_quota"),
+    )
+    
+    student_id = Column(Integer, nullable=False, comment="学生ID")
+    count = Column(Integer, nullable=False, default=0, comment="已报名项目数")
@@ -1,7 +1,7 @@
 """
 成绩模型模块
 """
-from sqlalchemy import Column, Integer, String, Boolean, Enum, ForeignKey, DECIMAL
+from sqlalchemy import Column, Integer, String, Boolean, Enum, ForeignKey, DECIMAL, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.models.base_model import BaseModel
 
@@ -9,6 +9,10 @@ from app.models.base_model import BaseModel
 class Score(BaseModel):
     """成绩记录模型"""
     __tablename__ = "scores"
+    __table_args__ = (
+        # 按报名+轮次查重、按轮次统计有效成绩
+        Index("ix_scores_registration_round_valid", "registration_id", "round", "is_valid"),
+    )
     
     registration_id = Column(Integer, ForeignKey("registrations.id"), nullable=False, comment="报名ID")
     value = Column(DECIMAL(10, 3), nullable=False, comment="成绩值")
@@ -23,3 +27,37 @@ class Score(BaseModel):
     
     # 关联关系
     registration = relationship("Registration", back_populates="scores")
+
+
+class ClassStanding(BaseModel):
+    """
+    班级总分榜
+    按班级汇总决赛有效成绩的得分和名次（金银铜牌为第1-3名），
+    成绩名次、得分变化时在同一事务中按差值累加；不设外键，可随时从成绩表重建
+    """
+    __tablename__ = "class_standings"
+    __table_args__ = (
+        UniqueConstraint("class_id", name="uq_class_standing"),
+    )
+    
+    class_id = Column(Integer, nullable=False, comment="班级ID")
+    score_count = Column(Integer, nullable=False, default=0, comment="决赛有效成绩数")
+    points = Column(Integer, nullable=False, default=0, comment="总得分")
+    gold = Column(Integer, nullable=False, default=0, comment="金牌数")
+    silver = Column(Integer, nullable=False, default=0, comment="银牌数")
+    bronze = Column(Integer, nullable=False, default=0, comment="铜牌数")
+
+
+class GradeStanding(BaseModel):
+    """年级奖牌榜，与 ClassStanding 相同，按年级汇总"""
+    __tablename__ = "grade_standings"
+    __table_args__ = (
+        UniqueConstraint("grade_id", name="uq_grade_standing"),
+    )
+    
+    grade_id = Column(Integer, nullable=False, comment="年级ID")
+    score_count = Column(Integer, nullable=False, default=0, comment="决赛有效成绩数")
+    points = Column(Integer, nullable=False, default=0, comment="总得分")
+    gold = Column(Integer, nullable=False, default=0, comment="金牌数")
+    silver = Column(Integer, nullable=False, default=0, comment="银牌数")
+    bronze = Column(Integer, nullable=False, default=0, comment="铜牌数")
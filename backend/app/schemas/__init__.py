@@ -169,6 +169,28 @@ class StudentUpdate(BaseModel):
     gender: Optional[str] = Field(None, pattern="^[MF]$")
 
 
+# ========== 届次归档相关 ==========
+
+class SeasonInfo(BaseModel):
+    """届次信息"""
+    id: int
+    name: str
+    grade_count: int
+    class_count: int
+    student_count: int
+    registration_count: int
+    score_count: int
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SeasonArchiveRequest(BaseModel):
+    """归档本届请求"""
+    name: str = Field(..., min_length=1, max_length=100)
+
+
 # ========== 运动项目相关 ==========
 
 class EventGroupInfo(BaseModel):
@@ -247,6 +269,7 @@ class RegistrationInfo(BaseModel):
     student_id: int
     event_id: int
     group_id: Optional[int]
+    heat_no: Optional[int] = None
     lane_no: Optional[int]
     student_name: Optional[str] = None
     student_no: Optional[str] = None
@@ -267,17 +290,102 @@ class RegistrationCreate(BaseModel):
     group_id: Optional[int] = None
 
 
+class RegistrationBatchCreate(BaseModel):
+    """批量创建报名请求"""
+    items: List[RegistrationCreate] = Field(..., min_length=1, max_length=500)
+
+
+class RegistrationBatchItem(BaseModel):
+    """批量报名单条结果"""
+    student_id: int
+    event_id: int
+    group_id: Optional[int] = None
+    success: bool
+    registration_id: Optional[int] = None
+    error: str = ""
+
+
+class RegistrationBatchResponse(BaseModel):
+    """批量创建报名响应"""
+    success: int
+    failed: int
+    items: List[RegistrationBatchItem]
+
+
 class RegistrationLaneUpdate(BaseModel):
     """更新道次请求"""
     lane_no: int
 
 
+class SeedingRequest(BaseModel):
+    """分组编排请求"""
+    event_ids: Optional[List[int]] = None
+    lane_count: int = Field(default=8, ge=1, le=16)
+    draw: str = Field(default="serpentine", pattern="^(serpentine|random)$")
+    seed: Optional[int] = None
+
+
+class SeedingResponse(BaseModel):
+    """分组编排结果"""
+    events: int
+    heats: int
+    registrations: int
+
+
 class DuplicateCheckResponse(BaseModel):
     """查重检测响应"""
     is_duplicate: bool
     existing: Optional[RegistrationInfo] = None
 
 
+class EligibilityGroup(BaseModel):
+    """报名资格矩阵中的组别"""
+    id: int
+    name: str
+    gender: str
+    grade_ids: List[int]
+
+
+class EligibilityEvent(BaseModel):
+    """报名资格矩阵中的项目（含本班剩余名额）"""
+    id: int
+    name: str
+    max_per_class: int
+    registered: int
+    remaining: int
+    groups: List[EligibilityGroup] = []
+
+
+class EligibilityCell(BaseModel):
+    """学生对单个项目的报名资格"""
+    event_id: int
+    registered: bool
+    eligible: bool
+    group_ids: List[int] = []
+    reason: str = ""
+
+
+class EligibilityStudent(BaseModel):
+    """报名资格矩阵中的学生（含剩余可报项目数）"""
+    id: int
+    student_no: str
+    name: str
+    gender: str
+    registered: int
+    remaining: int
+    cells: List[EligibilityCell]
+
+
+class ClassEligibilityResponse(BaseModel):
+    """班级报名资格矩阵"""
+    class_id: int
+    class_name: str
+    grade_id: int
+    max_per_student: int
+    events: List[EligibilityEvent]
+    students: List[EligibilityStudent]
+
+
 # ========== 成绩相关 ==========
 
 class ScoreInfo(BaseModel):
@@ -470,11 +578,46 @@ class CertificatePreviewRequest(BaseModel):
 
 # ========== 导入响应 ==========
 
+class ImportFileSummary(BaseModel):
+    """多文件导入时单个文件的导入结果"""
+    filename: str
+    success: int
+    failed: int
+    skipped: int = 0
+
+
 class ImportResponse(BaseModel):
     """导入响应"""
     success: int
     failed: int
-    errors: List[str]
+    skipped: int = 0
+    errors: List[str]  # 前若干条错误（最多 IMPORT_ERROR_PREVIEW_LIMIT 条）
+    error_count: int = 0  # 错误总数
+    error_report: Optional[str] = None  # 完整错误报告下载地址
+    files: List[ImportFileSummary] = []
+    dry_run: bool = False
+    cached: bool = False  # 是否直接返回了相同文件的缓存结果
+
+
+class ImportJobInfo(BaseModel):
+    """后台导入任务信息"""
+    id: str
+    kind: str
+    status: str
+    processed: int
+    success: int
+    failed: int
+    skipped: int = 0
+    errors: List[str]  # 前若干条错误（最多 IMPORT_ERROR_PREVIEW_LIMIT 条）
+    error_count: int = 0  # 错误总数
+    error_report: Optional[str] = None  # 完整错误报告下载地址
+    files: List[ImportFileSummary] = []
+    dry_run: bool = False
+    cached: bool = False  # 是否直接返回了相同文件的缓存结果
+    message: str = ""
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
 
 # ========== 删除响应 ==========
@@ -4,6 +4,8 @@ from app.services.user_service import UserService
 from app.services.base_service import BaseService
 from app.services.event_service import EventService
 from app.services.registration_service import RegistrationService
+from app.services.eligibility_service import EligibilityService
+from app.services.seeding_service import SeedingService
 from app.services.score_service import ScoreService
 from app.services.statistics_service import StatisticsService
 from app.services.export_service import ExportService
@@ -16,6 +18,8 @@ __all__ = [
     "BaseService",
     "EventService",
     "RegistrationService",
+    "EligibilityService",
+    "SeedingService",
     "ScoreService",
     "StatisticsService",
     "ExportService",
@@ -7,6 +7,7 @@ from datetime import datetime
 import secrets
 from sqlalchemy.orm import Session
 
+from app.core.pagination import TOTAL_EXACT, paginate
 from app.models.announcement import Announcement
 from app.services.statistics_service import StatisticsService
 
@@ -87,20 +88,20 @@ class AnnouncementService:
         self,
         page: int = 1,
         page_size: int = 20,
-        include_closed: bool = False
-    ) -> Tuple[List[Announcement], int]:
-        """获取公示列表"""
+        include_closed: bool = False,
+        after: int = None,
+        total: str = TOTAL_EXACT
+    ) -> Tuple[List[Announcement], Optional[int]]:
+        """
+        获取公示列表（按创建先后倒序，即ID倒序）
+        after: 游标，返回ID小于该值的记录；total: 总数计算方式（exact/estimate/none）
+        """
         query = self.db.query(Announcement)
         
         if not include_closed:
             query = query.filter(Announcement.is_active == True)
         
-        query = query.order_by(Announcement.created_at.desc())
-        
-        total = query.count()
-        announcements = query.offset((page - 1) * page_size).limit(page_size).all()
-        
-        return announcements, total
+        return paginate(query, Announcement.id, page, page_size, after, total, descending=True)
     
     def get_announcement_by_code(self, share_code: str) -> Tuple[Optional[Dict], str]:
         """
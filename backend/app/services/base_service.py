@@ -2,13 +2,35 @@
 基础信息服务模块
 实现年级/班级/学生的CRUD操作、关联数据检查、批量导入
 """
-from typing import List, Optional, Tuple, Dict, Any
-from sqlalchemy.orm import Session
-from openpyxl import load_workbook
-from io import BytesIO
+from typing import List, Optional, Tuple, Dict, Any, Set, Callable, Iterator, Sequence
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, contains_eager
 
+from app.core.config import settings
+from app.core.dimension_cache import dimension_cache
+from app.core.pagination import TOTAL_EXACT, paginate
+from app.core.stats_cache import stats_cache
+from app.core.student_index import IndexedStudent, student_index
+from app.core.error_report import ERROR_DUPLICATE, ERROR_INVALID, ERROR_NOT_FOUND
+from app.core.ingestion import (
+    UploadSource,
+    ImportResult,
+    open_table,
+    chunked,
+    resolve_columns,
+    select_columns
+)
 from app.models.base import Grade, Class, Student
 from app.models.registration import Registration
+from app.models.score import ClassStanding, GradeStanding
+from app.services.registration_service import reset_quota_counters
+from app.services.statistics_service import move_standing_counts, standing_counts
+
+# 学生列表的加载策略：班级取自列表查询已有的JOIN，年级一并JOIN加载
+STUDENT_LIST_LOADERS = (contains_eager(Student.class_).joinedload(Class.grade),)
+
+# 学生导入字段（默认列顺序）
+STUDENT_IMPORT_FIELDS = ("student_no", "student_name", "gender", "grade_name", "class_name")
 
 
 class BaseService:
@@ -28,6 +50,7 @@ class BaseService:
         grade = Grade(name=name, sort_order=sort_order)
         self.db.add(grade)
         self.db.commit()
+        dimension_cache.invalidate()
         self.db.refresh(grade)
         return grade, ""
     
@@ -47,7 +70,10 @@ class BaseService:
             grade.sort_order = sort_order
         
         self.db.commit()
+        dimension_cache.invalidate()
         self.db.refresh(grade)
+        student_index.invalidate()
+        stats_cache.bump_all()
         return grade, ""
     
     def delete_grade(self, grade_id: int) -> Tuple[bool, str, Dict[str, int]]:
@@ -68,6 +94,7 @@ class BaseService:
         
         self.db.delete(grade)
         self.db.commit()
+        dimension_cache.invalidate()
         return True, "", {}
     
     def get_grade_list(self) -> List[Grade]:
@@ -92,6 +119,7 @@ class BaseService:
         class_ = Class(grade_id=grade_id, name=name)
         self.db.add(class_)
         self.db.commit()
+        dimension_cache.invalidate()
         self.db.refresh(class_)
         return class_, ""
     
@@ -117,13 +145,20 @@ class BaseService:
             grade = self.db.query(Grade).filter(Grade.id == grade_id).first()
             if not grade:
                 return None, "目标年级不存在"
-            class_.grade_id = grade_id
+            if grade_id != class_.grade_id:
+                # 班级的成绩从原年级移到新年级
+                counts = standing_counts(self.db, Student.class_id == class_id)
+                move_standing_counts(self.db, GradeStanding, counts, class_.grade_id, grade_id)
+                class_.grade_id = grade_id
         
         if name:
             class_.name = name
         
         self.db.commit()
+        dimension_cache.invalidate()
         self.db.refresh(class_)
+        student_index.invalidate()
+        stats_cache.bump_all()
         return class_, ""
     
     def delete_class(self, class_id: int) -> Tuple[bool, str, Dict[str, int]]:
@@ -139,7 +174,9 @@ class BaseService:
             }
         
         self.db.delete(class_)
+        reset_quota_counters(self.db, class_ids=[class_id])
         self.db.commit()
+        dimension_cache.invalidate()
         return True, "", {}
     
     def get_class_list(self, grade_id: int = None) -> List[Class]:
@@ -179,6 +216,7 @@ class BaseService:
         self.db.add(student)
         self.db.commit()
         self.db.refresh(student)
+        student_index.put(student)
         return student, ""
     
     def update_student(
@@ -194,28 +232,43 @@ class BaseService:
         if not student:
             return None, "学生不存在"
         
+        # 先完成全部校验，再修改学生和榜单
+        class_ = None
         if class_id:
             class_ = self.db.query(Class).filter(Class.id == class_id).first()
             if not class_:
                 return None, "班级不存在"
-            student.class_id = class_id
         
         if student_no and student_no != student.student_no:
             existing = self.db.query(Student).filter(Student.student_no == student_no).first()
             if existing:
                 return None, "学号已存在"
+        
+        if gender and gender not in ("M", "F"):
+            return None, "性别必须是M(男)或F(女)"
+        
+        if class_ and class_id != student.class_id:
+            # 调班后原班级和新班级的报名人数都发生变化
+            reset_quota_counters(self.db, class_ids=[student.class_id, class_id])
+            # 学生的成绩从原班级、年级移到新班级、年级
+            counts = standing_counts(self.db, Registration.student_id == student_id)
+            move_standing_counts(self.db, ClassStanding, counts, student.class_id, class_id)
+            move_standing_counts(self.db, GradeStanding, counts, student.class_.grade_id, class_.grade_id)
+            student.class_id = class_id
+        
+        if student_no:
             student.student_no = student_no
         
         if name:
             student.name = name
         
         if gender:
-            if gender not in ("M", "F"):
-                return None, "性别必须是M(男)或F(女)"
             student.gender = gender
         
         self.db.commit()
         self.db.refresh(student)
+        student_index.put(student)
+        stats_cache.bump_all()
         return student, ""
     
     def delete_student(self, student_id: int) -> Tuple[bool, str, Dict[str, int]]:
@@ -232,7 +285,9 @@ class BaseService:
             }
         
         self.db.delete(student)
+        reset_quota_counters(self.db, student_ids=[student_id])
         self.db.commit()
+        student_index.remove(student_id)
         return True, "", {}
     
     def get_student_list(
@@ -242,9 +297,14 @@ class BaseService:
         grade_id: int = None,
         class_id: int = None,
         keyword: str = None,
-        gender: str = None
-    ) -> Tuple[List[Student], int]:
-        """获取学生列表"""
+        gender: str = None,
+        after: int = None,
+        total: str = TOTAL_EXACT
+    ) -> Tuple[List[Student], Optional[int]]:
+        """
+        获取学生列表（按ID排序）
+        after: 游标，返回ID大于该值的记录；total: 总数计算方式（exact/estimate/none）
+        """
         query = self.db.query(Student).join(Class)
         
         if grade_id:
@@ -259,142 +319,173 @@ class BaseService:
         if gender:
             query = query.filter(Student.gender == gender)
         
-        total = query.count()
-        students = query.offset((page - 1) * page_size).limit(page_size).all()
-        
-        return students, total
+        return paginate(query, Student.id, page, page_size, after, total, options=STUDENT_LIST_LOADERS)
     
-    def import_students(self, file_content: bytes) -> Tuple[int, int, List[str]]:
+    def search_students(
+        self,
+        keyword: str,
+        limit: int = 20,
+        class_id: int = None,
+        grade_id: int = None
+    ) -> List[IndexedStudent]:
+        """
+        边输入边搜索学生（姓名片段、学号前缀、拼音首字母）
+        在内存索引中查找，索引失效时先从数据库重新构建
+        """
+        student_index.ensure_built(self.db)
+        return student_index.search(keyword, limit, class_id=class_id, grade_id=grade_id)
+    
+    def import_students(
+        self,
+        source: UploadSource,
+        result: ImportResult = None,
+        filename: str = None,
+        dry_run: bool = False
+    ) -> ImportResult:
         """
         批量导入学生
-        Excel格式: 学号, 姓名, 性别(男/女), 年级, 班级
-        返回: (成功数, 失败数, 错误列表)
+        Excel/CSV格式: 学号, 姓名, 性别(男/女), 年级, 班级（按表头识别列，无法识别时按此顺序）
+        
+        年级/班级按名称从维度缓存解析，已有学号用一次查询预加载，逐行在内存中校验，
+        通过校验的行分批批量写入
+        result: 可选，传入时导入进度实时写入该对象
+        filename: 原始文件名，用于识别CSV/TSV格式
+        dry_run: 试运行，只校验并统计导入结果，不写入任何数据
         """
-        success_count = 0
-        fail_count = 0
-        errors = []
+        dims = dimension_cache.get(self.db)
+        grade_ids = dims.grade_ids
+        class_ids = dims.class_ids
         
-        try:
-            wb = load_workbook(BytesIO(file_content))
-            ws = wb.active
+        def resolve_class(row: tuple) -> Tuple[Optional[int], str]:
+            grade_name = str(row[3]).strip()
+            class_name = str(row[4]).strip()
             
-            for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-                if not row[0]:  # 跳过空行
-                    continue
-                
-                try:
-                    student_no = str(row[0]).strip()
-                    name = str(row[1]).strip()
-                    gender_str = str(row[2]).strip()
-                    grade_name = str(row[3]).strip()
-                    class_name = str(row[4]).strip()
-                    
-                    # 转换性别
-                    gender = "M" if gender_str == "男" else "F" if gender_str == "女" else None
-                    if not gender:
-                        errors.append(f"第{row_idx}行: 性别格式错误，应为'男'或'女'")
-                        fail_count += 1
-                        continue
-                    
-                    # 查找年级
-                    grade = self.db.query(Grade).filter(Grade.name == grade_name).first()
-                    if not grade:
-                        errors.append(f"第{row_idx}行: 年级'{grade_name}'不存在")
-                        fail_count += 1
-                        continue
-                    
-                    # 查找班级
-                    class_ = self.db.query(Class).filter(
-                        Class.grade_id == grade.id,
-                        Class.name == class_name
-                    ).first()
-                    if not class_:
-                        errors.append(f"第{row_idx}行: 班级'{class_name}'不存在")
-                        fail_count += 1
-                        continue
-                    
-                    # 检查学号是否已存在
-                    existing = self.db.query(Student).filter(Student.student_no == student_no).first()
-                    if existing:
-                        errors.append(f"第{row_idx}行: 学号'{student_no}'已存在")
-                        fail_count += 1
-                        continue
-                    
-                    # 创建学生
-                    student = Student(
-                        class_id=class_.id,
-                        student_no=student_no,
-                        name=name,
-                        gender=gender
-                    )
-                    self.db.add(student)
-                    success_count += 1
-                    
-                except Exception as e:
-                    errors.append(f"第{row_idx}行: {str(e)}")
-                    fail_count += 1
+            grade_id = grade_ids.get(grade_name)
+            if grade_id is None:
+                return None, f"年级'{grade_name}'不存在"
             
-            self.db.commit()
+            class_id = class_ids.get((grade_id, class_name))
+            if class_id is None:
+                return None, f"班级'{class_name}'不存在"
             
-        except Exception as e:
-            errors.append(f"文件解析错误: {str(e)}")
+            return class_id, ""
         
-        return success_count, fail_count, errors
-
-    def import_students_by_class(self, file_content: bytes, class_id: int) -> Tuple[int, int, List[str]]:
+        return self._import_student_rows(
+            source, STUDENT_IMPORT_FIELDS, resolve_class, result, filename, dry_run
+        )
+    
+    def import_students_by_class(
+        self,
+        source: UploadSource,
+        class_id: int,
+        result: ImportResult = None,
+        filename: str = None,
+        dry_run: bool = False
+    ) -> ImportResult:
         """
         按班级批量导入学生
-        Excel格式: 学号, 姓名, 性别(男/女)
-        返回: (成功数, 失败数, 错误列表)
+        Excel/CSV格式: 学号, 姓名, 性别(男/女)
+        """
+        return self._import_student_rows(
+            source, STUDENT_IMPORT_FIELDS[:3], lambda row: (class_id, ""), result, filename, dry_run
+        )
+    
+    def _import_student_rows(
+        self,
+        source: UploadSource,
+        fields: Sequence[str],
+        resolve_class: Callable[[tuple], Tuple[Optional[int], str]],
+        result: ImportResult = None,
+        filename: str = None,
+        dry_run: bool = False
+    ) -> ImportResult:
         """
-        success_count = 0
-        fail_count = 0
-        errors = []
+        学生导入公共流程：流式读取工作表或CSV，
+        校验通过的行按 IMPORT_CHUNK_SIZE 分批写入并提交（试运行时只统计）
+        """
+        result = result or ImportResult()
+        result.dry_run = dry_run
         
         try:
-            wb = load_workbook(BytesIO(file_content))
-            ws = wb.active
+            reader = open_table(source, filename)
+            try:
+                rows = self._iter_valid_students(reader.active, fields, resolve_class, result)
+                for chunk in chunked(rows, settings.IMPORT_CHUNK_SIZE):
+                    if not dry_run:
+                        self.db.execute(insert(Student), chunk)
+                        self.db.commit()
+                    result.success += len(chunk)
+            finally:
+                reader.close()
+            
+        except Exception as e:
+            self.db.rollback()
+            result.add_file_error(f"文件解析错误: {str(e)}")
+        
+        if not dry_run and result.success:
+            # 批量写入不逐条更新搜索索引，下次搜索时重新构建
+            student_index.invalidate()
+        return result
+    
+    def _iter_valid_students(
+        self,
+        sheet,
+        fields: Sequence[str],
+        resolve_class: Callable[[tuple], Tuple[Optional[int], str]],
+        result: ImportResult
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        逐行校验学生数据，生成待写入的行，校验失败的行记录到导入结果
+        数据行按 fields 的顺序重新排列后再校验
+        """
+        existing_nos = self._load_student_nos()
+        
+        rows = sheet.iter_rows(min_row=1)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = resolve_columns(header[1], fields)
+        
+        for row_idx, row in rows:
+            row = select_columns(row, columns)
+            if not row[0]:  # 跳过空行
+                continue
             
-            for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-                if not row[0]:  # 跳过空行
+            result.processed += 1
+            try:
+                student_no = str(row[0]).strip()
+                name = str(row[1]).strip()
+                gender_str = str(row[2]).strip()
+                
+                # 转换性别
+                gender = "M" if gender_str == "男" else "F" if gender_str == "女" else None
+                if not gender:
+                    result.add_error("性别格式错误，应为'男'或'女'", row_idx, "性别", ERROR_INVALID)
                     continue
                 
-                try:
-                    student_no = str(row[0]).strip()
-                    name = str(row[1]).strip()
-                    gender_str = str(row[2]).strip()
-                    
-                    # 转换性别
-                    gender = "M" if gender_str == "男" else "F" if gender_str == "女" else None
-                    if not gender:
-                        errors.append(f"第{row_idx}行: 性别格式错误，应为'男'或'女'")
-                        fail_count += 1
-                        continue
-                    
-                    # 检查学号是否已存在
-                    existing = self.db.query(Student).filter(Student.student_no == student_no).first()
-                    if existing:
-                        errors.append(f"第{row_idx}行: 学号'{student_no}'已存在")
-                        fail_count += 1
-                        continue
-                    
-                    # 创建学生
-                    student = Student(
-                        class_id=class_id,
-                        student_no=student_no,
-                        name=name,
-                        gender=gender
-                    )
-                    self.db.add(student)
-                    success_count += 1
-                    
-                except Exception as e:
-                    errors.append(f"第{row_idx}行: {str(e)}")
-                    fail_count += 1
-            
-            self.db.commit()
+                # 查找年级和班级
+                class_id, error = resolve_class(row)
+                if error:
+                    result.add_error(error, row_idx, "年级/班级", ERROR_NOT_FOUND)
+                    continue
+                
+                # 检查学号是否已存在（包括本文件中已出现的学号）
+                if student_no in existing_nos:
+                    result.add_error(f"学号'{student_no}'已存在", row_idx, "学号", ERROR_DUPLICATE)
+                    continue
+                
+            except Exception as e:
+                result.add_error(str(e), row_idx)
+                continue
             
-        except Exception as e:
-            errors.append(f"文件解析错误: {str(e)}")
-        
-        return success_count, fail_count, errors
+            existing_nos.add(student_no)
+            yield {
+                "class_id": class_id,
+                "student_no": student_no,
+                "name": name,
+                "gender": gender
+            }
+    
+    def _load_student_nos(self) -> Set[str]:
+        """一次查询加载所有已存在的学号"""
+        return {student_no for (student_no,) in self.db.query(Student.student_no)}
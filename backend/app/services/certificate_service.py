@@ -4,7 +4,7 @@
 """
 from typing import List, Dict, Tuple, Optional
 from io import BytesIO
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.units import cm
 from reportlab.pdfgen import canvas
@@ -13,6 +13,7 @@ from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.colors import black, gold, red
 import os
 
+from app.core.dimension_cache import Dimensions, dimension_cache
 from app.models.score import Score
 from app.models.registration import Registration
 from app.models.event import Event
@@ -61,8 +62,10 @@ class CertificateService:
         批量生成奖状PDF
         rank_range: (起始名次, 结束名次)
         """
-        # 查询获奖成绩
-        query = self.db.query(Score).join(Registration).filter(
+        # 查询获奖成绩（一并加载报名和学生），班级、年级、项目取自维度缓存
+        query = self.db.query(Score).join(Registration).options(
+            joinedload(Score.registration).joinedload(Registration.student)
+        ).filter(
             Score.is_valid == True,
             Score.round == "final",
             Score.rank >= rank_range[0],
@@ -73,6 +76,11 @@ class CertificateService:
             query = query.filter(Registration.event_id == event_id)
         
         scores = query.order_by(Score.rank).all()
+        dims = dimension_cache.get(
+            self.db,
+            class_ids={score.registration.student.class_id for score in scores},
+            event_ids={score.registration.event_id for score in scores}
+        )
         
         # 创建PDF
         buffer = BytesIO()
@@ -83,6 +91,7 @@ class CertificateService:
             self._draw_certificate(
                 c, width, height,
                 score=score,
+                dims=dims,
                 title=title,
                 signature=signature,
                 date=date,
@@ -99,6 +108,7 @@ class CertificateService:
         width: float,
         height: float,
         score: Score,
+        dims: Dimensions,
         title: str,
         signature: str,
         date: str,
@@ -107,7 +117,8 @@ class CertificateService:
         """绘制单张奖状"""
         reg = score.registration
         student = reg.student
-        event = reg.event
+        class_ = dims.classes[student.class_id]
+        event = dims.events[reg.event_id]
         
         # 获取名次文字
         rank_text = self._get_rank_text(score.rank)
@@ -135,7 +146,7 @@ class CertificateService:
         c.drawCentredString(width/2, content_y, f"Student: {student.name}")
         content_y -= 1.2*cm
         
-        c.drawCentredString(width/2, content_y, f"Class: {student.class_.grade.name} {student.class_.name}")
+        c.drawCentredString(width/2, content_y, f"Class: {class_.grade_name} {class_.name}")
         content_y -= 1.5*cm
         
         # 比赛信息
@@ -0,0 +1,202 @@
+"""
+报名资格服务模块
+将项目和组别的报名限制编译为规则（随维度数据缓存失效），
+一次计算整个班级 学生×项目/组别 的可报名矩阵
+"""
+import threading
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.dimension_cache import Dimensions, dimension_cache
+from app.models.base import Class, Student
+from app.models.registration import Registration
+
+# (性别, 年级ID) -> 是否允许参加
+GroupPredicate = Callable[[str, int], bool]
+
+
+class GroupRule:
+    """编译后的组别规则"""
+    
+    def __init__(self, group_id: int, name: str, gender: str, grade_ids: FrozenSet[int]):
+        self.id = group_id
+        self.name = name
+        self.gender = gender
+        self.grade_ids = grade_ids
+        self.accepts = compile_group_predicate(gender, grade_ids)
+    
+    def reject_reason(self, gender: str, grade_id: int) -> str:
+        """返回不允许参加的原因（与 create_registration 的错误信息一致），允许时为空"""
+        if self.gender != "A" and self.gender != gender:
+            return "该组别不允许该性别参加"
+        if self.grade_ids and grade_id not in self.grade_ids:
+            return "该组别不允许该年级参加"
+        return ""
+
+
+class EventRule:
+    """编译后的项目规则"""
+    
+    def __init__(self, event_id: int, name: str, max_per_class: int):
+        self.id = event_id
+        self.name = name
+        self.max_per_class = max_per_class
+        self.groups: List[GroupRule] = []
+    
+    def eligible_groups(self, gender: str, grade_id: int) -> List[int]:
+        """学生可参加的组别ID"""
+        return [group.id for group in self.groups if group.accepts(gender, grade_id)]
+
+
+class EventRules:
+    """全部项目的编译规则"""
+    
+    def __init__(self, events: List[EventRule], max_per_student: int):
+        self.events = events
+        self.max_per_student = max_per_student
+
+
+def compile_group_predicate(gender: str, grade_ids: FrozenSet[int]) -> GroupPredicate:
+    """将组别的性别和年级限制编译为判定函数，无限制的条件不参与判断"""
+    any_gender = gender == "A"
+    if any_gender and not grade_ids:
+        return lambda student_gender, grade_id: True
+    if any_gender:
+        return lambda student_gender, grade_id: grade_id in grade_ids
+    if not grade_ids:
+        return lambda student_gender, grade_id: student_gender == gender
+    return lambda student_gender, grade_id: student_gender == gender and grade_id in grade_ids
+
+
+_rules_lock = threading.Lock()
+_rules_cache: Optional[Tuple[Dimensions, EventRules]] = None
+
+
+def compile_event_rules(db: Session) -> EventRules:
+    """
+    由维度数据缓存中的项目和组别编译规则
+    维度快照未重新加载（项目、组别未变化）时直接返回缓存的规则，不查询数据库
+    """
+    global _rules_cache
+    dims = dimension_cache.get(db)
+    with _rules_lock:
+        if _rules_cache is not None and _rules_cache[0] is dims:
+            return _rules_cache[1]
+    
+    events = [
+        EventRule(row.id, row.name, row.max_per_class)
+        for row in sorted(dims.events.values(), key=lambda row: (row.sort_order, row.id))
+    ]
+    for event in events:
+        event.groups = [
+            GroupRule(row.id, row.name, row.gender or "A", frozenset(row.grade_ids or ()))
+            for row in dims.event_groups.get(event.id, [])
+        ]
+    
+    # 与 RegistrationLimits 一致，使用第一个项目的个人限报数
+    rules = EventRules(events, dims.events[min(dims.events)].max_per_student if dims.events else 3)
+    with _rules_lock:
+        _rules_cache = (dims, rules)
+    return rules
+
+
+class EligibilityService:
+    """报名资格服务类"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get_class_eligibility(self, class_id: int) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        获取班级报名资格矩阵
+        返回: (矩阵, 错误信息)
+        
+        班级、学生、报名记录各一次批量查询，规则取自编译缓存，所有单元格在内存中计算；
+        校验顺序与 create_registration 一致：重复报名、组别限制、班级限报人数、个人限报项目数。
+        项目设有组别时，学生至少符合一个组别才可报名
+        """
+        class_ = self.db.query(Class.id, Class.name, Class.grade_id).filter(Class.id == class_id).first()
+        if not class_:
+            return None, "班级不存在"
+        
+        students = self.db.query(
+            Student.id, Student.student_no, Student.name, Student.gender
+        ).filter(Student.class_id == class_id).order_by(Student.student_no).all()
+        
+        rules = compile_event_rules(self.db)
+        
+        # 本班学生的全部报名：同时得到学生报名项目数和班级各项目报名人数
+        registered = set()
+        student_counts: Dict[int, int] = {}
+        class_counts: Dict[int, int] = {}
+        if students:
+            for student_id, event_id in self.db.query(
+                Registration.student_id, Registration.event_id
+            ).join(Student, Registration.student_id == Student.id).filter(Student.class_id == class_id):
+                registered.add((student_id, event_id))
+                student_counts[student_id] = student_counts.get(student_id, 0) + 1
+                class_counts[event_id] = class_counts.get(event_id, 0) + 1
+        
+        events = []
+        class_remaining = {}
+        for event in rules.events:
+            count = class_counts.get(event.id, 0)
+            class_remaining[event.id] = max(event.max_per_class - count, 0)
+            events.append({
+                "id": event.id,
+                "name": event.name,
+                "max_per_class": event.max_per_class,
+                "registered": count,
+                "remaining": class_remaining[event.id],
+                "groups": [
+                    {"id": g.id, "name": g.name, "gender": g.gender, "grade_ids": sorted(g.grade_ids)}
+                    for g in event.groups
+                ],
+            })
+        
+        rows = []
+        for student in students:
+            count = student_counts.get(student.id, 0)
+            student_remaining = max(rules.max_per_student - count, 0)
+            cells = []
+            for event in rules.events:
+                group_ids = event.eligible_groups(student.gender, class_.grade_id)
+                is_registered = (student.id, event.id) in registered
+                reason = ""
+                if is_registered:
+                    reason = "该学生已报名此项目"
+                elif event.groups and not group_ids:
+                    if len(event.groups) == 1:
+                        reason = event.groups[0].reject_reason(student.gender, class_.grade_id)
+                    else:
+                        reason = "没有该学生可参加的组别"
+                elif not class_remaining[event.id]:
+                    reason = f"该班级报名人数已达上限({event.max_per_class}人)"
+                elif not student_remaining:
+                    reason = f"该学生报名项目数已达上限({rules.max_per_student}项)"
+                cells.append({
+                    "event_id": event.id,
+                    "registered": is_registered,
+                    "eligible": not reason,
+                    "group_ids": group_ids,
+                    "reason": reason,
+                })
+            rows.append({
+                "id": student.id,
+                "student_no": student.student_no,
+                "name": student.name,
+                "gender": student.gender,
+                "registered": count,
+                "remaining": student_remaining,
+                "cells": cells,
+            })
+        
+        return {
+            "class_id": class_.id,
+            "class_name": class_.name,
+            "grade_id": class_.grade_id,
+            "max_per_student": rules.max_per_student,
+            "events": events,
+            "students": rows,
+        }, ""
@@ -5,8 +5,12 @@
 from typing import List, Optional, Tuple, Dict
 from sqlalchemy.orm import Session
 
+from app.core.dimension_cache import dimension_cache
+from app.core.stats_cache import stats_cache
 from app.models.event import Event, EventGroup
 from app.models.registration import Registration
+from app.services.registration_service import reset_quota_counters
+from app.services.statistics_service import publish_live_changes, refresh_event_ranking
 
 
 # 预置项目模板 - 按运动会标准分类
@@ -106,6 +110,7 @@ class EventService:
         )
         self.db.add(event)
         self.db.commit()
+        dimension_cache.invalidate()
         self.db.refresh(event)
         return event, ""
     
@@ -149,8 +154,17 @@ class EventService:
             event.has_preliminary = has_preliminary
         if scoring_rule is not None:
             event.scoring_rule = scoring_rule
+        reranked = bool(type) or scoring_rule is not None
+        if reranked:
+            # 排序方向或计分规则变化，在同一事务中重新计算名次和得分
+            refresh_event_ranking(self.db, event_id)
         
         self.db.commit()
+        dimension_cache.invalidate()
+        # 计分规则接口读取项目设置，项目名称也出现在排名中
+        stats_cache.bump_all()
+        if reranked:
+            publish_live_changes(self.db, [event_id])
         self.db.refresh(event)
         return event, ""
     
@@ -167,7 +181,9 @@ class EventService:
             }
         
         self.db.delete(event)
+        reset_quota_counters(self.db, event_ids=[event_id])
         self.db.commit()
+        dimension_cache.invalidate()
         return True, "", {}
     
     def get_event_list(self, type: str = None) -> List[Event]:
@@ -206,6 +222,7 @@ class EventService:
         )
         self.db.add(group)
         self.db.commit()
+        dimension_cache.invalidate()
         self.db.refresh(group)
         return group, ""
     
@@ -231,6 +248,7 @@ class EventService:
             group.grade_ids = grade_ids
         
         self.db.commit()
+        dimension_cache.invalidate()
         self.db.refresh(group)
         return group, ""
     
@@ -246,6 +264,7 @@ class EventService:
         
         self.db.delete(group)
         self.db.commit()
+        dimension_cache.invalidate()
         return True, ""
     
     # ========== 模板功能 ==========
@@ -320,7 +339,10 @@ class EventService:
         # 删除所有项目（组别会级联删除）
         count = self.db.query(Event).count()
         self.db.query(Event).delete()
+        # ID将被重置，报名计数一并清空
+        reset_quota_counters(self.db)
         self.db.commit()
+        dimension_cache.invalidate()
         
         # 重置自增ID（MySQL语法）
         from sqlalchemy import text
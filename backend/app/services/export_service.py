@@ -4,16 +4,16 @@
 """
 from typing import List, Dict, Optional
 from io import BytesIO
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, joinedload
 from openpyxl import Workbook
 from openpyxl.worksheet.worksheet import Worksheet
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 from openpyxl.utils import get_column_letter
 
+from app.core.dimension_cache import dimension_cache
 from app.models.registration import Registration
 from app.models.score import Score
 from app.models.base import Student, Class, Grade
-from app.models.event import Event
 from app.services.statistics_service import StatisticsService
 
 
@@ -47,27 +47,14 @@ class ExportService:
         方便班主任单独填写各班级的报名信息
         """
         import zipfile
-        from app.models.event import EventGroup
         
-        # 查询所有班级（按年级和班级名排序）
-        classes_query = (
-            self.db.query(Class)
-            .join(Grade, Class.grade_id == Grade.id)
-            .order_by(Grade.sort_order, Class.name)
-        )
-        
-        if class_id:
-            classes_query = classes_query.filter(Class.id == class_id)
-        if grade_id:
-            classes_query = classes_query.filter(Class.grade_id == grade_id)
-        
-        classes = classes_query.all()
-        
-        # 查询所有项目及其组别
-        events_query = self.db.query(Event).order_by(Event.name)
-        if event_id:
-            events_query = events_query.filter(Event.id == event_id)
-        events = events_query.all()
+        # 班级（按年级和班级名排序）、项目及其组别取自维度缓存
+        dims = dimension_cache.get(self.db)
+        classes = [
+            class_ for class_ in dims.sorted_classes()
+            if (not class_id or class_.id == class_id) and (not grade_id or class_.grade_id == grade_id)
+        ]
+        events = [event for event in dims.sorted_events() if not event_id or event.id == event_id]
         
         # 创建ZIP文件
         zip_buffer = BytesIO()
@@ -77,22 +64,21 @@ class ExportService:
             for class_ in classes:
                 excel_content = self._create_class_registration_excel(
                     class_=class_,
-                    events=events
+                    events=events,
+                    dims=dims
                 )
                 
                 # 文件名：年级名-班级名.xlsx
-                filename = f"{class_.grade.name}-{class_.name}.xlsx"
+                filename = f"{class_.grade_name}-{class_.name}.xlsx"
                 zip_file.writestr(filename, excel_content)
         
         zip_buffer.seek(0)
         return zip_buffer.getvalue()
     
-    def _create_class_registration_excel(self, class_, events) -> bytes:
+    def _create_class_registration_excel(self, class_, events, dims) -> bytes:
         """
         为单个班级创建报名表Excel
         """
-        from app.models.event import EventGroup
-        
         wb = self._create_workbook()
         ws = wb.active
         ws.title = "报名表"
@@ -112,7 +98,7 @@ class ExportService:
         current_row = 1
         
         # 添加班级标题
-        title_text = f"{class_.grade.name} {class_.name} 运动会报名表"
+        title_text = f"{class_.grade_name} {class_.name} 运动会报名表"
         ws.cell(row=current_row, column=1, value=title_text)
         ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=6)
         title_cell = ws.cell(row=current_row, column=1)
@@ -123,7 +109,7 @@ class ExportService:
         # 遍历每个项目
         for event in events:
             # 获取该项目的组别
-            groups = self.db.query(EventGroup).filter(EventGroup.event_id == event.id).all()
+            groups = dims.event_groups.get(event.id, [])
             
             # 如果项目没有组别，创建一个默认组
             if not groups:
@@ -162,6 +148,7 @@ class ExportService:
                 reg_query = (
                     self.db.query(Registration)
                     .join(Student, Registration.student_id == Student.id)
+                    .options(contains_eager(Registration.student))
                     .filter(Student.class_id == class_.id)
                     .filter(Registration.event_id == event.id)
                 )
@@ -239,7 +226,15 @@ class ExportService:
         ws.append(headers)
         self._style_header(ws)
         
-        query = self.db.query(Score).join(Registration).join(Student).join(Class).join(Grade).filter(
+        # 一次联表查询取出成绩和学生，班级、年级、项目名称取自维度缓存
+        query = self.db.query(
+            Score.value, Score.round, Score.rank, Score.points,
+            Student.student_no, Student.name, Student.class_id, Registration.event_id
+        ).join(
+            Registration, Score.registration_id == Registration.id
+        ).join(
+            Student, Registration.student_id == Student.id
+        ).filter(
             Score.is_valid == True
         )
         
@@ -248,19 +243,24 @@ class ExportService:
         if class_id:
             query = query.filter(Student.class_id == class_id)
         if grade_id:
-            query = query.filter(Class.grade_id == grade_id)
+            query = query.join(Class, Student.class_id == Class.id).filter(Class.grade_id == grade_id)
         
         scores = query.all()
+        dims = dimension_cache.get(
+            self.db,
+            class_ids={score.class_id for score in scores},
+            event_ids={score.event_id for score in scores}
+        )
         
         for idx, score in enumerate(scores, 1):
-            reg = score.registration
+            class_ = dims.classes[score.class_id]
             ws.append([
                 idx,
-                reg.student.student_no,
-                reg.student.name,
-                reg.student.class_.name,
-                reg.student.class_.grade.name,
-                reg.event.name,
+                score.student_no,
+                score.name,
+                class_.name,
+                class_.grade_name,
+                dims.events[score.event_id].name,
                 float(score.value),
                 "预赛" if score.round == "preliminary" else "决赛",
                 score.rank or "",
@@ -349,7 +349,8 @@ class ExportService:
         wb = self._create_workbook()
         ws = wb.active
         
-        event = self.db.query(Event).filter(Event.id == event_id).first()
+        dims = dimension_cache.get(self.db, event_ids=[event_id])
+        event = dims.events.get(event_id)
         ws.title = event.name if event else "参赛表格"
         
         # 默认字段
@@ -358,18 +359,22 @@ class ExportService:
         ws.append(headers)
         self._style_header(ws)
         
-        registrations = self.db.query(Registration).filter(
+        registrations = self.db.query(Registration).options(
+            joinedload(Registration.student)
+        ).filter(
             Registration.event_id == event_id
-        ).order_by(Registration.lane_no).all()
+        ).order_by(Registration.heat_no, Registration.lane_no).all()
+        dims = dimension_cache.get(self.db, class_ids={reg.student.class_id for reg in registrations})
         
         for idx, reg in enumerate(registrations, 1):
+            class_ = dims.classes[reg.student.class_id]
             row = [
                 idx,
                 reg.lane_no or idx,
                 reg.student.student_no,
                 reg.student.name,
-                reg.student.class_.name,
-                reg.student.class_.grade.name
+                class_.name,
+                class_.grade_name
             ]
             # 自定义字段留空
             row.extend([""] * len(custom_fields or []))
@@ -388,8 +393,6 @@ class ExportService:
         
         按项目+组别分工作表，包含成绩填写列和名次列
         """
-        from app.models.event import EventGroup
-        
         wb = self._create_workbook()
         wb.remove(wb.active)  # 移除默认sheet
         
@@ -404,11 +407,12 @@ class ExportService:
             bottom=Side(style='thin')
         )
         
-        events = self.db.query(Event).order_by(Event.name).all()
+        # 项目、组别、班级、年级取自维度缓存
+        dims = dimension_cache.get(self.db)
         
-        for event in events:
+        for event in dims.sorted_events():
             # 获取该项目的组别
-            groups = self.db.query(EventGroup).filter(EventGroup.event_id == event.id).all()
+            groups = dims.event_groups.get(event.id, [])
             
             # 如果没有组别，创建默认组
             if not groups:
@@ -456,7 +460,9 @@ class ExportService:
                     cell.border = thin_border
                 
                 # 查询该项目-组别的报名记录
-                reg_query = self.db.query(Registration).filter(
+                reg_query = self.db.query(Registration).options(
+                    joinedload(Registration.student)
+                ).filter(
                     Registration.event_id == event.id
                 )
                 if group_id:
@@ -464,18 +470,20 @@ class ExportService:
                 else:
                     reg_query = reg_query.filter(Registration.group_id == None)
                 
-                registrations = reg_query.order_by(Registration.lane_no).all()
+                registrations = reg_query.order_by(Registration.heat_no, Registration.lane_no).all()
+                dims = dimension_cache.get(self.db, class_ids={reg.student.class_id for reg in registrations})
                 
                 # 数据行
                 for idx, reg in enumerate(registrations, 1):
+                    class_ = dims.classes[reg.student.class_id]
                     row_data = [
                         idx,
                         reg.lane_no or idx,
                         reg.student.student_no,
                         reg.student.name,
                         "男" if reg.student.gender == "M" else "女",
-                        reg.student.class_.name,
-                        reg.student.class_.grade.name,
+                        class_.name,
+                        class_.grade_name,
                         "",  # 成绩（留空给裁判填写）
                         ""   # 名次（留空给裁判填写）
                     ]
@@ -557,13 +565,9 @@ class ExportService:
         if not class_ids:
             raise ValueError("请至少选择一个班级")
         
-        # 查询有效的班级信息
-        valid_classes = (
-            self.db.query(Class)
-            .join(Grade, Class.grade_id == Grade.id)
-            .filter(Class.id.in_(class_ids))
-            .all()
-        )
+        # 有效的班级信息取自维度缓存（按班级ID排序）
+        dims = dimension_cache.get(self.db, class_ids=class_ids)
+        valid_classes = [dims.classes[class_id] for class_id in sorted(set(class_ids)) if class_id in dims.classes]
         
         if not valid_classes:
             raise ValueError("未找到有效班级")
@@ -576,7 +580,7 @@ class ExportService:
         for class_ in valid_classes:
             # 工作表命名格式：年级名-班级名
             # Excel工作表名称限制31字符
-            sheet_name = f"{class_.grade.name}-{class_.name}"[:31]
+            sheet_name = f"{class_.grade_name}-{class_.name}"[:31]
             ws = wb.create_sheet(title=sheet_name)
             
             # 构建工作表内容
@@ -584,7 +588,7 @@ class ExportService:
                 ws=ws,
                 class_id=class_.id,
                 class_name=class_.name,
-                grade_name=class_.grade.name
+                grade_name=class_.grade_name
             )
         
         # 保存到字节流
@@ -2,15 +2,463 @@
 报名管理服务模块
 实现报名创建、查重检测、限制校验、批量导入
 """
-from typing import List, Optional, Tuple, Dict
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from openpyxl import load_workbook
-from io import BytesIO
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple, Dict, Iterator, Iterable
+from sqlalchemy.orm import Session, contains_eager, joinedload
+from sqlalchemy import bindparam, func, insert, update
+from sqlalchemy.exc import IntegrityError
 
-from app.models.registration import Registration
-from app.models.base import Student, Class
-from app.models.event import Event, EventGroup
+from app.core.config import settings
+from app.core.database import insert_ignore, truncate_tables
+from app.core.pagination import TOTAL_EXACT, paginate
+from app.core.dimension_cache import dimension_cache
+from app.core.stats_cache import stats_cache
+from app.core.student_index import student_index
+from app.core.error_report import ERROR_LIMIT, ERROR_NOT_FOUND
+from app.core.ingestion import (
+    UploadSource,
+    ImportResult,
+    open_table,
+    chunked,
+    detect_column_mapping,
+    is_header_row,
+    is_archive_file,
+    save_to_temp,
+    extract_import_files
+)
+from app.models.registration import Registration, ClassEventQuota, StudentQuota
+from app.models.base import Grade, Student, Class
+from app.models.event import EventGroup
+
+
+# 报名列表的加载策略：学生、班级取自列表查询已有的JOIN，年级、项目、组别一并JOIN加载
+REGISTRATION_LIST_LOADERS = (
+    contains_eager(Registration.student).contains_eager(Student.class_).joinedload(Class.grade),
+    joinedload(Registration.event),
+    joinedload(Registration.group),
+)
+
+
+class RegistrationLimits:
+    """
+    报名限制校验
+    班级-项目报名人数和学生报名项目数保存在计数表（ClassEventQuota、StudentQuota）中，
+    计数行缺失时按当前报名记录生成：
+    - 单条报名用 reserve 以条件UPDATE原子地占用名额，一次索引写入即完成校验，并发时不会超限；
+    - 批量写入（导入、批量报名）用 load_counts 以 SELECT ... FOR UPDATE 锁定本批涉及的计数行，
+      在内存中校验并累计，同一批次内相互影响的报名也能正确校验，写入报名后由 save_counts 回写，
+      锁在事务提交或回滚时释放
+    dry_run=True 时不加锁也不写计数表，直接统计报名记录
+    """
+    
+    def __init__(self, db: Session, dry_run: bool = False):
+        self.db = db
+        self.dry_run = dry_run
+        self.event_class_limits: Dict[int, int] = {}
+        self.max_per_student: Optional[int] = None
+        self.student_classes: Dict[int, int] = {}
+        self.class_counts: Dict[Tuple[int, int], int] = {}
+        self.student_counts: Dict[int, int] = {}
+        # 从计数表加载时的值，用于回写有变化的计数
+        self._saved_class_counts: Dict[Tuple[int, int], int] = {}
+        self._saved_student_counts: Dict[int, int] = {}
+    
+    def load_events(self, event_ids: Iterable[int]) -> None:
+        """加载项目的班级限报人数和个人限报项目数（取自维度缓存）"""
+        missing = [event_id for event_id in event_ids if event_id not in self.event_class_limits]
+        if not missing and self.max_per_student is not None:
+            return
+        dims = dimension_cache.get(self.db, event_ids=missing)
+        for event_id in missing:
+            if event_id in dims.events:
+                self.event_class_limits[event_id] = dims.events[event_id].max_per_class
+        
+        if self.max_per_student is None:
+            # 所有项目使用同一个人限报数，取第一个项目的设置
+            self.max_per_student = dims.events[min(dims.events)].max_per_student if dims.events else 3
+    
+    def load_counts(self, student_ids: Iterable[int], event_ids: Iterable[int]) -> None:
+        """
+        加载并锁定学生报名项目数和班级-项目报名人数（已加载的不再查询）
+        之后的计数由 add_registration 在内存中累计
+        """
+        student_ids = set(student_ids)
+        new_students = [sid for sid in student_ids if sid not in self.student_counts]
+        if new_students:
+            counts = self._load_student_quotas(new_students)
+            for student_id in new_students:
+                self.student_counts[student_id] = counts.get(student_id, 0)
+            self._saved_student_counts.update((sid, self.student_counts[sid]) for sid in new_students)
+        
+        class_ids = {self.student_classes[sid] for sid in student_ids}
+        pairs = {
+            (class_id, event_id)
+            for class_id in class_ids for event_id in event_ids
+            if (class_id, event_id) not in self.class_counts
+        }
+        if pairs:
+            counts = self._load_class_quotas(pairs)
+            for pair in pairs:
+                self.class_counts[pair] = counts.get(pair, 0)
+            self._saved_class_counts.update((pair, self.class_counts[pair]) for pair in pairs)
+    
+    def check_limits(self, student_id: int, event_id: int) -> str:
+        """校验班级限报人数和个人限报项目数，返回错误信息（通过时为空）"""
+        class_limit = self.event_class_limits[event_id]
+        if self.class_counts[(self.student_classes[student_id], event_id)] >= class_limit:
+            return f"该班级报名人数已达上限({class_limit}人)"
+        if self.student_counts[student_id] >= self.max_per_student:
+            return f"该学生报名项目数已达上限({self.max_per_student}项)"
+        return ""
+    
+    def add_registration(self, student_id: int, event_id: int) -> None:
+        """累计一条新报名"""
+        self.class_counts[(self.student_classes[student_id], event_id)] += 1
+        self.student_counts[student_id] += 1
+    
+    def save_counts(self) -> None:
+        """将内存中有变化的计数回写到计数表（不提交）"""
+        if self.dry_run:
+            return
+        
+        class_changes = [
+            {"b_class_id": class_id, "b_event_id": event_id, "b_count": count}
+            for (class_id, event_id), count in self.class_counts.items()
+            if count != self._saved_class_counts.get((class_id, event_id))
+        ]
+        if class_changes:
+            self.db.connection().execute(
+                update(ClassEventQuota).where(
+                    ClassEventQuota.class_id == bindparam("b_class_id"),
+                    ClassEventQuota.event_id == bindparam("b_event_id")
+                ).values(count=bindparam("b_count")),
+                class_changes
+            )
+            self._saved_class_counts.update(self.class_counts)
+        
+        student_changes = [
+            {"b_student_id": student_id, "b_count": count}
+            for student_id, count in self.student_counts.items()
+            if count != self._saved_student_counts.get(student_id)
+        ]
+        if student_changes:
+            self.db.connection().execute(
+                update(StudentQuota).where(
+                    StudentQuota.student_id == bindparam("b_student_id")
+                ).values(count=bindparam("b_count")),
+                student_changes
+            )
+            self._saved_student_counts.update(self.student_counts)
+    
+    def forget_counts(self, student_ids: Iterable[int], event_ids: Iterable[int]) -> None:
+        """
+        删除计数行并清除内存中的计数，下次使用时按报名记录重新生成
+        用于批量写入时有行被数据库忽略（并发写入了相同报名）、内存计数不再准确的情况
+        """
+        student_ids = set(student_ids)
+        class_ids = {self.student_classes[sid] for sid in student_ids}
+        event_ids = set(event_ids)
+        reset_quota_counters(self.db, class_ids=class_ids, event_ids=event_ids)
+        reset_quota_counters(self.db, student_ids=student_ids)
+        for pair in [pair for pair in self.class_counts if pair[0] in class_ids and pair[1] in event_ids]:
+            del self.class_counts[pair]
+            self._saved_class_counts.pop(pair, None)
+        for student_id in student_ids:
+            self.student_counts.pop(student_id, None)
+            self._saved_student_counts.pop(student_id, None)
+    
+    def reserve(self, student_id: int, class_id: int, event_id: int) -> str:
+        """
+        单条报名占用名额（不提交），返回错误信息（通过时为空）
+        班级和学生计数各用一条条件UPDATE原子地累加，名额已满时UPDATE不命中任何行；
+        并发报名在计数行的行锁上排队，提交后才能看到彼此的计数。
+        失败时可能已占用了班级名额，调用方需回滚事务
+        """
+        self.load_events([event_id])
+        class_limit = self.event_class_limits[event_id]
+        class_quota = update(ClassEventQuota).where(
+            ClassEventQuota.class_id == class_id,
+            ClassEventQuota.event_id == event_id,
+            ClassEventQuota.count < class_limit
+        ).values(count=ClassEventQuota.count + 1)
+        if not self._increment(class_quota, lambda: self._seed_class_quotas({(class_id, event_id)})):
+            return f"该班级报名人数已达上限({class_limit}人)"
+        
+        student_quota = update(StudentQuota).where(
+            StudentQuota.student_id == student_id,
+            StudentQuota.count < self.max_per_student
+        ).values(count=StudentQuota.count + 1)
+        if not self._increment(student_quota, lambda: self._seed_student_quotas([student_id])):
+            return f"该学生报名项目数已达上限({self.max_per_student}项)"
+        return ""
+    
+    def release(self, student_id: int, class_id: int, event_id: int) -> None:
+        """取消报名时释放名额（不提交）"""
+        self.db.execute(
+            update(ClassEventQuota).where(
+                ClassEventQuota.class_id == class_id,
+                ClassEventQuota.event_id == event_id,
+                ClassEventQuota.count > 0
+            ).values(count=ClassEventQuota.count - 1)
+        )
+        self.db.execute(
+            update(StudentQuota).where(
+                StudentQuota.student_id == student_id,
+                StudentQuota.count > 0
+            ).values(count=StudentQuota.count - 1)
+        )
+    
+    def _increment(self, statement, seed: Callable[[], int]) -> bool:
+        """执行条件累加，计数行不存在时先生成再重试，返回是否占用成功"""
+        if self.db.connection().execute(statement).rowcount:
+            return True
+        # 未命中：计数行已满或不存在；新生成了计数行时重试一次
+        if seed():
+            return bool(self.db.connection().execute(statement).rowcount)
+        return False
+    
+    def _load_student_quotas(self, student_ids: List[int]) -> Dict[int, int]:
+        """读取并锁定学生计数行，缺失的按报名记录生成"""
+        if self.dry_run:
+            return self._count_student_registrations(student_ids)
+        
+        counts = self._lock_student_quotas(student_ids)
+        missing = [sid for sid in student_ids if sid not in counts]
+        if missing:
+            self._seed_student_quotas(missing)
+            counts.update(self._lock_student_quotas(missing))
+        return counts
+    
+    def _load_class_quotas(self, pairs: set) -> Dict[Tuple[int, int], int]:
+        """读取并锁定班级-项目计数行，缺失的按报名记录生成"""
+        if self.dry_run:
+            return self._count_class_registrations(pairs)
+        
+        counts = self._lock_class_quotas(pairs)
+        missing = {pair for pair in pairs if pair not in counts}
+        if missing:
+            self._seed_class_quotas(missing)
+            counts.update(self._lock_class_quotas(missing))
+        return counts
+    
+    def _lock_student_quotas(self, student_ids: List[int]) -> Dict[int, int]:
+        rows = self.db.query(StudentQuota.student_id, StudentQuota.count).filter(
+            StudentQuota.student_id.in_(student_ids)
+        ).with_for_update()
+        return {student_id: count for student_id, count in rows}
+    
+    def _lock_class_quotas(self, pairs: set) -> Dict[Tuple[int, int], int]:
+        rows = self.db.query(
+            ClassEventQuota.class_id, ClassEventQuota.event_id, ClassEventQuota.count
+        ).filter(
+            ClassEventQuota.class_id.in_({class_id for class_id, _ in pairs}),
+            ClassEventQuota.event_id.in_({event_id for _, event_id in pairs})
+        ).with_for_update()
+        return {(class_id, event_id): count for class_id, event_id, count in rows if (class_id, event_id) in pairs}
+    
+    def _seed_student_quotas(self, student_ids: List[int]) -> int:
+        """按报名记录生成学生计数行（已存在的忽略），返回新生成的行数"""
+        counts = self._count_student_registrations(student_ids)
+        return self.db.connection().execute(insert_ignore(self.db, StudentQuota), [
+            {"student_id": student_id, "count": counts.get(student_id, 0)}
+            for student_id in student_ids
+        ]).rowcount
+    
+    def _seed_class_quotas(self, pairs: set) -> int:
+        """按报名记录生成班级-项目计数行（已存在的忽略），返回新生成的行数"""
+        counts = self._count_class_registrations(pairs)
+        return self.db.connection().execute(insert_ignore(self.db, ClassEventQuota), [
+            {"class_id": class_id, "event_id": event_id, "count": counts.get((class_id, event_id), 0)}
+            for class_id, event_id in pairs
+        ]).rowcount
+    
+    def _count_student_registrations(self, student_ids: List[int]) -> Dict[int, int]:
+        """分组统计学生报名项目数"""
+        rows = self.db.query(Registration.student_id, func.count(Registration.id)).filter(
+            Registration.student_id.in_(student_ids)
+        ).group_by(Registration.student_id)
+        return {student_id: count for student_id, count in rows}
+    
+    def _count_class_registrations(self, pairs: set) -> Dict[Tuple[int, int], int]:
+        """分组统计班级-项目报名人数"""
+        rows = self.db.query(
+            Student.class_id, Registration.event_id, func.count(Registration.id)
+        ).join(
+            Student, Registration.student_id == Student.id
+        ).filter(
+            Student.class_id.in_({class_id for class_id, _ in pairs}),
+            Registration.event_id.in_({event_id for _, event_id in pairs})
+        ).group_by(Student.class_id, Registration.event_id)
+        return {(class_id, event_id): count for class_id, event_id, count in rows if (class_id, event_id) in pairs}
+
+
+def reset_quota_counters(
+    db: Session,
+    class_ids: Iterable[int] = None,
+    student_ids: Iterable[int] = None,
+    event_ids: Iterable[int] = None
+) -> None:
+    """
+    删除报名计数行（不提交），下次报名时按报名记录重新生成
+    报名记录被批量删除、学生调班或ID被重置后调用；不传任何条件时删除全部计数
+    """
+    if class_ids is None and student_ids is None and event_ids is None:
+        db.query(ClassEventQuota).delete(synchronize_session=False)
+        db.query(StudentQuota).delete(synchronize_session=False)
+        return
+    
+    if class_ids is not None or event_ids is not None:
+        query = db.query(ClassEventQuota)
+        if class_ids is not None:
+            query = query.filter(ClassEventQuota.class_id.in_(list(class_ids)))
+        if event_ids is not None:
+            query = query.filter(ClassEventQuota.event_id.in_(list(event_ids)))
+        query.delete(synchronize_session=False)
+    if student_ids is not None:
+        db.query(StudentQuota).filter(
+            StudentQuota.student_id.in_(list(student_ids))
+        ).delete(synchronize_session=False)
+
+
+class RegistrationImportCache(RegistrationLimits):
+    """
+    报名导入解析缓存
+    一次导入过程中按自然键缓存项目、组别、年级、班级和学生的ID，
+    项目、组别、年级、班级在创建时一次性预加载，学生按批次加载；
+    报名限制通过 RegistrationLimits 在内存中校验
+    
+    dry_run=True 时不写入任何数据，需要新建的年级、班级、学生使用负数占位ID
+    """
+    
+    def __init__(self, db: Session, dry_run: bool = False):
+        super().__init__(db, dry_run)
+        # 名称映射复制自维度缓存（同名记录以ID最小的为准），导入中新建的年级、班级只加入副本
+        dims = dimension_cache.get(db)
+        self.event_ids: Dict[str, int] = dict(dims.event_ids)
+        self.group_ids: Dict[Tuple[int, str], int] = dict(dims.group_ids)
+        self.grade_ids: Dict[str, int] = dict(dims.grade_ids)
+        self.class_ids: Dict[Tuple[int, str], int] = dict(dims.class_ids)
+        self.student_ids: Dict[str, int] = {}
+        self._placeholder_id = 0
+        self.load_events(dims.events)
+    
+    def _next_placeholder_id(self) -> int:
+        """试运行时为待新建的记录分配占位ID"""
+        self._placeholder_id -= 1
+        return self._placeholder_id
+    
+    def get_event_id(self, event_name: str) -> Optional[int]:
+        """根据项目名称获取项目ID"""
+        return self.event_ids.get(event_name)
+    
+    def get_group_id(self, event_id: int, group_name: Optional[str]) -> Optional[int]:
+        """根据项目ID和组别名称获取组别ID，组别不存在时返回None"""
+        if not group_name:
+            return None
+        return self.group_ids.get((event_id, group_name))
+    
+    def get_or_create_class_id(self, class_info: Optional[Dict]) -> Optional[int]:
+        """获取或创建班级（年级不存在时一并创建），返回班级ID"""
+        if not class_info:
+            return None
+        
+        grade_name = class_info.get('grade_name')
+        class_name = class_info.get('class_name')
+        
+        if not grade_name or not class_name:
+            return None
+        
+        # 查找或创建年级
+        grade_id = self.grade_ids.get(grade_name)
+        if grade_id is None:
+            if self.dry_run:
+                grade_id = self._next_placeholder_id()
+            else:
+                grade = Grade(name=grade_name, sort_order=0)
+                self.db.add(grade)
+                self.db.flush()
+                grade_id = grade.id
+            self.grade_ids[grade_name] = grade_id
+        
+        # 查找或创建班级
+        class_id = self.class_ids.get((grade_id, class_name))
+        if class_id is None:
+            if self.dry_run:
+                class_id = self._next_placeholder_id()
+            else:
+                class_obj = Class(name=class_name, grade_id=grade_id)
+                self.db.add(class_obj)
+                self.db.flush()
+                class_id = class_obj.id
+            self.class_ids[(grade_id, class_name)] = class_id
+        
+        return class_id
+    
+    def load_students(self, students: Dict[str, Tuple[str, str, int]]) -> None:
+        """
+        确保学号对应的学生存在
+        students: {学号: (姓名, 性别, 班级ID)}，已存在的学生保持原信息不变
+        """
+        missing = [no for no in students if no not in self.student_ids]
+        if not missing:
+            return
+        
+        self._fetch_students(missing)
+        new_students = [
+            {
+                'student_no': no,
+                'name': students[no][0],
+                'gender': students[no][1],
+                'class_id': students[no][2]
+            }
+            for no in missing if no not in self.student_ids
+        ]
+        if not new_students:
+            return
+        
+        if self.dry_run:
+            for student in new_students:
+                student_id = self._next_placeholder_id()
+                self.student_ids[student['student_no']] = student_id
+                self.student_classes[student_id] = student['class_id']
+            return
+        
+        # 并发导入同一学生时忽略学号冲突，随后统一回查ID
+        self.db.execute(insert_ignore(self.db, Student), new_students)
+        self._fetch_students([s['student_no'] for s in new_students])
+        # 批量新建的学生不逐条写入搜索索引，下次搜索时重新构建
+        student_index.invalidate()
+    
+    def _fetch_students(self, student_nos: Iterable[str]) -> None:
+        """批量查询学生ID和所属班级"""
+        rows = self.db.query(Student.student_no, Student.id, Student.class_id).filter(
+            Student.student_no.in_(list(student_nos))
+        )
+        for no, student_id, class_id in rows:
+            self.student_ids[no] = student_id
+            self.student_classes[student_id] = class_id
+
+
+def parse_registration_file(path: str, filename: str) -> Tuple[List[Dict], ImportResult]:
+    """
+    解析单个报名文件，不访问数据库，可在进程池中执行
+    返回: (数据行, 解析结果)；文件无法解析时不返回任何数据行
+    """
+    result = ImportResult()
+    try:
+        with open(path, 'rb') as f:
+            reader = open_table(f, filename)
+            try:
+                rows = list(RegistrationService(None)._iter_registration_rows(reader, filename, result))
+            finally:
+                reader.close()
+    except Exception as e:
+        result.add_file_error(f"文件解析错误: {str(e)}", file=filename)
+        return [], result
+    return rows, result
 
 
 class RegistrationService:
@@ -30,38 +478,6 @@ class RegistrationService:
         ).first()
         return existing is not None, existing
     
-    def check_class_limit(self, class_id: int, event_id: int) -> Tuple[bool, int, int]:
-        """
-        检查班级报名人数限制
-        返回: (是否超限, 当前人数, 限制人数)
-        """
-        event = self.db.query(Event).filter(Event.id == event_id).first()
-        if not event:
-            return True, 0, 0
-        
-        # 统计该班级在该项目的报名人数
-        current_count = self.db.query(Registration).join(Student).filter(
-            Student.class_id == class_id,
-            Registration.event_id == event_id
-        ).count()
-        
-        return current_count >= event.max_per_class, current_count, event.max_per_class
-    
-    def check_student_limit(self, student_id: int) -> Tuple[bool, int, int]:
-        """
-        检查学生报名项目数限制
-        返回: (是否超限, 当前项目数, 限制数)
-        """
-        # 获取任意一个项目的限制（假设所有项目限制相同）
-        event = self.db.query(Event).first()
-        max_per_student = event.max_per_student if event else 3
-        
-        current_count = self.db.query(Registration).filter(
-            Registration.student_id == student_id
-        ).count()
-        
-        return current_count >= max_per_student, current_count, max_per_student
-    
     def create_registration(
         self,
         student_id: int,
@@ -75,9 +491,11 @@ class RegistrationService:
         if not student:
             return None, "学生不存在"
         
-        # 检查项目是否存在
-        event = self.db.query(Event).filter(Event.id == event_id).first()
-        if not event:
+        # 检查项目是否存在（项目、组别、班级取自维度缓存）
+        dims = dimension_cache.get(
+            self.db, class_ids=[student.class_id], event_ids=[event_id], group_ids=[group_id] if group_id else []
+        )
+        if event_id not in dims.events:
             return None, "项目不存在"
         
         # 检查重复报名
@@ -85,19 +503,9 @@ class RegistrationService:
         if is_duplicate:
             return None, "该学生已报名此项目"
         
-        # 检查班级人数限制
-        is_over_class_limit, current, limit = self.check_class_limit(student.class_id, event_id)
-        if is_over_class_limit:
-            return None, f"该班级报名人数已达上限({limit}人)"
-        
-        # 检查个人项目数限制
-        is_over_student_limit, current, limit = self.check_student_limit(student_id)
-        if is_over_student_limit:
-            return None, f"该学生报名项目数已达上限({limit}项)"
-        
         # 检查组别
         if group_id:
-            group = self.db.query(EventGroup).filter(EventGroup.id == group_id).first()
+            group = dims.groups.get(group_id)
             if not group or group.event_id != event_id:
                 return None, "组别不存在或不属于该项目"
             
@@ -106,9 +514,15 @@ class RegistrationService:
                 return None, "该组别不允许该性别参加"
             
             # 检查年级限制
-            if group.grade_ids and student.class_.grade_id not in group.grade_ids:
+            if group.grade_ids and dims.classes[student.class_id].grade_id not in group.grade_ids:
                 return None, "该组别不允许该年级参加"
         
+        # 在计数行上原子地占用班级和个人名额（并发报名不会超出限制）
+        error = RegistrationLimits(self.db).reserve(student_id, student.class_id, event_id)
+        if error:
+            self.db.rollback()
+            return None, error
+        
         registration = Registration(
             student_id=student_id,
             event_id=event_id,
@@ -116,10 +530,133 @@ class RegistrationService:
             created_by=created_by
         )
         self.db.add(registration)
-        self.db.commit()
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # 并发提交了相同的报名，占用的名额随事务一起回滚
+            self.db.rollback()
+            return None, "该学生已报名此项目"
+        stats_cache.bump_event(event_id)
         self.db.refresh(registration)
         return registration, ""
     
+    def create_registrations(
+        self,
+        items: List[Tuple[int, int, Optional[int]]],
+        created_by: int = None
+    ) -> List[Tuple[Optional[int], str]]:
+        """
+        批量创建报名
+        items: (学生ID, 项目ID, 组别ID) 列表
+        返回: 与 items 一一对应的 (报名ID, 错误信息)，失败的条目报名ID为None
+        
+        校验规则与 create_registration 相同：学生用批量查询加载，项目、组别取自维度缓存，
+        已有报名用一次查询加载，报名计数行一次查询加载并锁定，所有规则在内存中依次校验，
+        批次内前面的报名会计入后面条目的重复和限报校验；通过的条目和计数在同一事务中批量写入
+        """
+        student_ids = {student_id for student_id, _, _ in items}
+        event_ids = {event_id for _, event_id, _ in items}
+        group_ids = {group_id for _, _, group_id in items if group_id}
+        
+        students = {
+            row.id: row for row in self.db.query(
+                Student.id, Student.class_id, Student.gender, Class.grade_id
+            ).join(Class, Student.class_id == Class.id).filter(Student.id.in_(student_ids))
+        }
+        dims = dimension_cache.get(self.db, group_ids=group_ids)
+        groups = {group_id: dims.groups[group_id] for group_id in group_ids if group_id in dims.groups}
+        
+        limits = RegistrationLimits(self.db)
+        limits.load_events(event_ids)
+        for student in students.values():
+            limits.student_classes[student.id] = student.class_id
+        known_students = set(students)
+        known_events = set(limits.event_class_limits)
+        limits.load_counts(known_students, known_events)
+        
+        seen = set(self.db.query(Registration.student_id, Registration.event_id).filter(
+            Registration.student_id.in_(known_students),
+            Registration.event_id.in_(known_events)
+        ).all()) if known_students and known_events else set()
+        
+        verdicts: List[Tuple[Optional[int], str]] = []
+        values = []
+        for student_id, event_id, group_id in items:
+            error = self._check_batch_item(
+                students.get(student_id), event_id, group_id, groups, limits, seen
+            )
+            verdicts.append((None, error))
+            if error:
+                continue
+            
+            seen.add((student_id, event_id))
+            limits.add_registration(student_id, event_id)
+            values.append({
+                'student_id': student_id,
+                'event_id': event_id,
+                'group_id': group_id,
+                'created_by': created_by
+            })
+        
+        if not values:
+            # 释放计数行上的锁
+            self.db.rollback()
+            return verdicts
+        
+        try:
+            self.db.execute(insert(Registration), values)
+            limits.save_counts()
+            self.db.commit()
+        except IntegrityError:
+            # 并发提交了相同的报名，整批回滚
+            self.db.rollback()
+            return [(None, error or "报名冲突，请重试") for _, error in verdicts]
+        for event_id in {v['event_id'] for v in values}:
+            stats_cache.bump_event(event_id)
+        
+        # 回查新报名的ID（学生+项目唯一）
+        registration_ids = {
+            (student_id, event_id): registration_id
+            for registration_id, student_id, event_id in self.db.query(
+                Registration.id, Registration.student_id, Registration.event_id
+            ).filter(
+                Registration.student_id.in_({v['student_id'] for v in values}),
+                Registration.event_id.in_({v['event_id'] for v in values})
+            )
+        }
+        return [
+            (None, error) if error else (registration_ids.get((student_id, event_id)), "")
+            for (student_id, event_id, _), (_, error) in zip(items, verdicts)
+        ]
+    
+    def _check_batch_item(
+        self,
+        student,
+        event_id: int,
+        group_id: Optional[int],
+        groups: Dict[int, Any],
+        limits: RegistrationLimits,
+        seen: set
+    ) -> str:
+        """按 create_registration 的顺序校验批量报名中的一条，返回错误信息（通过时为空）"""
+        if student is None:
+            return "学生不存在"
+        if event_id not in limits.event_class_limits:
+            return "项目不存在"
+        if (student.id, event_id) in seen:
+            return "该学生已报名此项目"
+        
+        if group_id:
+            group = groups.get(group_id)
+            if not group or group.event_id != event_id:
+                return "组别不存在或不属于该项目"
+            if group.gender != "A" and group.gender != student.gender:
+                return "该组别不允许该性别参加"
+            if group.grade_ids and student.grade_id not in group.grade_ids:
+                return "该组别不允许该年级参加"
+        
+        return limits.check_limits(student.id, event_id)
+    
     def delete_registration(self, registration_id: int) -> Tuple[bool, str]:
         """取消报名"""
         registration = self.db.query(Registration).filter(Registration.id == registration_id).first()
@@ -130,37 +667,34 @@ class RegistrationService:
         if registration.scores:
             return False, "该报名已有成绩记录，不能取消"
         
+        event_id = registration.event_id
+        RegistrationLimits(self.db).release(
+            registration.student_id, registration.student.class_id, event_id
+        )
         self.db.delete(registration)
         self.db.commit()
+        stats_cache.bump_event(event_id)
         return True, ""
     
-    def clear_all_registrations(self) -> int:
-        """清空所有报名记录和相关学生数据，并重置自增ID"""
-        from app.models.base import Grade
-        from sqlalchemy import text
-        
-        # 先删除所有报名记录
-        reg_count = self.db.query(Registration).delete()
-        
-        # 删除所有学生
-        self.db.query(Student).delete()
-        
-        # 删除所有班级
-        self.db.query(Class).delete()
-        
-        # 删除所有年级
-        self.db.query(Grade).delete()
-        
-        self.db.commit()
+    def clear_all_registrations(self) -> Tuple[int, str]:
+        """
+        清空所有报名记录和相关学生数据，并重置自增ID
+        直接清空整表，不逐行删除；已有成绩时拒绝清空，需先归档本届（SeasonService.archive_season）
+        返回: (清空的报名数, 错误信息)
+        """
+        from app.models.score import Score
+        from app.services.season_service import SEASON_TABLES
         
-        # 重置自增ID（MySQL语法）
-        self.db.execute(text("ALTER TABLE registrations AUTO_INCREMENT = 1"))
-        self.db.execute(text("ALTER TABLE students AUTO_INCREMENT = 1"))
-        self.db.execute(text("ALTER TABLE classes AUTO_INCREMENT = 1"))
-        self.db.execute(text("ALTER TABLE grades AUTO_INCREMENT = 1"))
-        self.db.commit()
+        if self.db.query(Score.id).first():
+            return 0, "存在成绩记录，请先归档本届数据"
         
-        return reg_count
+        reg_count = self.db.query(func.count(Registration.id)).scalar()
+        # ID将被重置，报名计数一并清空
+        truncate_tables(self.db, SEASON_TABLES)
+        student_index.invalidate()
+        dimension_cache.invalidate()
+        stats_cache.bump_all()
+        return reg_count, ""
     
     def get_registration_list(
         self,
@@ -172,9 +706,14 @@ class RegistrationService:
         class_id: int = None,
         grade_id: int = None,
         student_id: int = None,
-        student_name: str = None
-    ) -> Tuple[List[Registration], int]:
-        """获取报名列表"""
+        student_name: str = None,
+        after: int = None,
+        total: str = TOTAL_EXACT
+    ) -> Tuple[List[Registration], Optional[int]]:
+        """
+        获取报名列表（按ID排序）
+        after: 游标，返回ID大于该值的记录；total: 总数计算方式（exact/estimate/none）
+        """
         query = self.db.query(Registration).join(Student).join(Class)
         
         if event_id:
@@ -194,10 +733,9 @@ class RegistrationService:
         if student_name:
             query = query.filter(Student.name.like(f"%{student_name}%"))
         
-        total = query.count()
-        registrations = query.offset((page - 1) * page_size).limit(page_size).all()
-        
-        return registrations, total
+        return paginate(
+            query, Registration.id, page, page_size, after, total, options=REGISTRATION_LIST_LOADERS
+        )
     
     def update_lane_no(self, registration_id: int, lane_no: int) -> Tuple[bool, str]:
         """更新道次/序号"""
@@ -209,12 +747,22 @@ class RegistrationService:
         self.db.commit()
         return True, ""
     
-    def import_registrations(self, file_content: bytes, created_by: int = None, filename: str = None) -> Tuple[int, int, List[str]]:
+    def import_registrations(
+        self,
+        source: UploadSource,
+        created_by: int = None,
+        filename: str = None,
+        result: ImportResult = None,
+        dry_run: bool = False
+    ) -> ImportResult:
         """
-        批量导入报名 - 智能识别多种Excel格式
+        批量导入报名 - 智能识别多种Excel格式，同时支持CSV/TSV（UTF-8/GBK编码）
         
-        导入时会自动创建学生信息（如果不存在），不需要预先导入学生数据
-        报名时间使用当前导入时间
+        导入时会自动创建学生信息（如果不存在），不需要预先导入学生数据；
+        CSV/TSV文件按文件名（如"一年级-1班.csv"）解析班级信息
+        报名时间使用当前导入时间；工作簿以只读模式流式读取，按 IMPORT_CHUNK_SIZE 分批解析写入，
+        项目、组别、年级、班级、学生通过导入缓存解析，在内存中校验班级和个人限报数，
+        报名记录批量写入并忽略重复报名，整个文件在同一事务中提交
         
         支持的格式：
         1. 班级报名表格式（导出的格式）:
@@ -222,181 +770,331 @@ class RegistrationService:
            - 表头行: 序号, 学号, 姓名, 性别, 项目名称, 组别名称
            - 数据行: 1, 0003, 张三, 男, 50米, 男子组
         
-        返回: (成功数, 失败数, 错误列表)
+        result: 可选，传入时导入进度实时写入该对象（多个文件可共用同一个结果）；
+        已报名的记录计入 result.skipped
+        dry_run: 试运行，只校验并统计导入结果，不写入任何数据
         """
-        from app.models.base import Grade
-        from datetime import datetime
-        
-        success_count = 0
-        fail_count = 0
-        errors = []
-        file_prefix = f"[{filename}] " if filename else ""
+        result = result or ImportResult()
+        result.dry_run = dry_run
+        imported = 0
+        skipped = 0
         
         # 记录导入时间
         import_time = datetime.now()
         
         try:
-            wb = load_workbook(BytesIO(file_content))
+            reader = open_table(source, filename)
+            try:
+                cache = RegistrationImportCache(self.db, dry_run=dry_run)
+                rows = self._iter_registration_rows(reader, filename, result)
+                for chunk in chunked(rows, settings.IMPORT_CHUNK_SIZE):
+                    chunk_imported, chunk_skipped = self._apply_registration_chunk(
+                        chunk, cache, created_by, import_time, filename, result
+                    )
+                    imported += chunk_imported
+                    skipped += chunk_skipped
+            finally:
+                reader.close()
+            
+            if dry_run:
+                self.db.rollback()
+            else:
+                self.db.commit()
+                # 导入可能新建了年级、班级
+                dimension_cache.invalidate()
+                stats_cache.bump_all()
+            result.success += imported
+            result.skipped += skipped
             
-            # 遍历所有工作表
-            for ws in wb.worksheets:
-                sheet_name = ws.title
-                current_event_name = None
-                current_group_name = None
-                column_mapping = None
+        except Exception as e:
+            self.db.rollback()
+            result.add_file_error(f"文件解析错误: {str(e)}", file=filename)
+        
+        return result
+    
+    def import_registration_files(
+        self,
+        files: List[Tuple[str, UploadSource]],
+        created_by: int = None,
+        result: ImportResult = None,
+        dry_run: bool = False
+    ) -> ImportResult:
+        """
+        多文件批量导入报名
+        
+        files: (文件名, 文件内容) 列表，ZIP压缩包（如导出的班级报名表）会先解压为多个文件；
+        各文件在进程池中并行解析（IMPORT_PARSE_WORKERS），解析结果合并后在同一事务中写入，
+        result.files 记录每个文件的导入结果；dry_run 为试运行，不写入任何数据
+        """
+        result = result or ImportResult()
+        result.dry_run = dry_run
+        import_time = datetime.now()
+        
+        with tempfile.TemporaryDirectory(prefix="registration-import-") as tmp_dir:
+            paths = []
+            for filename, source in files:
+                try:
+                    if is_archive_file(filename):
+                        members = extract_import_files(source, tmp_dir)
+                        if not members:
+                            result.add_file_error("压缩包中没有可导入的文件", file=filename)
+                        paths.extend(members)
+                    else:
+                        paths.append((filename, save_to_temp(source, tmp_dir, filename)))
+                except Exception as e:
+                    result.add_file_error(f"文件解析错误: {str(e)}", file=filename)
+            
+            parsed = self._parse_registration_files(paths)
+        
+        try:
+            cache = RegistrationImportCache(self.db, dry_run=dry_run)
+            summaries = []
+            
+            for (filename, _), (rows, file_result) in zip(paths, parsed):
+                for chunk in chunked(rows, settings.IMPORT_CHUNK_SIZE):
+                    chunk_imported, chunk_skipped = self._apply_registration_chunk(
+                        chunk, cache, created_by, import_time, filename, file_result
+                    )
+                    file_result.success += chunk_imported
+                    file_result.skipped += chunk_skipped
+                summaries.append(file_result)
+            
+            if dry_run:
+                self.db.rollback()
+            else:
+                self.db.commit()
+                # 导入可能新建了年级、班级
+                dimension_cache.invalidate()
+                stats_cache.bump_all()
+            
+        except Exception as e:
+            self.db.rollback()
+            result.add_file_error(f"文件导入错误: {str(e)}")
+            return result
+        
+        for (filename, _), file_result in zip(paths, summaries):
+            file_result.files = [{
+                "filename": filename,
+                "success": file_result.success,
+                "failed": file_result.failed,
+                "skipped": file_result.skipped
+            }]
+            result.merge(file_result)
+        
+        return result
+    
+    def _parse_registration_files(self, paths: List[Tuple[str, str]]) -> List[Tuple[List[Dict], ImportResult]]:
+        """解析多个报名文件，文件数大于1时使用进程池并行解析"""
+        workers = min(settings.IMPORT_PARSE_WORKERS, len(paths))
+        if workers <= 1:
+            return [parse_registration_file(path, filename) for filename, path in paths]
+        
+        # 使用spawn方式创建子进程，避免在多线程的服务进程中fork
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            return list(pool.map(
+                parse_registration_file,
+                [path for _, path in paths],
+                [filename for filename, _ in paths]
+            ))
+    
+    def _iter_registration_rows(self, reader, filename: Optional[str], result: ImportResult) -> Iterator[Dict]:
+        """
+        逐行解析报名表（Excel各工作表或CSV/TSV文件），识别班级标题、组别标题和表头行，返回数据行
+        每个数据行包含: sheet_name, row_idx, student_no, student_name, gender, event_name, group_name, class_info
+        """
+        # 遍历所有工作表
+        for sheet in reader.sheets:
+            sheet_name = sheet.title
+            current_event_name = None
+            current_group_name = None
+            column_mapping = None
+            
+            # 从工作表名称解析班级信息（格式：年级名-班级名）
+            class_info = self._parse_class_from_sheet_name(sheet_name)
+            
+            for row_idx, row in sheet.iter_rows(min_row=1):
+                if not row or all(cell is None or str(cell).strip() == '' for cell in row):
+                    continue
                 
-                # 从工作表名称解析班级信息（格式：年级名-班级名）
-                class_info = self._parse_class_from_sheet_name(sheet_name)
+                first_cell = str(row[0]).strip() if row[0] is not None else ''
                 
-                for row_idx, row in enumerate(ws.iter_rows(min_row=1, values_only=True), start=1):
-                    if not row or all(cell is None or str(cell).strip() == '' for cell in row):
-                        continue
-                    
-                    first_cell = str(row[0]).strip() if row[0] is not None else ''
-                    
-                    # 跳过班级标题行，但尝试从中解析班级信息
-                    if '运动会报名表' in first_cell or '报名表' in first_cell:
-                        parsed = self._parse_class_from_title(first_cell)
-                        if parsed:
-                            class_info = parsed
-                        continue
-                    
-                    # 检查是否是组别标题行
-                    if first_cell.startswith('【') and ' - ' in first_cell:
-                        try:
-                            title_part = first_cell.split('】')[0].replace('【', '')
-                            parts = title_part.split(' - ')
-                            current_event_name = parts[0].strip()
-                            current_group_name = parts[1].strip() if len(parts) > 1 else None
-                            if current_group_name == '默认组':
-                                current_group_name = None
-                        except:
-                            pass
-                        # 不重置column_mapping，保持之前的映射
-                        continue
-                    
-                    # 检查是否是表头行
-                    row_values = [str(cell).strip() if cell else '' for cell in row]
-                    if self._is_header_row(row_values):
-                        column_mapping = self._detect_column_mapping(row_values)
-                        continue
-                    
-                    # 使用默认映射
-                    if column_mapping is None:
-                        column_mapping = {
-                            'student_no': 1,
-                            'student_name': 2,
-                            'gender': 3,
-                            'event_name': 4,
-                            'group_name': 5
-                        }
-                    
+                # 跳过班级标题行，但尝试从中解析班级信息
+                if '运动会报名表' in first_cell or '报名表' in first_cell:
+                    parsed = self._parse_class_from_title(first_cell)
+                    if parsed:
+                        class_info = parsed
+                    continue
+                
+                # 检查是否是组别标题行
+                if first_cell.startswith('【') and ' - ' in first_cell:
                     try:
-                        # 解析数据行
-                        student_no = self._get_cell_value(row, column_mapping.get('student_no'))
-                        student_name = self._get_cell_value(row, column_mapping.get('student_name'))
-                        gender_str = self._get_cell_value(row, column_mapping.get('gender'))
-                        event_name = self._get_cell_value(row, column_mapping.get('event_name'))
-                        group_name = self._get_cell_value(row, column_mapping.get('group_name'))
-                        
-                        # 使用当前组别标题中的信息作为默认值
-                        if not event_name:
-                            event_name = current_event_name
-                        if not group_name:
-                            group_name = current_group_name
-                        
-                        # 跳过无效数据（必须有学号和项目名称）
-                        if not student_no or not event_name:
-                            continue
-                        
-                        # 跳过空姓名的行（可能是预留的空行）
-                        if not student_name:
-                            continue
-                        
-                        # 处理组别名称
-                        if group_name in ['默认组', '-', '']:
-                            group_name = None
-                        
-                        # 转换性别
-                        gender = 'M'
-                        if gender_str in ['女', 'F', 'f', 'female']:
-                            gender = 'F'
-                        
-                        # 查找项目（先查项目，避免创建无用的学生数据）
-                        event = self.db.query(Event).filter(Event.name == event_name).first()
-                        if not event:
-                            errors.append(f"{file_prefix}[{sheet_name}] 第{row_idx}行: 项目'{event_name}'不存在")
-                            fail_count += 1
-                            continue
-                        
-                        # 查找或创建班级
-                        class_obj = self._get_or_create_class(class_info)
-                        if not class_obj:
-                            errors.append(f"{file_prefix}[{sheet_name}] 第{row_idx}行: 无法确定班级信息")
-                            fail_count += 1
-                            continue
-                        
-                        # 查找或创建学生
-                        student = self._get_or_create_student(
-                            student_no=student_no,
-                            student_name=student_name,
-                            gender=gender,
-                            class_id=class_obj.id
-                        )
-                        
-                        # 查找组别
-                        group_id = None
-                        if group_name:
-                            group = self.db.query(EventGroup).filter(
-                                EventGroup.event_id == event.id,
-                                EventGroup.name == group_name
-                            ).first()
-                            if group:
-                                group_id = group.id
-                        
-                        # 检查是否重复报名（在数据库层面检查）
-                        existing = self.db.query(Registration).filter(
-                            Registration.student_id == student.id,
-                            Registration.event_id == event.id
-                        ).first()
-                        
-                        if existing:
-                            # 重复报名，跳过
-                            continue
-                        
-                        # 创建报名 - 使用 savepoint 来隔离每条记录的事务
-                        try:
-                            # 创建 savepoint
-                            savepoint = self.db.begin_nested()
-                            
-                            registration = Registration(
-                                student_id=student.id,
-                                event_id=event.id,
-                                group_id=group_id,
-                                created_by=created_by,
-                                created_at=import_time,
-                                updated_at=import_time
-                            )
-                            self.db.add(registration)
-                            self.db.flush()
-                            success_count += 1
-                        except Exception as reg_error:
-                            # 回滚到 savepoint，不影响其他记录
-                            self.db.rollback()
-                            errors.append(f"{file_prefix}[{sheet_name}] 第{row_idx}行: {str(reg_error)}")
-                            fail_count += 1
-                            
-                    except Exception as e:
-                        errors.append(f"{file_prefix}[{sheet_name}] 第{row_idx}行: {str(e)}")
-                        fail_count += 1
+                        title_part = first_cell.split('】')[0].replace('【', '')
+                        parts = title_part.split(' - ')
+                        current_event_name = parts[0].strip()
+                        current_group_name = parts[1].strip() if len(parts) > 1 else None
+                        if current_group_name == '默认组':
+                            current_group_name = None
+                    except:
+                        pass
+                    # 不重置column_mapping，保持之前的映射
+                    continue
+                
+                # 检查是否是表头行
+                row_values = [str(cell).strip() if cell else '' for cell in row]
+                if is_header_row(row_values):
+                    column_mapping = detect_column_mapping(row_values)
+                    continue
+                
+                # 使用默认映射
+                if column_mapping is None:
+                    column_mapping = {
+                        'student_no': 1,
+                        'student_name': 2,
+                        'gender': 3,
+                        'event_name': 4,
+                        'group_name': 5
+                    }
+                
+                result.processed += 1
+                try:
+                    # 解析数据行
+                    student_no = self._get_cell_value(row, column_mapping.get('student_no'))
+                    student_name = self._get_cell_value(row, column_mapping.get('student_name'))
+                    gender_str = self._get_cell_value(row, column_mapping.get('gender'))
+                    event_name = self._get_cell_value(row, column_mapping.get('event_name'))
+                    group_name = self._get_cell_value(row, column_mapping.get('group_name'))
+                except Exception as e:
+                    result.add_error(str(e), row_idx, sheet=sheet_name, file=filename)
+                    continue
+                
+                # 使用当前组别标题中的信息作为默认值
+                if not event_name:
+                    event_name = current_event_name
+                if not group_name:
+                    group_name = current_group_name
+                
+                # 跳过无效数据（必须有学号和项目名称）
+                if not student_no or not event_name:
+                    continue
+                
+                # 跳过空姓名的行（可能是预留的空行）
+                if not student_name:
+                    continue
+                
+                # 处理组别名称
+                if group_name in ['默认组', '-', '']:
+                    group_name = None
+                
+                # 转换性别
+                gender = 'M'
+                if gender_str in ['女', 'F', 'f', 'female']:
+                    gender = 'F'
+                
+                yield {
+                    'sheet_name': sheet_name,
+                    'row_idx': row_idx,
+                    'student_no': student_no,
+                    'student_name': student_name,
+                    'gender': gender,
+                    'event_name': event_name,
+                    'group_name': group_name,
+                    'class_info': class_info
+                }
+    
+    def _apply_registration_chunk(
+        self,
+        chunk: List[Dict],
+        cache: "RegistrationImportCache",
+        created_by: Optional[int],
+        import_time,
+        filename: Optional[str],
+        result: ImportResult
+    ) -> Tuple[int, int]:
+        """
+        写入一批报名数据（不提交），超出班级或个人限报数的行记为失败
+        返回: (写入条数, 因已报名跳过的条数)；试运行时写入条数为将会写入的条数
+        """
+        # 解析项目和班级（先查项目，避免创建无用的学生数据）
+        pending = []
+        for item in chunk:
+            event_id = cache.get_event_id(item['event_name'])
+            if event_id is None:
+                result.add_error(
+                    f"项目'{item['event_name']}'不存在", item['row_idx'], "项目名称", ERROR_NOT_FOUND,
+                    sheet=item['sheet_name'], file=filename
+                )
+                continue
             
-            self.db.commit()
+            class_id = cache.get_or_create_class_id(item['class_info'])
+            if class_id is None:
+                result.add_error(
+                    "无法确定班级信息", item['row_idx'], code=ERROR_NOT_FOUND,
+                    sheet=item['sheet_name'], file=filename
+                )
+                continue
             
-        except Exception as e:
-            self.db.rollback()
-            errors.append(f"{file_prefix}文件解析错误: {str(e)}")
+            pending.append((item, event_id, class_id))
+        
+        if not pending:
+            return 0, 0
+        
+        # 批量查找或创建学生（同一学号出现多次时以第一行的信息创建）
+        cache.load_students({
+            item['student_no']: (item['student_name'], item['gender'], class_id)
+            for item, _, class_id in reversed(pending)
+        })
+        
+        # 先锁定本批涉及的报名计数，再一次查询本批学生已有的报名，文件内重复的报名同样跳过
+        student_ids = {cache.student_ids[item['student_no']] for item, _, _ in pending}
+        event_ids = {event_id for _, event_id, _ in pending}
+        cache.load_counts(student_ids, event_ids)
+        seen = set(self.db.query(Registration.student_id, Registration.event_id).filter(
+            Registration.student_id.in_(student_ids),
+            Registration.event_id.in_(event_ids)
+        ).all())
+        
+        values = []
+        skipped = 0
+        for item, event_id, _ in pending:
+            student_id = cache.student_ids[item['student_no']]
+            if (student_id, event_id) in seen:
+                skipped += 1
+                continue
+            
+            error = cache.check_limits(student_id, event_id)
+            if error:
+                result.add_error(
+                    error, item['row_idx'], code=ERROR_LIMIT, sheet=item['sheet_name'], file=filename
+                )
+                continue
+            
+            seen.add((student_id, event_id))
+            cache.add_registration(student_id, event_id)
+            values.append({
+                'student_id': student_id,
+                'event_id': event_id,
+                'group_id': cache.get_group_id(event_id, item['group_name']),
+                'created_by': created_by,
+                'created_at': import_time,
+                'updated_at': import_time
+            })
         
-        return success_count, fail_count, errors
+        if not values or cache.dry_run:
+            return len(values), skipped
+        
+        # 批量写入，并发导入时 uq_student_event 冲突的行由数据库忽略
+        inserted = self.db.connection().execute(insert_ignore(self.db, Registration), values).rowcount
+        if inserted is None or inserted < 0:
+            inserted = len(values)
+        if inserted == len(values):
+            cache.save_counts()
+        else:
+            # 有行被忽略时无法确定是哪些行，本批计数改为按报名记录重新生成
+            cache.forget_counts(student_ids, event_ids)
+        return inserted, skipped + len(values) - inserted
     
     def _parse_class_from_sheet_name(self, sheet_name: str) -> Dict:
         """从工作表名称解析班级信息（格式：年级名-班级名）"""
@@ -420,94 +1118,6 @@ class RegistrationService:
             }
         return None
     
-    def _get_or_create_class(self, class_info: Dict) -> Class:
-        """获取或创建班级"""
-        from app.models.base import Grade
-        
-        if not class_info:
-            return None
-        
-        grade_name = class_info.get('grade_name')
-        class_name = class_info.get('class_name')
-        
-        if not grade_name or not class_name:
-            return None
-        
-        # 查找或创建年级
-        grade = self.db.query(Grade).filter(Grade.name == grade_name).first()
-        if not grade:
-            grade = Grade(name=grade_name, sort_order=0)
-            self.db.add(grade)
-            self.db.flush()
-        
-        # 查找或创建班级
-        class_obj = self.db.query(Class).filter(
-            Class.grade_id == grade.id,
-            Class.name == class_name
-        ).first()
-        if not class_obj:
-            class_obj = Class(name=class_name, grade_id=grade.id)
-            self.db.add(class_obj)
-            self.db.flush()
-        
-        return class_obj
-    
-    def _get_or_create_student(self, student_no: str, student_name: str, gender: str, class_id: int) -> Student:
-        """获取或创建学生"""
-        student = self.db.query(Student).filter(Student.student_no == student_no).first()
-        if not student:
-            student = Student(
-                student_no=student_no,
-                name=student_name,
-                gender=gender,
-                class_id=class_id
-            )
-            self.db.add(student)
-            self.db.flush()
-        return student
-    
-    def _detect_column_mapping(self, header_row: List[str]) -> Dict[str, int]:
-        """
-        根据表头行检测列映射
-        """
-        mapping = {}
-        
-        for idx, cell in enumerate(header_row):
-            cell_lower = cell.lower() if cell else ''
-            
-            # 学号列
-            if '学号' in cell or cell_lower == 'student_no':
-                mapping['student_no'] = idx
-            # 姓名列
-            elif '姓名' in cell or cell_lower == 'name':
-                mapping['student_name'] = idx
-            # 性别列
-            elif '性别' in cell or cell_lower == 'gender':
-                mapping['gender'] = idx
-            # 项目名称列
-            elif '项目' in cell or cell_lower in ['event', 'event_name']:
-                mapping['event_name'] = idx
-            # 组别名称列
-            elif '组别' in cell or cell_lower in ['group', 'group_name']:
-                mapping['group_name'] = idx
-        
-        # 如果没有找到学号列，尝试其他方式
-        if 'student_no' not in mapping:
-            for idx, cell in enumerate(header_row):
-                if cell in ['编号', 'ID', '学生编号']:
-                    mapping['student_no'] = idx
-                    break
-        
-        return mapping
-    
-    def _is_header_row(self, row_values: List[str]) -> bool:
-        """
-        判断是否是表头行
-        """
-        header_keywords = ['学号', '项目', '组别', '姓名', '性别', '序号', 'ID', '编号']
-        match_count = sum(1 for cell in row_values if any(kw in cell for kw in header_keywords))
-        return match_count >= 2
-    
     def _get_cell_value(self, row: tuple, col_idx: int) -> str:
         """
         安全获取单元格值
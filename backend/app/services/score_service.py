@@ -2,16 +2,40 @@
 成绩管理服务模块
 实现成绩录入、修改、作废、批量导入、查重
 """
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Tuple, Dict, Iterator, Set
 from decimal import Decimal
-from sqlalchemy.orm import Session
-from openpyxl import load_workbook
-from io import BytesIO
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session, contains_eager
 
+from app.core.config import settings
+from app.core.pagination import TOTAL_EXACT, paginate
+from app.core.dimension_cache import dimension_cache
+from app.core.stats_cache import stats_cache
+from app.core.error_report import ERROR_INVALID, ERROR_NOT_FOUND, ERROR_ROW
+from app.core.ingestion import (
+    UploadSource,
+    ImportResult,
+    open_table,
+    chunked,
+    resolve_columns,
+    select_columns
+)
 from app.models.score import Score
 from app.models.registration import Registration
 from app.models.base import Student
-from app.models.event import Event
+from app.services.statistics_service import publish_live_changes, rank_scores, refresh_event_ranking
+
+# 成绩导入字段（默认列顺序）
+SCORE_IMPORT_FIELDS = ("student_no", "event_name", "value")
+
+# 解析后的成绩行：(行号, 学号, 项目名称, 成绩, 格式错误)，格式错误为 (错误信息, 列名, 错误代码)，无错误时为 None
+ScoreRow = Tuple[int, str, str, Optional[float], Optional[Tuple[str, Optional[str], str]]]
+
+# 成绩列表的加载策略：报名、学生取自列表查询已有的JOIN，班级、项目一并JOIN加载
+SCORE_LIST_LOADERS = (
+    contains_eager(Score.registration).contains_eager(Registration.student).joinedload(Student.class_),
+    contains_eager(Score.registration).joinedload(Registration.event),
+)
 
 
 class ScoreService:
@@ -68,8 +92,12 @@ class ScoreService:
             created_by=created_by
         )
         self.db.add(score)
+        refresh_event_ranking(self.db, registration.event_id, round)
+        event_id = registration.event_id
         self.db.commit()
+        stats_cache.bump_event(event_id)
         self.db.refresh(score)
+        publish_live_changes(self.db, [event_id], round)
         return score, ""
     
     def update_score(
@@ -94,9 +122,13 @@ class ScoreService:
         score.value = Decimal(str(value))
         score.update_reason = reason
         score.updated_by = updated_by
+        event_id = score.registration.event_id
+        refresh_event_ranking(self.db, event_id, score.round)
         
         self.db.commit()
+        stats_cache.bump_event(event_id)
         self.db.refresh(score)
+        publish_live_changes(self.db, [event_id], score.round)
         return score, ""
     
     def invalidate_score(
@@ -119,9 +151,13 @@ class ScoreService:
         score.is_valid = False
         score.invalid_reason = reason
         score.updated_by = updated_by
+        event_id = score.registration.event_id
+        refresh_event_ranking(self.db, event_id, score.round)
         
         self.db.commit()
+        stats_cache.bump_event(event_id)
         self.db.refresh(score)
+        publish_live_changes(self.db, [event_id], score.round)
         return score, ""
     
     def get_score_list(
@@ -133,9 +169,14 @@ class ScoreService:
         grade_id: int = None,
         student_id: int = None,
         round: str = None,
-        include_invalid: bool = False
-    ) -> Tuple[List[Score], int]:
-        """获取成绩列表"""
+        include_invalid: bool = False,
+        after: int = None,
+        total: str = TOTAL_EXACT
+    ) -> Tuple[List[Score], Optional[int]]:
+        """
+        获取成绩列表（按ID排序）
+        after: 游标，返回ID大于该值的记录；total: 总数计算方式（exact/estimate/none）
+        """
         query = self.db.query(Score).join(Registration).join(Student)
         
         if not include_invalid:
@@ -153,10 +194,7 @@ class ScoreService:
         if round:
             query = query.filter(Score.round == round)
         
-        total = query.count()
-        scores = query.offset((page - 1) * page_size).limit(page_size).all()
-        
-        return scores, total
+        return paginate(query, Score.id, page, page_size, after, total, options=SCORE_LIST_LOADERS)
     
     def get_score_by_id(self, score_id: int) -> Optional[Score]:
         """根据ID获取成绩"""
@@ -164,81 +202,188 @@ class ScoreService:
     
     def import_scores(
         self, 
-        file_content: bytes, 
+        source: UploadSource, 
         round: str = "final",
-        created_by: int = None
-    ) -> Tuple[int, int, List[str]]:
+        created_by: int = None,
+        result: ImportResult = None,
+        filename: str = None,
+        dry_run: bool = False
+    ) -> ImportResult:
         """
         批量导入成绩
-        Excel格式: 学号, 项目名称, 成绩
-        返回: (成功数, 失败数, 错误列表)
+        Excel/CSV格式: 学号, 项目名称, 成绩（按表头识别列，无法识别时按此顺序）
+        
+        按批次处理：一次联表查询解析报名记录，一次UPDATE作废被覆盖的成绩，
+        再批量插入新成绩，最后重新计算涉及项目的排名；整个文件在同一事务中提交
+        result: 可选，传入时导入进度实时写入该对象
+        filename: 原始文件名，用于识别CSV/TSV格式
+        dry_run: 试运行，只校验并统计导入结果，不写入任何数据
         """
-        success_count = 0
-        fail_count = 0
-        errors = []
+        result = result or ImportResult()
+        result.dry_run = dry_run
+        if round not in ("preliminary", "final"):
+            result.add_file_error("轮次必须是preliminary(预赛)或final(决赛)", file=filename)
+            return result
+        
+        imported = 0
+        event_names = set()
+        event_ids = []
         
         try:
-            wb = load_workbook(BytesIO(file_content))
-            ws = wb.active
+            reader = open_table(source, filename)
+            try:
+                for chunk in chunked(self._iter_score_rows(reader.active, result), settings.IMPORT_CHUNK_SIZE):
+                    imported += self._apply_score_chunk(chunk, round, created_by, result, dry_run)
+                    event_names.update(item[2] for item in chunk if item[4] is None)
+            finally:
+                reader.close()
             
-            for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-                if not row[0]:
-                    continue
-                
-                try:
-                    student_no = str(row[0]).strip()
-                    event_name = str(row[1]).strip()
-                    value = float(row[2])
-                    
-                    # 查找学生
-                    student = self.db.query(Student).filter(Student.student_no == student_no).first()
-                    if not student:
-                        errors.append(f"第{row_idx}行: 学号'{student_no}'不存在")
-                        fail_count += 1
-                        continue
-                    
-                    # 查找项目
-                    event = self.db.query(Event).filter(Event.name == event_name).first()
-                    if not event:
-                        errors.append(f"第{row_idx}行: 项目'{event_name}'不存在")
-                        fail_count += 1
-                        continue
-                    
-                    # 查找报名记录
-                    registration = self.db.query(Registration).filter(
-                        Registration.student_id == student.id,
-                        Registration.event_id == event.id
-                    ).first()
-                    if not registration:
-                        errors.append(f"第{row_idx}行: 该学生未报名此项目")
-                        fail_count += 1
-                        continue
-                    
-                    # 录入成绩
-                    score, error = self.create_score(
-                        registration_id=registration.id,
-                        value=value,
-                        round=round,
-                        created_by=created_by,
-                        overwrite=True
-                    )
-                    
-                    if error and "是否覆盖" not in error:
-                        errors.append(f"第{row_idx}行: {error}")
-                        fail_count += 1
-                    else:
-                        success_count += 1
-                        
-                except ValueError:
-                    errors.append(f"第{row_idx}行: 成绩格式错误")
-                    fail_count += 1
-                except Exception as e:
-                    errors.append(f"第{row_idx}行: {str(e)}")
-                    fail_count += 1
-            
-            self.db.commit()
+            if dry_run:
+                self.db.rollback()
+            else:
+                if imported:
+                    names = dimension_cache.get(self.db).event_ids
+                    event_ids = [names[name] for name in event_names if name in names]
+                    rank_scores(self.db, event_ids, round)
+                self.db.commit()
+                for event_id in event_ids:
+                    stats_cache.bump_event(event_id)
+                if event_ids:
+                    publish_live_changes(self.db, event_ids, round)
+            result.success += imported
             
         except Exception as e:
-            errors.append(f"文件解析错误: {str(e)}")
+            self.db.rollback()
+            result.add_file_error(f"文件解析错误: {str(e)}", file=filename)
+        
+        return result
+    
+    def _iter_score_rows(self, sheet, result: ImportResult) -> Iterator[ScoreRow]:
+        """逐行解析成绩表，格式错误随行返回，由 _apply_score_chunk 按行号顺序记入结果"""
+        rows = sheet.iter_rows(min_row=1)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = resolve_columns(header[1], SCORE_IMPORT_FIELDS)
+        
+        for row_idx, row in rows:
+            row = select_columns(row, columns)
+            if not row[0]:
+                continue
+            
+            result.processed += 1
+            student_no, event_name = str(row[0]).strip(), str(row[1]).strip()
+            value, error = None, None
+            try:
+                value = float(row[2])
+            except ValueError:
+                error = ("成绩格式错误", "成绩", ERROR_INVALID)
+            except Exception as e:
+                error = (str(e), None, ERROR_ROW)
+            yield row_idx, student_no, event_name, value, error
+    
+    def _resolve_registrations(
+        self,
+        student_nos: Set[str],
+        event_names: Set[str]
+    ) -> Dict[Tuple[str, str], int]:
+        """项目名称经维度缓存解析为项目ID，再一次联表查询将 (学号, 项目名称) 解析为报名ID"""
+        names = dimension_cache.get(self.db).event_ids
+        event_ids = {names[name]: name for name in event_names if name in names}
+        if not event_ids:
+            return {}
+        rows = self.db.query(
+            Student.student_no, Registration.event_id, Registration.id
+        ).join(
+            Registration, Registration.student_id == Student.id
+        ).filter(
+            Student.student_no.in_(student_nos),
+            Registration.event_id.in_(event_ids)
+        ).all()
+        
+        return {
+            (student_no, event_ids[event_id]): registration_id
+            for student_no, event_id, registration_id in rows
+        }
+    
+    def _apply_score_chunk(
+        self,
+        chunk: List[ScoreRow],
+        round: str,
+        created_by: Optional[int],
+        result: ImportResult,
+        dry_run: bool = False
+    ) -> int:
+        """
+        写入一批成绩（不提交），返回写入行数（试运行时只校验，返回将会写入的行数）
+        同一报名在文件中出现多次时以最后一行为准，之前的行作为被覆盖记录保留；
+        格式错误和查找失败按行号顺序记入结果
+        """
+        parsed = [item for item in chunk if item[4] is None]
+        resolved = self._resolve_registrations(
+            {item[1] for item in parsed},
+            {item[2] for item in parsed}
+        ) if parsed else {}
+        
+        # 仅对未解析的行查询学生和项目是否存在，用于给出准确的错误信息
+        missing = [item for item in parsed if (item[1], item[2]) not in resolved]
+        known_students = set()
+        known_events = set()
+        if missing:
+            known_students = {
+                no for (no,) in self.db.query(Student.student_no).filter(
+                    Student.student_no.in_({item[1] for item in missing})
+                )
+            }
+            known_events = dimension_cache.get(self.db).event_ids
+        
+        accepted = []
+        for row_idx, student_no, event_name, value, error in chunk:
+            if error is not None:
+                message, column, code = error
+                result.add_error(message, row_idx, column, code)
+                continue
+            
+            registration_id = resolved.get((student_no, event_name))
+            if registration_id is None:
+                if student_no not in known_students:
+                    result.add_error(f"学号'{student_no}'不存在", row_idx, "学号", ERROR_NOT_FOUND)
+                elif event_name not in known_events:
+                    result.add_error(f"项目'{event_name}'不存在", row_idx, "项目名称", ERROR_NOT_FOUND)
+                else:
+                    result.add_error("该学生未报名此项目", row_idx, code=ERROR_NOT_FOUND)
+                continue
+            
+            accepted.append((registration_id, value))
+        
+        if not accepted or dry_run:
+            return len(accepted)
+        
+        last_index = {registration_id: i for i, (registration_id, _) in enumerate(accepted)}
+        
+        # 作废被覆盖的有效成绩
+        self.db.execute(
+            update(Score).where(
+                Score.registration_id.in_(last_index.keys()),
+                Score.round == round,
+                Score.is_valid == True
+            ).values(
+                is_valid=False,
+                invalid_reason="被新成绩覆盖"
+            ).execution_options(synchronize_session=False)
+        )
+        
+        # 批量插入新成绩
+        self.db.execute(insert(Score), [
+            {
+                "registration_id": registration_id,
+                "value": Decimal(str(value)),
+                "round": round,
+                "created_by": created_by,
+                "is_valid": last_index[registration_id] == i,
+                "invalid_reason": None if last_index[registration_id] == i else "被新成绩覆盖"
+            }
+            for i, (registration_id, value) in enumerate(accepted)
+        ])
         
-        return success_count, fail_count, errors
+        return len(accepted)
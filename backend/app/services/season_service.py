@@ -0,0 +1,74 @@
+"""
+届次归档服务模块
+将本届的年级、班级、学生、报名、成绩整体复制到归档表后清空在用表，
+在用表只保留当届数据，历届数据保存在归档表中
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.core.database import truncate_tables
+from app.core.dimension_cache import dimension_cache
+from app.core.stats_cache import stats_cache
+from app.core.student_index import student_index
+from app.models.archive import Season, ARCHIVED_MODELS, ARCHIVE_TABLES
+from app.models.base import Grade, Class, Student
+from app.models.registration import Registration, ClassEventQuota, StudentQuota
+from app.models.score import Score, ClassStanding, GradeStanding
+
+# 归档后清空的在用表（按外键依赖顺序，引用方在前），报名计数和榜单随之清空
+SEASON_TABLES = (
+    Score, Registration, Student, Class, Grade,
+    ClassEventQuota, StudentQuota, ClassStanding, GradeStanding
+)
+
+
+class SeasonService:
+    """届次归档服务类"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get_season_list(self) -> List[Season]:
+        """获取已归档的届次（最近的在前）"""
+        return self.db.query(Season).order_by(Season.id.desc()).all()
+    
+    def archive_season(self, name: str, archived_by: int = None) -> Tuple[Optional[Season], str]:
+        """
+        归档本届数据并开始新一届
+        每张表一条 INSERT ... SELECT 复制到归档表（与届次记录在同一事务提交），
+        再清空在用表并重置自增ID；项目和组别设置复制后保留，供下一届继续使用
+        """
+        if self.db.query(Season.id).filter(Season.name == name).first():
+            return None, "届次名称已存在"
+        
+        season = Season(name=name, archived_by=archived_by)
+        self.db.add(season)
+        self.db.flush()
+        
+        counts = {}
+        for model in ARCHIVED_MODELS:
+            table = model.__table__
+            columns = [column.name for column in table.columns]
+            result = self.db.execute(
+                insert(ARCHIVE_TABLES[table.name]).from_select(
+                    ["season_id"] + columns,
+                    select(literal(season.id), *table.columns)
+                )
+            )
+            counts[model] = result.rowcount
+        
+        season.grade_count = counts[Grade]
+        season.class_count = counts[Class]
+        season.student_count = counts[Student]
+        season.registration_count = counts[Registration]
+        season.score_count = counts[Score]
+        self.db.commit()
+        
+        truncate_tables(self.db, SEASON_TABLES)
+        student_index.invalidate()
+        dimension_cache.invalidate()
+        stats_cache.bump_all()
+        self.db.refresh(season)
+        return season, ""
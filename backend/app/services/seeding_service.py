@@ -0,0 +1,172 @@
+"""
+分组编排服务模块
+按项目-组别将报名分为若干组（每组人数为跑道数），并编排组次和道次
+"""
+import math
+import random
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.base import Student
+from app.models.event import Event
+from app.models.registration import Registration
+from app.models.score import Score
+
+# 无预赛成绩时的抽签方式
+DRAW_SERPENTINE = "serpentine"  # 按班级、学号顺序蛇形分组，同班学生分散到不同组
+DRAW_RANDOM = "random"  # 随机抽签
+
+
+def serpentine_heats(count: int, heat_count: int) -> List[int]:
+    """
+    蛇形分组：按种子顺序依次分入第1..N组，再从第N组折返
+    返回每个种子所在的组（从0开始），各组人数最多相差1
+    """
+    heats = []
+    for index in range(count):
+        turn, position = divmod(index, heat_count)
+        heats.append(position if turn % 2 == 0 else heat_count - 1 - position)
+    return heats
+
+
+def center_lanes(lane_count: int) -> List[int]:
+    """径赛道次优先顺序：由中间道向外，如8道为 4,5,3,6,2,7,1,8"""
+    middle = (lane_count + 1) / 2
+    return sorted(range(1, lane_count + 1), key=lambda lane: (abs(lane - middle), lane))
+
+
+class SeedingService:
+    """分组编排服务类"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def seed_events(
+        self,
+        event_ids: Optional[List[int]] = None,
+        lane_count: int = None,
+        draw: str = DRAW_SERPENTINE,
+        seed: Optional[int] = None
+    ) -> Dict[str, int]:
+        """
+        编排项目的组次和道次（event_ids 为空时编排全部项目）
+        返回: {events, heats, registrations}
+        
+        同一项目的各组别分别分组，组次在项目内连续编号：
+        - 有预赛有效成绩时按成绩排定种子（径赛用时少者优先，田赛成绩高者优先），
+          无成绩的报名排在最后并随机排序；
+        - 无预赛成绩时按 draw 抽签：serpentine 按班级、学号顺序，random 随机排序。
+        种子按蛇形分入各组；径赛种子靠前者排在中间道，田赛种子靠前者最后出场，随机抽签时道次也随机。
+        报名、项目、预赛成绩各一次查询，每个项目一次批量UPDATE，最后统一提交
+        """
+        lane_count = lane_count or settings.SEEDING_LANE_COUNT
+        rng = random.Random(seed)
+        
+        event_query = self.db.query(Event.id, Event.type)
+        registration_query = self.db.query(
+            Registration.id, Registration.event_id, Registration.group_id
+        ).join(Student, Registration.student_id == Student.id).order_by(
+            Student.class_id, Student.student_no
+        )
+        score_query = self.db.query(
+            Score.registration_id, func.min(Score.value), func.max(Score.value)
+        ).join(Registration, Score.registration_id == Registration.id).filter(
+            Score.round == "preliminary",
+            Score.is_valid == True
+        ).group_by(Score.registration_id)
+        if event_ids is not None:
+            event_query = event_query.filter(Event.id.in_(event_ids))
+            registration_query = registration_query.filter(Registration.event_id.in_(event_ids))
+            score_query = score_query.filter(Registration.event_id.in_(event_ids))
+        
+        event_types = dict(event_query.all())
+        best_scores = {
+            registration_id: (lowest, highest)
+            for registration_id, lowest, highest in score_query
+        }
+        
+        # 项目 -> 组别 -> 报名ID（按班级、学号顺序）
+        entries: Dict[int, Dict[Optional[int], List[int]]] = {}
+        for registration_id, event_id, group_id in registration_query:
+            if event_id in event_types:
+                entries.setdefault(event_id, {}).setdefault(group_id, []).append(registration_id)
+        
+        total_heats = 0
+        total_registrations = 0
+        for event_id, groups in entries.items():
+            # 接力与径赛相同：按用时排序、分道进行
+            is_track = event_types[event_id] != "field"
+            assignments = []
+            heat_offset = 0
+            for group_id in sorted(groups, key=lambda g: (g is not None, g or 0)):
+                rows, heat_count = self._seed_group(
+                    groups[group_id], best_scores, is_track, lane_count, draw, rng, heat_offset
+                )
+                assignments += rows
+                heat_offset += heat_count
+            
+            self.db.connection().execute(
+                update(Registration).where(
+                    Registration.id == bindparam("b_id")
+                ).values(heat_no=bindparam("b_heat_no"), lane_no=bindparam("b_lane_no")),
+                assignments
+            )
+            total_heats += heat_offset
+            total_registrations += len(assignments)
+        
+        self.db.commit()
+        return {"events": len(entries), "heats": total_heats, "registrations": total_registrations}
+    
+    def _seed_group(
+        self,
+        registration_ids: List[int],
+        best_scores: Dict[int, Tuple],
+        is_track: bool,
+        lane_count: int,
+        draw: str,
+        rng: random.Random,
+        heat_offset: int
+    ) -> Tuple[List[Dict[str, int]], int]:
+        """编排一个项目-组别，返回 (UPDATE参数列表, 组数)"""
+        scored = [rid for rid in registration_ids if rid in best_scores]
+        unscored = [rid for rid in registration_ids if rid not in best_scores]
+        
+        randomize_lanes = False
+        if scored:
+            # 径赛取最好（最小）成绩升序，田赛取最好（最大）成绩降序
+            if is_track:
+                scored.sort(key=lambda rid: best_scores[rid][0])
+            else:
+                scored.sort(key=lambda rid: best_scores[rid][1], reverse=True)
+            rng.shuffle(unscored)
+            order = scored + unscored
+        else:
+            order = list(registration_ids)
+            if draw == DRAW_RANDOM:
+                rng.shuffle(order)
+                randomize_lanes = True
+        
+        heat_count = math.ceil(len(order) / lane_count)
+        heats: List[List[int]] = [[] for _ in range(heat_count)]
+        for registration_id, heat in zip(order, serpentine_heats(len(order), heat_count)):
+            heats[heat].append(registration_id)
+        
+        rows = []
+        for heat_index, members in enumerate(heats):
+            if is_track:
+                lanes = center_lanes(lane_count)[:len(members)]
+                if randomize_lanes:
+                    rng.shuffle(lanes)
+            else:
+                # 田赛为试跳/试掷顺序：有成绩时种子靠前者最后出场
+                lanes = list(range(len(members), 0, -1)) if scored else list(range(1, len(members) + 1))
+            for registration_id, lane in zip(members, lanes):
+                rows.append({
+                    "b_id": registration_id,
+                    "b_heat_no": heat_offset + heat_index + 1,
+                    "b_lane_no": lane
+                })
+        return rows, heat_count
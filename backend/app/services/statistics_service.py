@@ -1,18 +1,261 @@
 """
 排名统计服务模块
-实现项目排名计算、班级总分汇总、年级奖牌统计
+实现项目排名计算、班级总分汇总、年级奖牌统计；
+名次和得分在成绩录入、修改、作废的事务中计算并保存，
+班级总分榜和年级奖牌榜在同一事务中按差值更新（ClassStanding、GradeStanding），查询只读
 """
-from typing import List, Dict, Tuple
+from functools import partial
+from typing import List, Dict, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, asc
+from sqlalchemy import bindparam, case, func, desc, insert, or_, update
 from collections import defaultdict
 
-from app.models.score import Score
+from app.core.database import insert_ignore, supports_window_functions
+from app.core.dimension_cache import dimension_cache
+from app.core.live import Topic, live_hub
+from app.core.stats_cache import stats_cache
+
+from app.models.score import Score, ClassStanding, GradeStanding
 from app.models.registration import Registration
-from app.models.base import Student, Class, Grade
+from app.models.base import Student, Class
 from app.models.event import Event
 
 
+def scoring_points(scoring_rule: Dict) -> List[int]:
+    """将计分规则 {"1": 9, "2": 7, ...} 转换为按名次下标查找的得分数组（下标0不用）"""
+    ranks = [int(rank) for rank in (scoring_rule or {}) if str(rank).isdigit()]
+    return [0] + [scoring_rule.get(str(rank), 0) for rank in range(1, max(ranks, default=0) + 1)]
+
+
+# 榜单计数字段：决赛有效成绩数、总得分、金牌、银牌、铜牌
+STANDING_FIELDS = ("score_count", "points", "gold", "silver", "bronze")
+
+
+def standing_values(rank: Optional[int], points: Optional[int]) -> Tuple[int, ...]:
+    """一条决赛成绩对榜单各计数字段的贡献，没有名次（作废）的成绩为0"""
+    if rank is None:
+        return (0, 0, 0, 0, 0)
+    return (1, points or 0, int(rank == 1), int(rank == 2), int(rank == 3))
+
+
+def rank_scores(db: Session, event_ids: List[int] = None, round: str = None) -> int:
+    """
+    重新计算成绩的名次和得分，只写入发生变化的成绩，不提交
+    event_ids/round 限定项目和轮次，不指定时为全部项目、全部轮次。
+    一次查询取出成绩并按 (项目, 轮次) 分区排序：支持窗口函数的数据库用 ROW_NUMBER() OVER 编号，
+    否则按分区排序后顺序编号；径赛升序、田赛降序，成绩相同时先录入的在前。
+    得分按计分规则数组查找，作废的成绩清空名次和得分；变化的行用一条 UPDATE 批量写回，
+    决赛成绩的变化按差值累加到班级总分榜和年级奖牌榜
+    返回: 更新的成绩数
+    """
+    db.flush()
+    partition = (Registration.event_id, Score.round, Score.is_valid)
+    sort_key = (case((Event.type == "track", Score.value), else_=-Score.value), Score.id)
+    columns = [
+        Score.id, Score.is_valid, Score.rank, Score.points, Registration.event_id, Score.round,
+        Student.class_id, Class.grade_id
+    ]
+    window = supports_window_functions(db)
+    if window:
+        columns.append(func.row_number().over(partition_by=partition, order_by=sort_key))
+    
+    query = db.query(*columns).join(
+        Registration, Score.registration_id == Registration.id
+    ).join(
+        Event, Registration.event_id == Event.id
+    ).join(
+        Student, Registration.student_id == Student.id
+    ).join(
+        Class, Student.class_id == Class.id
+    ).filter(
+        # 作废且没有名次的成绩无需处理
+        or_(Score.is_valid == True, Score.rank.isnot(None))
+    )
+    rule_query = db.query(Event.id, Event.scoring_rule)
+    if event_ids is not None:
+        query = query.filter(Registration.event_id.in_(event_ids))
+        rule_query = rule_query.filter(Event.id.in_(event_ids))
+    if round:
+        query = query.filter(Score.round == round)
+    if not window:
+        query = query.order_by(*partition, *sort_key)
+    
+    points_table = {event_id: scoring_points(scoring_rule) for event_id, scoring_rule in rule_query}
+    
+    changes = []
+    class_deltas: Dict[int, List[int]] = defaultdict(lambda: [0] * len(STANDING_FIELDS))
+    grade_deltas: Dict[int, List[int]] = defaultdict(lambda: [0] * len(STANDING_FIELDS))
+    current = None
+    position = 0
+    for row in query:
+        score_id, is_valid, old_rank, old_points, event_id, round_, class_id, grade_id = row[:8]
+        if window:
+            position = row[8]
+        elif (event_id, round_, is_valid) != current:
+            current = (event_id, round_, is_valid)
+            position = 1
+        else:
+            position += 1
+        
+        if is_valid:
+            points = points_table[event_id]
+            new_rank, new_points = position, points[position] if position < len(points) else 0
+        else:
+            new_rank, new_points = None, 0
+        if new_rank == old_rank and new_points == (old_points or 0):
+            continue
+        changes.append({"b_id": score_id, "b_rank": new_rank, "b_points": new_points})
+        if round_ == "final":
+            old = standing_values(old_rank, old_points)
+            new = standing_values(new_rank, new_points)
+            for i in range(len(STANDING_FIELDS)):
+                class_deltas[class_id][i] += new[i] - old[i]
+                grade_deltas[grade_id][i] += new[i] - old[i]
+    
+    if changes:
+        db.connection().execute(
+            update(Score).where(
+                Score.id == bindparam("b_id")
+            ).values(rank=bindparam("b_rank"), points=bindparam("b_points")),
+            changes
+        )
+        apply_standing_deltas(db, ClassStanding, class_deltas)
+        apply_standing_deltas(db, GradeStanding, grade_deltas)
+    return len(changes)
+
+
+def refresh_event_ranking(db: Session, event_id: int, round: str = None) -> int:
+    """重新计算一个项目（某一轮次，不指定时为全部轮次）的名次和得分，不提交"""
+    return rank_scores(db, [event_id], round)
+
+
+def _standing_key(model):
+    return model.class_id if model is ClassStanding else model.grade_id
+
+
+def apply_standing_deltas(db: Session, model, deltas: Dict[int, List[int]]) -> None:
+    """
+    将差值累加到榜单（ClassStanding 或 GradeStanding，不提交）
+    榜单行不存在时先插入空行；累加用 字段 = 字段 + 差值，并发事务在行锁上排队
+    """
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    key = _standing_key(model)
+    db.connection().execute(insert_ignore(db, model), [{key.name: k} for k in deltas])
+    db.connection().execute(
+        update(model).where(key == bindparam("b_key")).values(**{
+            field: getattr(model, field) + bindparam(f"b_{field}") for field in STANDING_FIELDS
+        }),
+        [
+            {"b_key": k, **{f"b_{field}": delta[i] for i, field in enumerate(STANDING_FIELDS)}}
+            for k, delta in deltas.items()
+        ]
+    )
+
+
+def _standing_columns():
+    """按 STANDING_FIELDS 顺序汇总决赛有效成绩的聚合列"""
+    return (
+        func.count(Score.id),
+        func.sum(Score.points),
+        func.sum(case((Score.rank == 1, 1), else_=0)),
+        func.sum(case((Score.rank == 2, 1), else_=0)),
+        func.sum(case((Score.rank == 3, 1), else_=0)),
+    )
+
+
+def standing_counts(db: Session, *criteria) -> List[int]:
+    """
+    满足条件（学生、班级上的筛选）的决赛有效成绩对榜单的贡献，一次聚合查询
+    返回: 计数，按 STANDING_FIELDS 顺序
+    """
+    row = db.query(*_standing_columns()).join(
+        Registration, Score.registration_id == Registration.id
+    ).join(
+        Student, Registration.student_id == Student.id
+    ).filter(
+        Score.is_valid == True,
+        Score.round == "final",
+        *criteria
+    ).one()
+    return [int(value or 0) for value in row]
+
+
+def move_standing_counts(db: Session, model, counts: List[int], old_key: int, new_key: int) -> None:
+    """学生调班、班级调年级时，将其成绩的计数从榜单原来的行移到新的行（不提交）"""
+    if old_key == new_key or not any(counts):
+        return
+    apply_standing_deltas(db, model, {old_key: [-count for count in counts], new_key: list(counts)})
+
+
+def compute_standings(db: Session) -> Tuple[Dict[int, Tuple[int, ...]], Dict[int, Tuple[int, ...]]]:
+    """
+    从成绩表重新汇总班级和年级榜单（一次聚合查询）
+    返回: ({班级ID: 计数}, {年级ID: 计数})，计数按 STANDING_FIELDS 顺序
+    """
+    rows = db.query(
+        Student.class_id,
+        Class.grade_id,
+        *_standing_columns()
+    ).join(
+        Registration, Student.id == Registration.student_id
+    ).join(
+        Score, Registration.id == Score.registration_id
+    ).join(
+        Class, Student.class_id == Class.id
+    ).filter(
+        Score.is_valid == True,
+        Score.round == "final"
+    ).group_by(Student.class_id, Class.grade_id)
+    
+    classes: Dict[int, Tuple[int, ...]] = {}
+    grades: Dict[int, List[int]] = defaultdict(lambda: [0] * len(STANDING_FIELDS))
+    for class_id, grade_id, *values in rows:
+        values = tuple(int(value or 0) for value in values)
+        classes[class_id] = values
+        for i, value in enumerate(values):
+            grades[grade_id][i] += value
+    return classes, {grade_id: tuple(values) for grade_id, values in grades.items()}
+
+
+def load_standings(db: Session, model) -> Dict[int, Tuple[int, ...]]:
+    """读取榜单表中的计数（全为0的行视为不存在）"""
+    key = _standing_key(model)
+    return {
+        row[0]: tuple(row[1:])
+        for row in db.query(key, *(getattr(model, field) for field in STANDING_FIELDS))
+        if any(row[1:])
+    }
+
+
+def diff_standings(db: Session) -> List[Tuple[str, int, Optional[Tuple[int, ...]], Optional[Tuple[int, ...]]]]:
+    """
+    比较榜单表与从成绩表重新汇总的结果
+    返回: [(榜单表名, 班级/年级ID, 榜单表中的计数, 重新汇总的计数)]，一致时为空
+    """
+    classes, grades = compute_standings(db)
+    differences = []
+    for model, expected in ((ClassStanding, classes), (GradeStanding, grades)):
+        stored = load_standings(db, model)
+        for key in sorted(set(stored) | set(expected)):
+            if stored.get(key) != expected.get(key):
+                differences.append((model.__tablename__, key, stored.get(key), expected.get(key)))
+    return differences
+
+
+def rebuild_standings(db: Session) -> None:
+    """清空榜单表并从成绩表重新汇总（不提交）"""
+    classes, grades = compute_standings(db)
+    for model, values in ((ClassStanding, classes), (GradeStanding, grades)):
+        key = _standing_key(model)
+        db.query(model).delete(synchronize_session=False)
+        if values:
+            db.execute(insert(model), [
+                {key.name: k, **dict(zip(STANDING_FIELDS, counts))} for k, counts in values.items()
+            ])
+
+
 class StatisticsService:
     """排名统计服务类"""
     
@@ -26,168 +269,110 @@ class StatisticsService:
         top_n: int = None
     ) -> List[Dict]:
         """
-        获取项目排名
+        获取项目排名（只读，名次和得分在成绩写入时已计算，班级、年级名称取自维度缓存）
         返回: [{rank, student, score, points}]
         """
-        event = self.db.query(Event).filter(Event.id == event_id).first()
-        if not event:
-            return []
-        
-        # 查询有效成绩
-        query = self.db.query(Score, Registration, Student).join(
+        query = self.db.query(
+            Score.id, Score.value, Score.round, Score.rank, Score.points,
+            Student.id.label("student_id"), Student.name, Student.student_no, Student.class_id
+        ).join(
             Registration, Score.registration_id == Registration.id
         ).join(
             Student, Registration.student_id == Student.id
         ).filter(
             Registration.event_id == event_id,
             Score.round == round,
-            Score.is_valid == True
-        )
-        
-        # 根据项目类型排序（径赛升序，田赛降序）
-        if event.type == "track":
-            query = query.order_by(asc(Score.value))
-        else:
-            query = query.order_by(desc(Score.value))
+            Score.is_valid == True,
+            Score.rank.isnot(None)
+        ).order_by(Score.rank)
         
         if top_n:
             query = query.limit(top_n)
         
-        results = query.all()
-        
-        # 计算排名和得分
-        rankings = []
-        scoring_rule = event.scoring_rule or {}
-        
-        for idx, (score, registration, student) in enumerate(results, 1):
-            points = scoring_rule.get(str(idx), 0)
-            
-            # 更新数据库中的排名和得分
-            score.rank = idx
-            score.points = points
-            
-            rankings.append({
-                "rank": idx,
+        rows = query.all()
+        dims = dimension_cache.get(self.db, class_ids={row.class_id for row in rows})
+        return [
+            {
+                "rank": row.rank,
                 "student": {
-                    "id": student.id,
-                    "name": student.name,
-                    "student_no": student.student_no,
-                    "class_name": student.class_.name,
-                    "grade_name": student.class_.grade.name
+                    "id": row.student_id,
+                    "name": row.name,
+                    "student_no": row.student_no,
+                    "class_name": dims.classes[row.class_id].name,
+                    "grade_name": dims.classes[row.class_id].grade_name
                 },
                 "score": {
-                    "id": score.id,
-                    "value": float(score.value),
-                    "round": score.round
+                    "id": row.id,
+                    "value": float(row.value),
+                    "round": row.round
                 },
-                "points": points
-            })
-        
-        self.db.commit()
-        return rankings
+                "points": row.points or 0
+            }
+            for row in rows
+        ]
     
     def get_class_total(self, grade_id: int = None) -> List[Dict]:
         """
-        获取班级总分榜
+        获取班级总分榜（读取 ClassStanding，不汇总成绩表；班级、年级名称取自维度缓存）
         返回: [{rank, class, total_score, gold, silver, bronze}]
         """
-        # 查询所有有效成绩
-        query = self.db.query(
-            Class.id,
-            Class.name,
-            Grade.name.label("grade_name"),
-            func.sum(Score.points).label("total_score"),
-            func.sum(func.IF(Score.rank == 1, 1, 0)).label("gold"),
-            func.sum(func.IF(Score.rank == 2, 1, 0)).label("silver"),
-            func.sum(func.IF(Score.rank == 3, 1, 0)).label("bronze")
-        ).join(
-            Student, Class.id == Student.class_id
-        ).join(
-            Registration, Student.id == Registration.student_id
-        ).join(
-            Score, Registration.id == Score.registration_id
-        ).join(
-            Grade, Class.grade_id == Grade.id
-        ).filter(
-            Score.is_valid == True,
-            Score.round == "final"
-        ).group_by(Class.id)
+        standings = self.db.query(ClassStanding).filter(
+            ClassStanding.score_count > 0
+        ).order_by(desc(ClassStanding.points), ClassStanding.class_id).all()
+        dims = dimension_cache.get(self.db, class_ids={standing.class_id for standing in standings})
         
         if grade_id:
-            query = query.filter(Class.grade_id == grade_id)
-        
-        query = query.order_by(desc("total_score"))
-        
-        results = query.all()
+            standings = [s for s in standings if dims.classes[s.class_id].grade_id == grade_id]
         
         rankings = []
-        for idx, row in enumerate(results, 1):
+        for idx, standing in enumerate(standings, 1):
+            class_ = dims.classes[standing.class_id]
             rankings.append({
                 "rank": idx,
                 "class": {
-                    "id": row.id,
-                    "name": row.name,
-                    "grade_name": row.grade_name
+                    "id": standing.class_id,
+                    "name": class_.name,
+                    "grade_name": class_.grade_name
                 },
-                "total_score": int(row.total_score or 0),
-                "gold": int(row.gold or 0),
-                "silver": int(row.silver or 0),
-                "bronze": int(row.bronze or 0)
+                "total_score": standing.points,
+                "gold": standing.gold,
+                "silver": standing.silver,
+                "bronze": standing.bronze
             })
         
         return rankings
     
     def get_grade_medals(self) -> List[Dict]:
         """
-        获取年级奖牌榜
+        获取年级奖牌榜（读取 GradeStanding，不汇总成绩表；年级名称取自维度缓存）
         返回: [{rank, grade, gold, silver, bronze, total}]
         """
-        query = self.db.query(
-            Grade.id,
-            Grade.name,
-            func.sum(func.IF(Score.rank == 1, 1, 0)).label("gold"),
-            func.sum(func.IF(Score.rank == 2, 1, 0)).label("silver"),
-            func.sum(func.IF(Score.rank == 3, 1, 0)).label("bronze")
-        ).join(
-            Class, Grade.id == Class.grade_id
-        ).join(
-            Student, Class.id == Student.class_id
-        ).join(
-            Registration, Student.id == Registration.student_id
-        ).join(
-            Score, Registration.id == Score.registration_id
-        ).filter(
-            Score.is_valid == True,
-            Score.round == "final"
-        ).group_by(Grade.id).order_by(
-            desc("gold"), desc("silver"), desc("bronze")
-        )
-        
-        results = query.all()
+        standings = self.db.query(GradeStanding).filter(GradeStanding.score_count > 0).order_by(
+            desc(GradeStanding.gold), desc(GradeStanding.silver), desc(GradeStanding.bronze),
+            GradeStanding.grade_id
+        ).all()
+        dims = dimension_cache.get(self.db, grade_ids={standing.grade_id for standing in standings})
         
         rankings = []
-        for idx, row in enumerate(results, 1):
-            gold = int(row.gold or 0)
-            silver = int(row.silver or 0)
-            bronze = int(row.bronze or 0)
-            
+        for idx, standing in enumerate(standings, 1):
             rankings.append({
                 "rank": idx,
                 "grade": {
-                    "id": row.id,
-                    "name": row.name
+                    "id": standing.grade_id,
+                    "name": dims.grades[standing.grade_id].name
                 },
-                "gold": gold,
-                "silver": silver,
-                "bronze": bronze,
-                "total": gold + silver + bronze
+                "gold": standing.gold,
+                "silver": standing.silver,
+                "bronze": standing.bronze,
+                "total": standing.gold + standing.silver + standing.bronze
             })
         
         return rankings
     
     def get_scoring_rules(self) -> Dict:
-        """获取计分规则"""
-        event = self.db.query(Event).first()
+        """获取计分规则（取第一个项目的规则）"""
+        events = dimension_cache.get(self.db).events
+        event = events[min(events)] if events else None
         if event and event.scoring_rule:
             return event.scoring_rule
         return {"1": 9, "2": 7, "3": 6, "4": 5, "5": 4, "6": 3, "7": 2, "8": 1}
@@ -197,16 +382,68 @@ class StatisticsService:
         events = self.db.query(Event).all()
         for event in events:
             event.scoring_rule = rules
+        # 得分随计分规则变化，在同一事务中重新计算
+        rank_scores(self.db)
         self.db.commit()
+        dimension_cache.invalidate()
+        stats_cache.bump_all()
+        publish_live_changes(self.db)
         return True
     
     def recalculate_all_rankings(self) -> int:
-        """重新计算所有项目排名"""
-        events = self.db.query(Event).all()
-        count = 0
-        for event in events:
-            self.get_event_ranking(event.id, "final")
-            if event.has_preliminary:
-                self.get_event_ranking(event.id, "preliminary")
-            count += 1
-        return count
+        """重新计算所有项目排名并重建班级、年级榜单（用于修复数据，一次提交）"""
+        rank_scores(self.db)
+        rebuild_standings(self.db)
+        self.db.commit()
+        stats_cache.bump_all()
+        publish_live_changes(self.db)
+        return self.db.query(func.count(Event.id)).scalar()
+
+
+def live_results(db: Session, topics: List[Topic]) -> Dict[Topic, List[Dict]]:
+    """计算实时推送主题的当前结果（与统计接口共用缓存条目）"""
+    service = StatisticsService(db)
+    results = {}
+    for topic in topics:
+        if topic[0] == "event-ranking":
+            _, event_id, round = topic
+            results[topic] = stats_cache.get_or_compute(
+                "event-ranking",
+                (event_id, round, None),
+                partial(service.get_event_ranking, event_id, round),
+                event_id=event_id
+            )
+        elif topic[0] == "class-total":
+            results[topic] = stats_cache.get_or_compute("class-total", (None,), service.get_class_total)
+        else:
+            results[topic] = stats_cache.get_or_compute("grade-medals", (), service.get_grade_medals)
+    return results
+
+
+def seed_live_topics(db: Session, event_id: int = None) -> None:
+    """新连接建立时准备快照：榜单和指定项目的决赛排名尚未保存时计算一次"""
+    topics = [("class-total",), ("grade-medals",)]
+    if event_id is not None:
+        topics.append(("event-ranking", event_id, "final"))
+    missing = [topic for topic in topics if not live_hub.has_topic(topic)]
+    for topic, rows in live_results(db, missing).items():
+        live_hub.seed(topic, rows)
+
+
+def publish_live_changes(db: Session, event_ids: List[int] = None, round: str = "final") -> int:
+    """
+    成绩写入提交后推送排名和榜单的变化，没有实时连接时不计算
+    event_ids 为 None 时重新计算已推送过的全部项目（计分规则变化、全量重算）
+    返回发出的变化消息数
+    """
+    if not live_hub.has_subscribers:
+        return 0
+    if event_ids is None:
+        topics = live_hub.event_topics()
+    else:
+        topics = [("event-ranking", event_id, round) for event_id in event_ids]
+    # 预赛成绩不计入榜单
+    if event_ids is None or round == "final":
+        topics += [("class-total",), ("grade-medals",)]
+    return live_hub.publish(live_results(db, topics))
+
@@ -0,0 +1,42 @@
+"""
+榜单一致性检查脚本
+从成绩表重新汇总班级总分榜和年级奖牌榜，与按差值维护的榜单表（class_standings、grade_standings）比较，
+列出不一致的行；加 --fix 时用重新汇总的结果重建榜单表
+
+用法：
+    python scripts/check_standings.py          只检查
+    python scripts/check_standings.py --fix    检查并重建
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.services.statistics_service import STANDING_FIELDS, diff_standings, rebuild_standings
+
+
+def main():
+    """主函数"""
+    db = SessionLocal()
+    try:
+        differences = diff_standings(db)
+        if not differences:
+            print("榜单与成绩表一致")
+            return
+        
+        print(f"发现 {len(differences)} 处不一致（字段: {', '.join(STANDING_FIELDS)}）")
+        for table, key, stored, expected in differences:
+            print(f"  {table}  ID={key}  榜单={stored}  重新汇总={expected}")
+        
+        if "--fix" in sys.argv:
+            rebuild_standings(db)
+            db.commit()
+            print("已重建榜单")
+        else:
+            sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
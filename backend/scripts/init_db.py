@@ -18,13 +18,18 @@ def create_tables():
     from app.models.user import User
     from app.models.base import Grade, Class, Student
     from app.models.event import Event, EventGroup
-    from app.models.registration import Registration
+    from app.models.registration import Registration, ClassEventQuota, StudentQuota
     from app.models.score import Score
     from app.models.announcement import Announcement
     from app.models.log import OperationLog
+    from app.models.archive import Season
+    
+    from app.core import migrations
     
     print("正在创建数据库表...")
     Base.metadata.create_all(bind=engine)
+    # 新建的表结构已是最新，标记全部迁移为已执行；已有数据库请使用 scripts/migrate.py
+    migrations.stamp(engine)
     print("数据库表创建完成！")
 
 
@@ -0,0 +1,39 @@
+"""
+数据库迁移脚本
+执行尚未执行的结构变更（字段、表、索引），已执行的版本记录在 schema_migrations 表中
+
+用法：
+    python scripts/migrate.py            执行全部未执行的迁移
+    python scripts/migrate.py --status   查看迁移状态
+    python scripts/migrate.py --stamp    标记全部迁移为已执行（数据库已由 init_db.py 创建时使用）
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import engine
+from app.core import migrations
+
+
+def main():
+    """主函数"""
+    if "--status" in sys.argv:
+        applied = set(migrations.applied_versions(engine))
+        for m in migrations.MIGRATIONS:
+            print(f"{m.version:>4}  {'已执行' if m.version in applied else '未执行'}  {m.name}")
+        return
+    
+    if "--stamp" in sys.argv:
+        migrations.stamp(engine)
+        print("已标记全部迁移为已执行")
+        return
+    
+    executed = migrations.upgrade(engine)
+    if not executed:
+        print("数据库结构已是最新，无需迁移")
+    for m in executed:
+        print(f"已执行迁移 {m.version}: {m.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+全表扫描检查脚本
+在一个最终回滚的事务中执行各服务的典型查询，记录实际发出的SELECT语句，
+用数据库执行计划（MySQL EXPLAIN / SQLite EXPLAIN QUERY PLAN）列出其中的全表扫描
+
+用法：
+    python scripts/report_full_scans.py
+
+注意：表中数据很少时数据库可能认为全表扫描更快，请在有真实数据量的库上检查；
+本来就读取整张小表的查询（如项目、组别规则编译）出现全表扫描属于正常情况
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+from app.core.query_audit import capture_selects, find_full_scans
+from app.models.base import Class, Student
+from app.models.event import Event, EventGroup
+from app.models.log import OperationLog
+from app.models.registration import Registration
+from app.services.base_service import BaseService
+from app.services.eligibility_service import EligibilityService
+from app.services.registration_service import RegistrationService
+from app.services.score_service import ScoreService
+from app.services.statistics_service import StatisticsService
+
+
+def first_id(db: Session, column):
+    """取表中的一个ID作为查询参数，表为空时使用1"""
+    value = db.query(column).order_by(column).limit(1).scalar()
+    return value if value is not None else 1
+
+
+def service_queries(db: Session):
+    """各服务的典型查询：(名称, 调用)"""
+    class_id = first_id(db, Class.id)
+    grade_id = db.query(Class.grade_id).filter(Class.id == class_id).scalar() or 1
+    student_id = first_id(db, Student.id)
+    event_id = first_id(db, Event.id)
+    group_id = first_id(db, EventGroup.id)
+    registration_id = first_id(db, Registration.id)
+    since = datetime.utcnow() - timedelta(days=7)
+    
+    return [
+        ("班级列表（按年级）", lambda: BaseService(db).get_class_list(grade_id=grade_id)),
+        ("学生列表（按班级）", lambda: BaseService(db).get_student_list(class_id=class_id)),
+        ("报名列表（按项目+组别）", lambda: RegistrationService(db).get_registration_list(
+            event_id=event_id, group_id=group_id
+        )),
+        ("报名查重", lambda: RegistrationService(db).check_duplicate(student_id, event_id)),
+        ("成绩列表（按项目）", lambda: ScoreService(db).get_score_list(event_id=event_id)),
+        ("成绩查重", lambda: ScoreService(db).check_duplicate(registration_id, "final")),
+        ("班级报名资格矩阵", lambda: EligibilityService(db).get_class_eligibility(class_id)),
+        ("项目排名", lambda: StatisticsService(db).get_event_ranking(event_id)),
+        ("班级总分", lambda: StatisticsService(db).get_class_total()),
+        ("操作日志（按时间）", lambda: db.query(OperationLog).filter(
+            OperationLog.created_at >= since
+        ).order_by(OperationLog.created_at.desc()).limit(20).all()),
+    ]
+
+
+def main():
+    """主函数"""
+    print(f"数据库: {engine.dialect.name}")
+    found = 0
+    failed = 0
+    with engine.connect() as conn:
+        outer = conn.begin()
+        # 服务内部的提交只释放保存点，最后整体回滚，不改变数据
+        db = Session(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            for name, call in service_queries(db):
+                with capture_selects(engine) as statements:
+                    try:
+                        call()
+                    except Exception as e:
+                        # 如使用了当前数据库不支持的函数，跳过该项继续检查
+                        db.rollback()
+                        failed += 1
+                        print(f"\n[执行失败] {name}: {e.__class__.__name__}")
+                        continue
+                scans = []
+                for statement, parameters in statements:
+                    for scan in find_full_scans(conn, statement, parameters):
+                        scans.append((scan, " ".join(statement.split())))
+                found += len(scans)
+                print(f"\n[{'全表扫描' if scans else '正常'}] {name}（{len(statements)}条查询）")
+                for scan, statement in scans:
+                    print(f"    {scan}")
+                    print(f"        {statement[:200]}")
+        finally:
+            db.close()
+            outer.rollback()
+    
+    print(f"\n共发现 {found} 处全表扫描" + (f"，{failed} 项执行失败" if failed else ""))
+
+
+if __name__ == "__main__":
+    main()
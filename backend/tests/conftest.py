@@ -1,13 +1,23 @@
 """
 测试配置和fixtures
 """
+import os
+from datetime import timedelta
+
 import pytest
+from hypothesis import settings
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from app.core.query_audit import capture_statements
 from app.models.base_model import Base
 
+# 属性测试的单个样例在共享测试数据库上逐行提交，完整测试时还会遇到垃圾回收停顿，
+# 默认 200ms 的时限不稳定；时限放宽到 1 秒，可用 HYPOTHESIS_PROFILE=default 恢复默认设置
+settings.register_profile("backend", deadline=timedelta(seconds=1))
+settings.load_profile(os.getenv("HYPOTHESIS_PROFILE", "backend"))
+
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -31,3 +41,13 @@ def db_session():
     finally:
         session.close()
         Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def capture_queries(db_session):
+    """
+    记录代码块内在测试数据库上执行的SQL语句及参数：
+    with capture_queries() as statements: ...（selects_only=True 时只记录SELECT语句）
+    """
+    engine = db_session.get_bind()
+    return lambda selects_only=False: capture_statements(engine, selects_only)
@@ -0,0 +1,113 @@
+"""
+测试数据构造函数
+多个测试文件共用的年级、班级、学生、项目、报名数据和导入文件
+"""
+from io import BytesIO
+
+from openpyxl import Workbook
+
+from app.models.base import Grade, Class, Student
+from app.models.event import Event
+from app.models.registration import Registration
+
+
+def build_workbook(rows, header=("学号", "姓名", "性别", "年级", "班级")) -> bytes:
+    """构建导入用的Excel文件内容"""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(list(header))
+    for row in rows:
+        ws.append(list(row))
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def create_class(db_session, grade_name="一年级", class_name="1班") -> Class:
+    """创建年级和班级"""
+    grade = Grade(name=grade_name, sort_order=0)
+    db_session.add(grade)
+    db_session.flush()
+    class_ = Class(grade_id=grade.id, name=class_name)
+    db_session.add(class_)
+    db_session.commit()
+    return class_
+
+
+def create_students(db_session, count, class_name="1班", gender="M"):
+    """创建年级、班级和学生"""
+    grade = db_session.query(Grade).filter(Grade.name == "一年级").first()
+    if not grade:
+        grade = Grade(name="一年级", sort_order=0)
+        db_session.add(grade)
+        db_session.flush()
+    class_ = Class(grade_id=grade.id, name=class_name)
+    db_session.add(class_)
+    db_session.flush()
+    students = [
+        Student(class_id=class_.id, student_no=f"{class_name}{i:03d}", name=f"学生{i}", gender=gender)
+        for i in range(count)
+    ]
+    db_session.add_all(students)
+    db_session.commit()
+    return students
+
+
+def create_event(db_session, name="50米", max_per_class=3, max_per_student=3):
+    """创建项目"""
+    event = Event(name=name, type="track", unit="秒", max_per_class=max_per_class, max_per_student=max_per_student)
+    db_session.add(event)
+    db_session.commit()
+    return event
+
+
+def create_registrations(db_session):
+    """创建两个学生、两个项目，学生1报名两个项目，学生2只报名100米"""
+    grade = Grade(name="一年级", sort_order=0)
+    db_session.add(grade)
+    db_session.flush()
+    class_ = Class(grade_id=grade.id, name="1班")
+    db_session.add(class_)
+    db_session.flush()
+    students = [
+        Student(class_id=class_.id, student_no="2024001", name="张三", gender="M"),
+        Student(class_id=class_.id, student_no="2024002", name="李四", gender="F"),
+    ]
+    events = [
+        Event(name="100米", type="track", unit="秒"),
+        Event(name="跳远", type="field", unit="米"),
+    ]
+    db_session.add_all(students + events)
+    db_session.flush()
+    registrations = [
+        Registration(student_id=students[0].id, event_id=events[0].id),
+        Registration(student_id=students[0].id, event_id=events[1].id),
+        Registration(student_id=students[1].id, event_id=events[0].id),
+    ]
+    db_session.add_all(registrations)
+    db_session.commit()
+    return registrations
+
+
+SCORE_HEADER = ("学号", "项目名称", "成绩")
+
+
+def create_meet(db_session):
+    """两个年级各一个班，每班两名学生报名100米，返回 (班级, 报名)"""
+    grades = [Grade(name="一年级", sort_order=0), Grade(name="二年级", sort_order=1)]
+    db_session.add_all(grades)
+    db_session.flush()
+    classes = [Class(grade_id=grades[0].id, name="1班"), Class(grade_id=grades[1].id, name="1班")]
+    db_session.add_all(classes)
+    db_session.flush()
+    students = [
+        Student(class_id=classes[i // 2].id, student_no=f"S{i}", name=f"学生{i}", gender="M")
+        for i in range(4)
+    ]
+    event = Event(name="100米", type="track", unit="秒", scoring_rule={"1": 9, "2": 7, "3": 6})
+    db_session.add_all(students + [event])
+    db_session.flush()
+    registrations = [Registration(student_id=s.id, event_id=event.id) for s in students]
+    db_session.add_all(registrations)
+    db_session.commit()
+    return classes, registrations
@@ -0,0 +1,60 @@
+"""
+维度数据缓存测试
+验证一次加载后不再查询、服务写入后失效重新加载、按ID缺失时重新加载
+"""
+from app.core.dimension_cache import dimension_cache
+from app.models.base import Class
+from app.services.base_service import BaseService
+from app.services.event_service import EventService
+from app.services.score_service import ScoreService
+from app.services.statistics_service import StatisticsService
+from tests.factories import create_meet
+
+
+class TestDimensionCache:
+    """维度数据缓存测试类"""
+    
+    def test_loaded_once(self, db_session, capture_queries):
+        """首次使用时每张表一次查询，之后按ID和自然键查找不再查询"""
+        classes, registrations = create_meet(db_session)
+        dimension_cache.invalidate()
+        
+        with capture_queries() as loaded:
+            dims = dimension_cache.get(db_session)
+        assert len(loaded) == 4
+        assert dims.classes[classes[1].id].grade_name == "二年级"
+        assert dims.class_ids[(classes[0].grade_id, "1班")] == classes[0].id
+        assert dims.event_ids["100米"] == registrations[0].event_id
+        
+        with capture_queries() as statements:
+            dimension_cache.get(db_session, class_ids=[c.id for c in classes])
+        assert statements == []
+    
+    def test_service_writes_invalidate(self, db_session):
+        """年级、班级、项目写入提交后缓存失效，排名中的名称随之更新"""
+        classes, registrations = create_meet(db_session)
+        ScoreService(db_session).create_score(registrations[0].id, 12.0)
+        event_id = registrations[0].event_id
+        service = StatisticsService(db_session)
+        service.get_event_ranking(event_id)
+        
+        BaseService(db_session).update_class(classes[0].id, name="3班")
+        assert dimension_cache.stale
+        assert service.get_event_ranking(event_id)[0]["student"]["class_name"] == "3班"
+        
+        BaseService(db_session).update_grade(classes[0].grade_id, name="初一")
+        assert service.get_class_total()[0]["class"]["grade_name"] == "初一"
+        
+        EventService(db_session).update_event(event_id, name="百米")
+        assert dimension_cache.get(db_session).event_ids == {"百米": event_id}
+    
+    def test_missing_id_reloads(self, db_session):
+        """绕过服务新增的班级按ID查找时重新加载"""
+        classes, _ = create_meet(db_session)
+        dimension_cache.get(db_session)
+        class_ = Class(grade_id=classes[0].grade_id, name="9班")
+        db_session.add(class_)
+        db_session.commit()
+        
+        dims = dimension_cache.get(db_session, class_ids=[class_.id])
+        assert dims.classes[class_.id].name == "9班"
@@ -0,0 +1,104 @@
+"""
+班级报名资格矩阵测试
+"""
+import pytest
+
+from app.models.event import EventGroup
+from app.models.registration import Registration
+from app.core.dimension_cache import dimension_cache
+from app.services.eligibility_service import EligibilityService, compile_event_rules
+from app.services.event_service import EventService
+from tests.factories import create_students, create_event
+
+
+@pytest.fixture(autouse=True)
+def fresh_rules():
+    """测试数据绕过服务写入项目，每个测试重新加载维度数据和规则"""
+    dimension_cache.invalidate()
+    yield
+    dimension_cache.invalidate()
+
+
+class TestClassEligibility:
+    """班级报名资格矩阵测试类"""
+    
+    def test_matrix_reports_remaining_slots_and_reasons(self, db_session):
+        """矩阵包含班级剩余名额、学生剩余项目数和不可报原因"""
+        students = create_students(db_session, 3)
+        run = create_event(db_session, "50米", max_per_class=2, max_per_student=1)
+        jump = create_event(db_session, "跳远")
+        db_session.add_all([
+            Registration(student_id=students[0].id, event_id=run.id),
+            Registration(student_id=students[1].id, event_id=run.id),
+        ])
+        db_session.commit()
+        
+        matrix, error = EligibilityService(db_session).get_class_eligibility(students[0].class_id)
+        
+        assert error == ""
+        assert [(e["id"], e["registered"], e["remaining"]) for e in matrix["events"]] == [
+            (run.id, 2, 0), (jump.id, 0, 3)
+        ]
+        rows = {row["id"]: row for row in matrix["students"]}
+        assert (rows[students[0].id]["registered"], rows[students[0].id]["remaining"]) == (1, 0)
+        assert [c["reason"] for c in rows[students[0].id]["cells"]] == [
+            "该学生已报名此项目", "该学生报名项目数已达上限(1项)"
+        ]
+        assert [c["reason"] for c in rows[students[2].id]["cells"]] == [
+            "该班级报名人数已达上限(2人)", ""
+        ]
+        assert rows[students[2].id]["cells"][1]["eligible"] is True
+    
+    def test_group_gender_and_grade_rules(self, db_session):
+        """按组别性别和年级限制给出可参加的组别"""
+        boys = create_students(db_session, 1, "1班", gender="M")
+        event = create_event(db_session)
+        other = create_event(db_session, "跳高")
+        male = EventGroup(event_id=event.id, name="男子组", gender="M", grade_ids=[boys[0].class_.grade_id])
+        female = EventGroup(event_id=event.id, name="女子组", gender="F")
+        senior = EventGroup(event_id=other.id, name="高年级组", gender="A", grade_ids=[999])
+        db_session.add_all([male, female, senior])
+        db_session.commit()
+        
+        matrix, _ = EligibilityService(db_session).get_class_eligibility(boys[0].class_id)
+        
+        cells = matrix["students"][0]["cells"]
+        assert (cells[0]["eligible"], cells[0]["group_ids"]) == (True, [male.id])
+        assert (cells[1]["eligible"], cells[1]["reason"]) == (False, "该组别不允许该年级参加")
+        assert [g["id"] for g in matrix["events"][0]["groups"]] == [male.id, female.id]
+    
+    def test_missing_class(self, db_session):
+        """班级不存在时返回错误"""
+        assert EligibilityService(db_session).get_class_eligibility(999) == (None, "班级不存在")
+    
+    def test_matrix_uses_constant_queries(self, db_session, capture_queries):
+        """规则缓存命中后，矩阵只需班级、学生、报名三次查询"""
+        students = create_students(db_session, 20)
+        events = [create_event(db_session, f"项目{i}") for i in range(5)]
+        db_session.add(EventGroup(event_id=events[0].id, name="男子组", gender="M"))
+        db_session.add_all([Registration(student_id=s.id, event_id=events[1].id) for s in students[:3]])
+        db_session.commit()
+        class_id = students[0].class_id
+        compile_event_rules(db_session)
+        
+        with capture_queries() as statements:
+            matrix, _ = EligibilityService(db_session).get_class_eligibility(class_id)
+        
+        assert len(matrix["students"]) == 20
+        assert len(statements) == 3
+    
+    def test_event_writes_refresh_rules(self, db_session):
+        """通过服务修改项目、新增组别后重新编译规则"""
+        students = create_students(db_session, 1, gender="M")
+        event = create_event(db_session)
+        service = EligibilityService(db_session)
+        rules = compile_event_rules(db_session)
+        assert compile_event_rules(db_session) is rules
+        
+        EventService(db_session).update_event(event.id, max_per_class=1)
+        group, _ = EventService(db_session).create_group(event.id, "女子组", gender="F")
+        
+        matrix, _ = service.get_class_eligibility(students[0].class_id)
+        assert matrix["events"][0]["max_per_class"] == 1
+        assert [g["id"] for g in matrix["events"][0]["groups"]] == [group.id]
+        assert matrix["students"][0]["cells"][0]["reason"] == "该组别不允许该性别参加"
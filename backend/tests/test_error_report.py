@@ -0,0 +1,90 @@
+"""
+导入错误报告测试
+验证响应中的错误条数有上限、完整错误逐条写入报告文件
+"""
+import pytest
+from openpyxl import load_workbook
+
+from app.core.config import settings
+from app.core.error_report import (
+    ERROR_FILE,
+    ERROR_HEADERS,
+    ERROR_INVALID,
+    ERROR_NOT_FOUND,
+    ErrorReport,
+    build_report_xlsx,
+    read_report_file
+)
+from app.core.ingestion import ImportResult
+
+
+@pytest.fixture
+def report_dir(tmp_path, monkeypatch):
+    """将错误报告目录指向临时目录"""
+    monkeypatch.setattr(settings, "IMPORT_ERROR_REPORT_DIR", str(tmp_path))
+    return tmp_path
+
+
+class TestErrorReport:
+    """导入错误报告测试类"""
+    
+    def test_preview_is_bounded(self, report_dir, monkeypatch):
+        """响应只保留前若干条错误，错误总数和报告包含全部错误"""
+        monkeypatch.setattr(settings, "IMPORT_ERROR_PREVIEW_LIMIT", 3)
+        result = ImportResult(report=ErrorReport("job1"))
+        for row in range(2, 12):
+            result.add_error("成绩格式错误", row, "成绩", ERROR_INVALID)
+        result.report.close()
+        
+        data = result.to_dict()
+        assert data["errors"] == ["第2行: 成绩格式错误", "第3行: 成绩格式错误", "第4行: 成绩格式错误"]
+        assert (data["failed"], data["error_count"]) == (10, 10)
+        assert data["error_report"] == "/api/jobs/job1/errors"
+        assert result.error_records == []
+        
+        records = list(read_report_file(result.report.path))
+        assert len(records) == 10
+        assert records[-1] == {
+            "file": None, "sheet": None, "row": 11, "column": "成绩",
+            "code": ERROR_INVALID, "message": "成绩格式错误"
+        }
+    
+    def test_no_report_without_errors(self, report_dir):
+        """没有错误时不创建报告文件"""
+        result = ImportResult(report=ErrorReport("job2"))
+        result.success = 5
+        result.report.close()
+        
+        assert result.to_dict()["error_report"] is None
+        assert list(report_dir.iterdir()) == []
+    
+    def test_merge_writes_child_records(self, report_dir):
+        """子结果（如进程池解析结果）的错误合并后写入报告"""
+        child = ImportResult()
+        child.add_error("项目'铅球'不存在", 4, "项目名称", ERROR_NOT_FOUND, sheet="一年级-1班", file="a.xlsx")
+        child.add_file_error("文件解析错误: bad", file="b.xlsx")
+        
+        result = ImportResult(report=ErrorReport("job3"))
+        result.merge(child)
+        result.report.close()
+        
+        assert result.errors == [
+            "[a.xlsx] [一年级-1班] 第4行: 项目'铅球'不存在",
+            "[b.xlsx] 文件解析错误: bad"
+        ]
+        assert (result.failed, result.file_errors, result.error_count) == (1, 1, 2)
+        assert [r["code"] for r in read_report_file(result.report.path)] == [ERROR_NOT_FOUND, ERROR_FILE]
+    
+    def test_build_xlsx_report(self, report_dir):
+        """CSV报告可转换为Excel下载"""
+        result = ImportResult(report=ErrorReport("job4"))
+        result.add_error("性别格式错误", 2, "性别", ERROR_INVALID)
+        result.report.close()
+        
+        output = build_report_xlsx(result.report.path)
+        ws = load_workbook(output).active
+        rows = list(ws.iter_rows(values_only=True))
+        output.close()
+        
+        assert rows[0] == ERROR_HEADERS
+        assert rows[1] == (None, None, 2, "性别", ERROR_INVALID, "性别格式错误")
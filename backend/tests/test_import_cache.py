@@ -0,0 +1,95 @@
+"""
+导入结果缓存测试
+验证相同文件重复导入时复用结果、数据变化时失效以及按最近使用淘汰
+"""
+import os
+
+import pytest
+
+from app.core import import_cache
+from app.core.config import settings
+from app.core.ingestion import ImportResult
+from app.models.base import Student
+from app.services.base_service import BaseService
+from tests.factories import build_workbook, create_class
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """将缓存目录指向临时目录"""
+    monkeypatch.setattr(settings, "IMPORT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "IMPORT_CACHE_ENABLED", True)
+    return tmp_path
+
+
+def run_import(db_session, content, key):
+    """带缓存导入学生，返回 (导入结果, 是否实际执行了导入)"""
+    result = ImportResult()
+    calls = []
+    
+    def run():
+        calls.append(1)
+        BaseService(db_session).import_students(content, result=result)
+    
+    import_cache.run_cached(db_session, result, "student_import", key, run)
+    return result, bool(calls)
+
+
+class TestImportCache:
+    """导入结果缓存测试类"""
+    
+    def test_same_file_returns_cached_result(self, db_session, cache_dir):
+        """相同文件再次导入时不重新解析，原先写入的行计为跳过"""
+        create_class(db_session)
+        content = build_workbook([
+            ("2024001", "张三", "男", "一年级", "1班"),
+            ("2024002", "李四", "女", "一年级", "9班"),
+        ])
+        key = import_cache.make_key("student_import", "digest", dry_run=False)
+        
+        first, executed = run_import(db_session, content, key)
+        assert executed and not first.cached
+        assert (first.success, first.failed) == (1, 1)
+        
+        second, executed = run_import(db_session, content, key)
+        assert not executed and second.cached
+        assert (second.success, second.failed, second.skipped) == (0, 1, 1)
+        assert second.errors == first.errors
+        assert db_session.query(Student).count() == 1
+    
+    def test_table_change_invalidates_entry(self, db_session, cache_dir):
+        """相关数据表变化后缓存失效，重新执行导入"""
+        create_class(db_session)
+        content = build_workbook([("2024001", "张三", "男", "一年级", "1班")])
+        key = import_cache.make_key("student_import", "digest", dry_run=False)
+        run_import(db_session, content, key)
+        
+        db_session.query(Student).delete()
+        db_session.commit()
+        
+        result, executed = run_import(db_session, content, key)
+        assert executed and not result.cached
+        assert result.success == 1
+    
+    def test_file_errors_are_not_cached(self, db_session, cache_dir):
+        """文件无法解析时不缓存结果"""
+        key = import_cache.make_key("student_import", "digest", dry_run=False)
+        
+        run_import(db_session, b"not a workbook", key)
+        
+        assert os.listdir(cache_dir) == []
+    
+    def test_evicts_least_recently_used(self, db_session, cache_dir, monkeypatch):
+        """超出条目数时淘汰最久未使用的条目"""
+        monkeypatch.setattr(settings, "IMPORT_CACHE_MAX_ENTRIES", 2)
+        keys = [import_cache.make_key("student_import", str(i)) for i in range(3)]
+        
+        import_cache.put(db_session, "student_import", keys[0], ImportResult())
+        import_cache.put(db_session, "student_import", keys[1], ImportResult())
+        os.utime(os.path.join(cache_dir, f"{keys[0]}.json"), (0, 0))
+        os.utime(os.path.join(cache_dir, f"{keys[1]}.json"), (1, 1))
+        # 访问第一个条目后它成为最近使用
+        assert import_cache.get(db_session, "student_import", keys[0]) is not None
+        import_cache.put(db_session, "student_import", keys[2], ImportResult())
+        
+        assert sorted(os.listdir(cache_dir)) == sorted(f"{key}.json" for key in (keys[0], keys[2]))
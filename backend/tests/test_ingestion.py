@@ -0,0 +1,93 @@
+"""
+文件导入公共模块测试
+验证上传分块落盘、大小限制、只读方式逐行读取和CSV/TSV解析
+"""
+import asyncio
+from io import BytesIO
+
+import pytest
+from fastapi import UploadFile
+from openpyxl import Workbook
+
+from app.core.config import settings
+from app.core.exceptions import FileTooLargeError
+from app.core.ingestion import (
+    spool_upload,
+    open_workbook,
+    open_table,
+    iter_sheet_rows,
+    chunked,
+    resolve_columns
+)
+
+
+class TestIngestion:
+    """文件导入公共模块测试类"""
+    
+    def test_spool_upload_copies_content(self, monkeypatch):
+        """上传内容分块写入临时文件后完整可读"""
+        monkeypatch.setattr(settings, "UPLOAD_READ_CHUNK_SIZE", 7)
+        monkeypatch.setattr(settings, "UPLOAD_SPOOL_MAX_MEMORY", 16)
+        content = b"0123456789" * 10
+        
+        spool = asyncio.run(spool_upload(UploadFile(file=BytesIO(content), filename="a.xlsx")))
+        try:
+            assert spool.read() == content
+        finally:
+            spool.close()
+    
+    def test_spool_upload_enforces_max_size(self, monkeypatch):
+        """读取过程中超过 MAX_UPLOAD_SIZE 立即拒绝"""
+        monkeypatch.setattr(settings, "UPLOAD_READ_CHUNK_SIZE", 4)
+        monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 10)
+        
+        with pytest.raises(FileTooLargeError) as exc_info:
+            asyncio.run(spool_upload(UploadFile(file=BytesIO(b"x" * 11), filename="a.xlsx")))
+        
+        assert exc_info.value.status_code == 413
+    
+    def test_iter_sheet_rows_pads_short_rows(self):
+        """只读模式下较短的行按指定宽度补齐"""
+        wb = Workbook()
+        ws = wb.active
+        ws.append(["学号", "姓名", "性别"])
+        ws.append(["2024001"])
+        ws.append(["2024002", "李四", "女"])
+        output = BytesIO()
+        wb.save(output)
+        
+        wb = open_workbook(output.getvalue())
+        rows = list(iter_sheet_rows(wb.active, min_row=2, width=3))
+        wb.close()
+        
+        assert rows == [(2, ("2024001", None, None)), (3, ("2024002", "李四", "女"))]
+    
+    def test_chunked(self):
+        """按固定大小切分批次"""
+        assert list(chunked(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+        assert list(chunked([], 3)) == []
+    
+    def test_open_table_reads_gbk_csv(self):
+        """GBK编码的CSV按文件名作为工作表名称，空单元格为 None"""
+        content = "学号,姓名,性别\n2024001,张三,男\n2024002,,女\n".encode("gbk")
+        
+        reader = open_table(content, "一年级-1班.csv")
+        rows = list(reader.active.iter_rows(min_row=2, width=3))
+        
+        assert reader.active.title == "一年级-1班"
+        assert rows == [(2, ("2024001", "张三", "男")), (3, ("2024002", None, "女"))]
+    
+    def test_open_table_reads_utf8_tsv_with_bom(self):
+        """带BOM的UTF-8 TSV文件，支持引号内换行"""
+        content = "\ufeff学号\t备注\n2024001\t\"第一行\n第二行\"\n".encode("utf-8")
+        
+        rows = list(open_table(BytesIO(content), "scores.tsv").active.iter_rows())
+        
+        assert rows == [(1, ("学号", "备注")), (2, ("2024001", "第一行\n第二行"))]
+    
+    def test_resolve_columns_by_header(self):
+        """按表头识别列顺序，无法识别时使用默认顺序"""
+        fields = ("student_no", "event_name", "value")
+        
+        assert resolve_columns(("成绩", "项目名称", "学号"), fields) == [2, 1, 0]
+        assert resolve_columns(("A", "B", "C"), fields) == [0, 1, 2]
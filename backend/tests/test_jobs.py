@@ -0,0 +1,80 @@
+"""
+后台导入任务测试
+"""
+import threading
+
+import pytest
+
+from app.core.config import settings
+from app.core.error_report import ERROR_DUPLICATE
+from app.core.jobs import ImportJob, JobManager
+
+
+class TestJobManager:
+    """后台任务管理器测试类"""
+    
+    def test_job_reports_progress_and_result(self, tmp_path, monkeypatch):
+        """任务执行过程中可读取进度，结束后返回导入结果"""
+        monkeypatch.setattr(settings, "IMPORT_ERROR_REPORT_DIR", str(tmp_path))
+        manager = JobManager(max_workers=1, max_jobs=10)
+        started = threading.Event()
+        release = threading.Event()
+        
+        def work(db, result):
+            result.processed = 2
+            result.success = 1
+            result.add_error("学号'2024001'已存在", 3, "学号", ERROR_DUPLICATE)
+            started.set()
+            release.wait(5)
+        
+        job = manager.submit("student_import", work, created_by=1)
+        assert started.wait(5)
+        
+        info = manager.get(job.id).to_dict()
+        assert info["status"] == ImportJob.RUNNING
+        assert (info["processed"], info["success"], info["failed"]) == (2, 1, 1)
+        
+        release.set()
+        job.future.result(5)
+        assert job.status == ImportJob.SUCCEEDED
+        assert job.result.to_dict() == {
+            "success": 1,
+            "failed": 1,
+            "skipped": 0,
+            "errors": ["第3行: 学号'2024001'已存在"],
+            "error_count": 1,
+            "error_report": f"/api/jobs/{job.id}/errors",
+            "files": [],
+            "dry_run": False,
+            "cached": False
+        }
+        assert job.finished_at is not None
+        manager.shutdown()
+    
+    def test_failed_job_records_message(self):
+        """任务异常时标记为失败并记录原因"""
+        manager = JobManager(max_workers=1, max_jobs=10)
+        
+        def work(db, result):
+            raise ValueError("文件损坏")
+        
+        job = manager.submit("score_import", work)
+        with pytest.raises(ValueError):
+            job.future.result(5)
+        
+        assert job.status == ImportJob.FAILED
+        assert job.message == "文件损坏"
+        manager.shutdown()
+    
+    def test_finished_jobs_are_pruned(self):
+        """超出保留数量时移除最早结束的任务"""
+        manager = JobManager(max_workers=1, max_jobs=2)
+        jobs = []
+        for _ in range(3):
+            job = manager.submit("student_import", lambda db, result: None)
+            job.future.result(5)
+            jobs.append(job)
+        
+        assert manager.get(jobs[0].id) is None
+        assert manager.get(jobs[2].id) is jobs[2]
+        manager.shutdown()
@@ -0,0 +1,68 @@
+"""
+列表接口查询预算测试
+列表接口的查询次数不能随返回行数增长（防止逐行懒加载关联对象的N+1查询）
+"""
+import asyncio
+import inspect
+
+import pytest
+from fastapi.params import Param
+
+from app.api import registrations, scores, students
+from app.models.event import EventGroup
+from app.models.registration import Registration
+from app.models.score import Score
+from tests.factories import create_students, create_event
+
+# 每个列表接口允许的查询次数（计数 + 分页查询，留一次余量）
+LIST_QUERY_BUDGET = 3
+
+
+def call_endpoint(endpoint, **kwargs):
+    """直接调用接口函数，未传入的查询参数使用接口声明的默认值"""
+    for name, param in inspect.signature(endpoint).parameters.items():
+        if name not in kwargs and isinstance(param.default, Param):
+            kwargs[name] = param.default.default
+    return asyncio.run(endpoint(**kwargs))
+
+
+@pytest.fixture
+def meet(db_session):
+    """3个班级、30名学生、2个项目的报名和成绩"""
+    students_ = []
+    for name in ("1班", "2班", "3班"):
+        students_ += create_students(db_session, 10, name)
+    events = [create_event(db_session, "50米", max_per_class=20), create_event(db_session, "跳远", max_per_class=20)]
+    group = EventGroup(event_id=events[0].id, name="男子组", gender="M")
+    db_session.add(group)
+    db_session.flush()
+    registrations_ = [
+        Registration(student_id=s.id, event_id=e.id, group_id=group.id if e is events[0] else None)
+        for s in students_ for e in events
+    ]
+    db_session.add_all(registrations_)
+    db_session.flush()
+    db_session.add_all([Score(registration_id=r.id, value=10, round="final") for r in registrations_])
+    db_session.commit()
+    # 清空会话，确保关联对象需要重新加载
+    db_session.expunge_all()
+
+
+class TestListQueryBudget:
+    """列表接口查询预算测试类"""
+    
+    @pytest.mark.parametrize("endpoint, page_size, kwargs", [
+        (students.get_students, 30, {}),
+        (registrations.get_registrations, 60, {}),
+        (scores.get_scores, 60, {}),
+        (registrations.get_registrations, 60, {"group_name": "男子组"}),
+        (scores.get_scores, 60, {"grade_id": 1}),
+    ])
+    def test_list_within_budget(self, db_session, capture_queries, meet, endpoint, page_size, kwargs):
+        """整页数据（含班级、年级、项目、组别名称）在固定次数的查询内返回"""
+        with capture_queries() as statements:
+            response = call_endpoint(endpoint, page_size=page_size, current_user=None, db=db_session, **kwargs)
+        
+        assert len(response["items"]) == (30 if kwargs.get("group_name") else page_size)
+        assert all(item.class_name for item in response["items"])
+        assert len(statements) <= LIST_QUERY_BUDGET
@@ -0,0 +1,179 @@
+"""
+实时推送测试
+用进程内 ASGI 客户端订阅 /api/live，验证快照、成绩写入后只推送变化的行，以及慢客户端改收快照
+"""
+import asyncio
+import json
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import get_db
+from app.core.live import RESYNC, LiveHub, live_hub
+from app.core.stats_cache import stats_cache
+from app.main import app
+from app.services.event_service import EventService
+from app.services.score_service import ScoreService
+from app.services.statistics_service import publish_live_changes
+from tests.factories import create_meet
+
+
+@pytest.fixture(autouse=True)
+def live_app(db_session):
+    """接口使用测试数据库的独立会话，统计缓存不沿用其他测试数据库的结果"""
+    Session = sessionmaker(bind=db_session.get_bind())
+    
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+    
+    stats_cache.clear()
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    app.dependency_overrides.pop(get_db, None)
+    stats_cache.clear()
+
+
+class LiveClient:
+    """进程内 ASGI 客户端：发起 GET 请求并逐条读取 SSE 消息"""
+    
+    def __init__(self, path: str, query: str = ""):
+        self.scope = {
+            "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+            "root_path": "", "headers": [(b"host", b"test")],
+            "client": ("127.0.0.1", 1234), "server": ("test", 80),
+        }
+        self.messages = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+        self.buffer = ""
+        self.task = None
+    
+    async def receive(self):
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+    
+    async def send(self, message):
+        await self.messages.put(message)
+    
+    async def __aenter__(self):
+        self.task = asyncio.create_task(app(self.scope, self.receive, self.send))
+        start = await asyncio.wait_for(self.messages.get(), 5)
+        assert start["status"] == 200
+        return self
+    
+    async def __aexit__(self, *exc):
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, 5)
+    
+    async def next_event(self) -> dict:
+        """下一条 SSE 消息的数据（跳过心跳）"""
+        while "\n\n" not in self.buffer:
+            message = await asyncio.wait_for(self.messages.get(), 5)
+            self.buffer += message.get("body", b"").decode()
+        block, self.buffer = self.buffer.split("\n\n", 1)
+        data = [line[len("data: "):] for line in block.split("\n") if line.startswith("data: ")]
+        if not data:
+            return await self.next_event()
+        return json.loads(data[0])
+
+
+class TestLive:
+    """实时推送测试类"""
+    
+    def test_snapshot_then_changed_rows(self, db_session):
+        """连接后收到快照；每次成绩写入只推送变化的行，没有变化时不推送"""
+        classes, registrations = create_meet(db_session)
+        ids = [r.id for r in registrations]
+        class_ids = [c.id for c in classes]
+        service = ScoreService(db_session)
+        
+        async def scenario():
+            async with LiveClient("/api/live") as client:
+                snapshot = await client.next_event()
+                assert snapshot["type"] == "snapshot"
+                assert [(t["type"], t["rows"]) for t in snapshot["topics"]] == [
+                    ("class-total", []), ("grade-medals", [])
+                ]
+                
+                service.create_score(ids[0], 12.0)
+                ranking = await client.next_event()
+                assert ranking["type"] == "event-ranking" and ranking["remove"] == []
+                assert [(r["rank"], r["points"]) for r in ranking["upsert"]] == [(1, 9)]
+                totals = await client.next_event()
+                assert [(r["class"]["id"], r["total_score"]) for r in totals["upsert"]] == [(class_ids[0], 9)]
+                medals = await client.next_event()
+                assert medals["type"] == "grade-medals" and len(medals["upsert"]) == 1
+                
+                service.create_score(ids[2], 12.5)
+                ranking = await client.next_event()
+                assert [(r["rank"], r["student"]["name"]) for r in ranking["upsert"]] == [(2, "学生2")]
+                totals = await client.next_event()
+                assert [(r["class"]["id"], r["total_score"]) for r in totals["upsert"]] == [(class_ids[1], 7)]
+                assert totals["seq"] > ranking["seq"]
+                
+                assert publish_live_changes(db_session, [ranking["event_id"]]) == 0
+        
+        asyncio.run(scenario())
+        assert not live_hub.has_subscribers
+    
+    def test_event_rule_change_pushes_ranking(self, db_session):
+        """修改项目计分规则后推送新的得分和榜单"""
+        classes, registrations = create_meet(db_session)
+        ScoreService(db_session).create_score(registrations[0].id, 12.0)
+        event_id = registrations[0].event_id
+        
+        async def scenario():
+            async with LiveClient("/api/live", f"event_id={event_id}") as client:
+                await client.next_event()
+                
+                EventService(db_session).update_event(event_id, scoring_rule={"1": 5})
+                ranking = await client.next_event()
+                assert ranking["type"] == "event-ranking"
+                assert [(r["rank"], r["points"]) for r in ranking["upsert"]] == [(1, 5)]
+                totals = await client.next_event()
+                assert [(r["class"]["id"], r["total_score"]) for r in totals["upsert"]] == [(classes[0].id, 5)]
+        
+        asyncio.run(scenario())
+    
+    def test_slow_client_receives_snapshot(self):
+        """队列写满时丢弃积压的变化，改为重发包含最新结果的快照"""
+        hub = LiveHub(queue_size=2)
+        topic = ("class-total",)
+        
+        def totals(points):
+            return [{"rank": 1, "class": {"id": 1, "name": "1班"}, "total_score": points}]
+        
+        async def scenario():
+            subscriber = hub.subscribe()
+            hub.snapshot(subscriber)
+            for points in (1, 2, 3):
+                hub.publish({topic: totals(points)})
+            await asyncio.sleep(0)
+            
+            assert subscriber.queue.get_nowait() is RESYNC
+            assert subscriber.queue.empty()
+            snapshot = hub.snapshot(subscriber)
+            assert snapshot["seq"] == 3 and snapshot["topics"][0]["rows"] == totals(3)
+            
+            hub.publish({topic: totals(3)})
+            hub.publish({topic: totals(4)})
+            await asyncio.sleep(0)
+            assert subscriber.queue.get_nowait()["upsert"] == totals(4)
+            
+            hub.unsubscribe(subscriber)
+            assert not hub.has_topic(topic)
+        
+        asyncio.run(scenario())
+    
+    def test_no_subscribers_skips_computation(self, db_session):
+        """没有实时连接时成绩写入不计算推送结果"""
+        _, registrations = create_meet(db_session)
+        
+        ScoreService(db_session).create_score(registrations[0].id, 12.0)
+        
+        assert stats_cache.stats()["misses"] == 0
+        assert not live_hub.has_topic(("class-total",))
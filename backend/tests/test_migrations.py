@@ -0,0 +1,121 @@
+"""
+数据库迁移与查询计划测试
+"""
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.core import migrations
+from app.core.query_audit import capture_selects, find_full_scans
+from app.models.base_model import Base
+from app.models.base import Student
+from app.models.registration import Registration
+from app.models.score import Score
+from app.services.base_service import BaseService
+from app.services.statistics_service import StatisticsService, diff_standings
+from tests.factories import create_meet
+
+
+@pytest.fixture
+def engine():
+    """使用最新模型创建的内存数据库"""
+    from app.models import user, base, event, registration, score, announcement, log
+    engine = create_engine("sqlite:///:memory:", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def index_names(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+class TestMigrations:
+    """数据库迁移测试类"""
+    
+    def test_upgrade_brings_old_schema_up_to_date(self, engine):
+        """旧结构的数据库执行迁移后补齐字段、表和索引，并记录版本"""
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_registrations_event_group"))
+            conn.execute(text("DROP INDEX ix_scores_registration_round_valid"))
+            conn.execute(text("ALTER TABLE registrations DROP COLUMN heat_no"))
+            conn.execute(text("DROP TABLE student_quotas"))
+        
+        executed = migrations.upgrade(engine)
+        
+        assert [m.version for m in executed] == [m.version for m in migrations.MIGRATIONS]
+        assert "ix_registrations_event_group" in index_names(engine, "registrations")
+        assert "ix_scores_registration_round_valid" in index_names(engine, "scores")
+        assert "heat_no" in {c["name"] for c in inspect(engine).get_columns("registrations")}
+        assert inspect(engine).has_table("student_quotas")
+        assert migrations.upgrade(engine) == []
+    
+    def test_upgrade_ranks_existing_scores(self, engine):
+        """停在版本5、已有成绩的数据库执行迁移后补算名次得分并汇总榜单"""
+        db = Session(bind=engine)
+        classes, registrations = create_meet(db)
+        db.add_all([
+            Score(registration_id=registrations[0].id, value=12.0, rank=None, points=0),
+            Score(registration_id=registrations[2].id, value=11.5, rank=None, points=0),
+            Score(registration_id=registrations[1].id, value=11.0, rank=1, points=9, is_valid=False),
+        ])
+        db.commit()
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE class_standings"))
+            conn.execute(text("DROP TABLE grade_standings"))
+        versions = [m.version for m in migrations.MIGRATIONS]
+        migrations.stamp(engine)
+        with engine.begin() as conn:
+            conn.execute(migrations.schema_migrations.delete().where(
+                migrations.schema_migrations.c.version > 5
+            ))
+        
+        executed = migrations.upgrade(engine)
+        
+        assert [m.version for m in executed] == [v for v in versions if v > 5]
+        assert [(s.rank, s.points) for s in db.query(Score).order_by(Score.id)] == [(2, 7), (1, 9), (None, 0)]
+        assert diff_standings(db) == []
+        assert [r["class"]["id"] for r in StatisticsService(db).get_class_total()] == [
+            classes[1].id, classes[0].id
+        ]
+        db.close()
+    
+    def test_stamp_marks_new_database_current(self, engine):
+        """create_all 新建的数据库标记后没有待执行的迁移"""
+        migrations.stamp(engine)
+        
+        assert migrations.pending_migrations(engine) == []
+        assert migrations.applied_versions(engine) == [m.version for m in migrations.MIGRATIONS]
+    
+    def test_versions_are_unique_and_ordered(self):
+        """迁移版本号唯一且递增"""
+        versions = [m.version for m in migrations.MIGRATIONS]
+        assert versions == sorted(set(versions))
+
+
+class TestQueryAudit:
+    """查询计划检查测试类"""
+    
+    def test_indexed_filters_do_not_scan(self, engine):
+        """按班级筛选学生、按项目+组别筛选报名使用索引"""
+        db = Session(bind=engine)
+        with capture_selects(engine) as statements:
+            BaseService(db).get_student_list(class_id=1)
+            db.query(Registration.id).filter(Registration.event_id == 1, Registration.group_id == 2).all()
+        
+        with engine.connect() as conn:
+            assert statements
+            for statement, parameters in statements:
+                assert find_full_scans(conn, statement, parameters) == []
+        db.close()
+    
+    def test_unindexed_filter_is_reported(self, engine):
+        """按无索引的字段筛选时报告全表扫描"""
+        db = Session(bind=engine)
+        with capture_selects(engine) as statements:
+            db.query(Student.id).filter(Student.name == "张三").all()
+        
+        with engine.connect() as conn:
+            assert find_full_scans(conn, *statements[0]) == ["SCAN students"]
+        db.close()
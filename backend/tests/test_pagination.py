@@ -0,0 +1,74 @@
+"""
+分页测试
+验证游标分页和总数计算方式
+"""
+from app.core.config import settings
+from app.core.pagination import page_response, TOTAL_ESTIMATE, TOTAL_NONE
+from app.models.announcement import Announcement
+from app.services.announcement_service import AnnouncementService
+from app.services.base_service import BaseService
+from tests.factories import create_students
+
+
+class TestPagination:
+    """分页测试类"""
+    
+    def test_cursor_pages_cover_all_rows_once(self, db_session):
+        """按游标翻页依次取完全部记录，不重复不遗漏"""
+        students = create_students(db_session, 7)
+        expected = [s.id for s in students]
+        service = BaseService(db_session)
+        
+        seen = []
+        after = None
+        while True:
+            items, total = service.get_student_list(page_size=3, after=after, total=TOTAL_NONE)
+            response = page_response(items, total, 1, 3, TOTAL_NONE)
+            seen += [s.id for s in items]
+            after = response["next_after"]
+            if after is None:
+                break
+        
+        assert seen == expected
+        assert total is None
+    
+    def test_cursor_matches_offset_pages(self, db_session):
+        """游标分页与页码分页结果一致"""
+        students = create_students(db_session, 5)
+        service = BaseService(db_session)
+        
+        first, total = service.get_student_list(page=1, page_size=2)
+        second, _ = service.get_student_list(page=2, page_size=2)
+        by_cursor, _ = service.get_student_list(page_size=2, after=first[-1].id)
+        
+        assert total == 5
+        assert [s.id for s in by_cursor] == [s.id for s in second]
+    
+    def test_descending_cursor_for_announcements(self, db_session):
+        """公示按创建先后倒序，游标取更早的记录"""
+        db_session.add_all([
+            Announcement(title=f"公示{i}", share_code=f"code{i}", content_type="class") for i in range(4)
+        ])
+        db_session.commit()
+        service = AnnouncementService(db_session)
+        
+        first, total = service.get_announcement_list(page_size=2)
+        rest, _ = service.get_announcement_list(page_size=2, after=first[-1].id)
+        
+        assert total == 4
+        assert [a.title for a in first + rest] == ["公示3", "公示2", "公示1", "公示0"]
+    
+    def test_estimate_counts_up_to_limit(self, db_session, monkeypatch):
+        """上限计数达到上限时返回上限值并标记为不精确"""
+        monkeypatch.setattr(settings, "PAGINATION_ESTIMATE_LIMIT", 4)
+        create_students(db_session, 6)
+        service = BaseService(db_session)
+        
+        items, total = service.get_student_list(page_size=2, total=TOTAL_ESTIMATE)
+        
+        assert total == 4
+        assert page_response(items, total, 1, 2, TOTAL_ESTIMATE)["total_exact"] is False
+        
+        items, total = service.get_student_list(page_size=2, class_id=999, total=TOTAL_ESTIMATE)
+        assert (items, total) == ([], 0)
+        assert page_response(items, total, 1, 2, TOTAL_ESTIMATE)["total_exact"] is True
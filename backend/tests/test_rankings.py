@@ -0,0 +1,120 @@
+"""
+排名计算测试
+验证名次和得分在成绩写入的事务中计算，排名查询只读
+"""
+from app.core.dimension_cache import dimension_cache
+from app.models.event import Event
+from app.models.score import Score
+from app.services.score_service import ScoreService
+from app.services.statistics_service import StatisticsService
+from tests.factories import SCORE_HEADER, build_workbook, create_registrations
+
+SCORING_RULE = {"1": 9, "2": 7, "3": 6}
+
+
+def set_scoring_rule(db_session):
+    for event in db_session.query(Event).all():
+        event.scoring_rule = SCORING_RULE
+    db_session.commit()
+
+
+def ranks(db_session):
+    """各成绩的 (成绩值, 是否有效, 名次, 得分)，按成绩ID排序"""
+    return [
+        (float(score.value), score.is_valid, score.rank, score.points)
+        for score in db_session.query(Score).order_by(Score.id)
+    ]
+
+
+class TestRankings:
+    """排名计算测试类"""
+    
+    def test_score_writes_maintain_ranking(self, db_session):
+        """录入、覆盖、修改、作废成绩后名次和得分随之更新"""
+        registrations = create_registrations(db_session)
+        set_scoring_rule(db_session)
+        service = ScoreService(db_session)
+        
+        service.create_score(registrations[0].id, 13.0)
+        second, _ = service.create_score(registrations[2].id, 12.5)
+        assert ranks(db_session) == [(13.0, True, 2, 7), (12.5, True, 1, 9)]
+        
+        service.create_score(registrations[0].id, 12.0, overwrite=True)
+        assert ranks(db_session) == [(13.0, False, None, 0), (12.5, True, 2, 7), (12.0, True, 1, 9)]
+        
+        service.update_score(second.id, 11.9, reason="计时更正")
+        assert ranks(db_session)[1:] == [(11.9, True, 1, 9), (12.0, True, 2, 7)]
+        
+        service.invalidate_score(second.id, reason="犯规")
+        assert ranks(db_session)[1:] == [(11.9, False, None, 0), (12.0, True, 1, 9)]
+    
+    def test_field_event_ranks_descending(self, db_session):
+        """田赛成绩越大名次越靠前"""
+        registrations = create_registrations(db_session)
+        set_scoring_rule(db_session)
+        content = build_workbook([
+            ("2024001", "跳远", 4.1),
+            ("2024001", "100米", 13.0),
+            ("2024002", "100米", 12.5),
+        ], header=SCORE_HEADER)
+        
+        ScoreService(db_session).import_scores(content)
+        
+        assert ranks(db_session) == [(4.1, True, 1, 9), (13.0, True, 2, 7), (12.5, True, 1, 9)]
+    
+    def test_get_event_ranking_is_read_only(self, db_session, capture_queries):
+        """排名查询只执行一条SELECT（班级、年级名称取自维度缓存），不提交"""
+        registrations = create_registrations(db_session)
+        set_scoring_rule(db_session)
+        service = ScoreService(db_session)
+        service.create_score(registrations[0].id, 13.0)
+        service.create_score(registrations[2].id, 12.5)
+        event_id = registrations[0].event_id
+        dimension_cache.get(db_session)
+        
+        with capture_queries() as statements:
+            rankings = StatisticsService(db_session).get_event_ranking(event_id)
+        
+        assert [(r["rank"], r["student"]["name"], r["points"]) for r in rankings] == [(1, "李四", 9), (2, "张三", 7)]
+        assert rankings[0]["student"]["class_name"] == "1班"
+        assert len(statements) == 1 and statements[0][0].lstrip().upper().startswith("SELECT")
+        assert not db_session.dirty
+    
+    def test_scoring_rule_change_updates_points(self, db_session):
+        """修改计分规则后在同一事务中重新计算得分"""
+        registrations = create_registrations(db_session)
+        set_scoring_rule(db_session)
+        service = ScoreService(db_session)
+        service.create_score(registrations[0].id, 13.0)
+        service.create_score(registrations[2].id, 12.5)
+        
+        StatisticsService(db_session).update_scoring_rules({"1": 5, "2": 3})
+        
+        assert ranks(db_session) == [(13.0, True, 2, 3), (12.5, True, 1, 5)]
+    
+    def test_recalculate_all_with_and_without_window_functions(self, db_session, monkeypatch):
+        """全量重算：窗口函数与按分区排序编号的结果一致，作废成绩的名次被清空"""
+        from app.services import statistics_service
+        
+        registrations = create_registrations(db_session)
+        set_scoring_rule(db_session)
+        db_session.add_all([
+            Score(registration_id=registrations[0].id, value=13.0, round="final", rank=5, points=1),
+            Score(registration_id=registrations[2].id, value=12.5, round="final"),
+            Score(registration_id=registrations[0].id, value=12.9, round="preliminary"),
+            Score(registration_id=registrations[1].id, value=4.1, round="final"),
+            Score(registration_id=registrations[2].id, value=11.0, round="final", is_valid=False, rank=1, points=9),
+        ])
+        db_session.commit()
+        expected = [
+            (13.0, True, 2, 7), (12.5, True, 1, 9), (12.9, True, 1, 9), (4.1, True, 1, 9), (11.0, False, None, 0)
+        ]
+        
+        StatisticsService(db_session).recalculate_all_rankings()
+        assert ranks(db_session) == expected
+        
+        db_session.query(Score).update({"rank": None, "points": 0})
+        db_session.commit()
+        monkeypatch.setattr(statistics_service, "supports_window_functions", lambda db: False)
+        StatisticsService(db_session).recalculate_all_rankings()
+        assert ranks(db_session) == expected
@@ -0,0 +1,102 @@
+"""
+批量报名测试
+验证分组查询加载 + 内存校验 + 同一事务写入的批量报名流程
+"""
+from app.core.dimension_cache import dimension_cache
+from app.models.event import EventGroup
+from app.models.registration import Registration
+from app.services.registration_service import RegistrationService
+from tests.factories import create_students, create_event
+
+
+class TestRegistrationBatch:
+    """批量报名测试类"""
+    
+    def test_batch_creates_registrations(self, db_session):
+        """合法条目全部写入并返回报名ID"""
+        students = create_students(db_session, 2)
+        event = create_event(db_session)
+        group = EventGroup(event_id=event.id, name="男子组", gender="M")
+        db_session.add(group)
+        db_session.commit()
+        
+        verdicts = RegistrationService(db_session).create_registrations(
+            [(students[0].id, event.id, group.id), (students[1].id, event.id, None)],
+            created_by=1
+        )
+        
+        registrations = {
+            r.student_id: r for r in db_session.query(Registration).all()
+        }
+        assert verdicts == [
+            (registrations[students[0].id].id, ""),
+            (registrations[students[1].id].id, "")
+        ]
+        assert registrations[students[0].id].group_id == group.id
+        assert registrations[students[0].id].created_by == 1
+    
+    def test_rules_interact_within_batch(self, db_session):
+        """批次内的报名计入重复、班级限报和个人限报校验"""
+        students = create_students(db_session, 3)
+        run = create_event(db_session, "50米", max_per_class=2, max_per_student=1)
+        jump = create_event(db_session, "跳远")
+        db_session.add(Registration(student_id=students[2].id, event_id=jump.id))
+        db_session.commit()
+        
+        verdicts = RegistrationService(db_session).create_registrations([
+            (students[0].id, run.id, None),
+            (students[0].id, run.id, None),
+            (students[1].id, run.id, None),
+            (students[2].id, run.id, None),
+            (students[0].id, jump.id, None),
+        ])
+        
+        assert [error for _, error in verdicts] == [
+            "",
+            "该学生已报名此项目",
+            "",
+            "该班级报名人数已达上限(2人)",
+            "该学生报名项目数已达上限(1项)",
+        ]
+        assert db_session.query(Registration).count() == 3
+    
+    def test_invalid_items_are_reported(self, db_session):
+        """学生、项目、组别不合法的条目逐条返回错误，不影响其他条目"""
+        students = create_students(db_session, 1)
+        event = create_event(db_session)
+        other = create_event(db_session, "跳远")
+        girls = EventGroup(event_id=event.id, name="女子组", gender="F")
+        other_group = EventGroup(event_id=other.id, name="男子组", gender="M")
+        db_session.add_all([girls, other_group])
+        db_session.commit()
+        
+        verdicts = RegistrationService(db_session).create_registrations([
+            (9999, event.id, None),
+            (students[0].id, 9999, None),
+            (students[0].id, event.id, other_group.id),
+            (students[0].id, event.id, girls.id),
+            (students[0].id, event.id, None),
+        ])
+        
+        assert [error for _, error in verdicts] == [
+            "学生不存在",
+            "项目不存在",
+            "组别不存在或不属于该项目",
+            "该组别不允许该性别参加",
+            "",
+        ]
+        assert verdicts[-1][0] is not None
+    
+    def test_query_count_does_not_grow_with_items(self, db_session, capture_queries):
+        """查询次数与条目数无关（维度缓存预先加载）"""
+        event = create_event(db_session, max_per_class=1000)
+        dimension_cache.get(db_session)
+        
+        def count_statements(class_name, count):
+            items = [(student.id, event.id, None) for student in create_students(db_session, count, class_name)]
+            with capture_queries() as statements:
+                verdicts = RegistrationService(db_session).create_registrations(items)
+            assert all(not error for _, error in verdicts)
+            return len(statements)
+        
+        assert count_statements("1班", 3) == count_statements("2班", 40)
@@ -0,0 +1,205 @@
+"""
+报名批量导入测试
+验证导入缓存解析 + 忽略重复报名的批量写入流程
+"""
+import zipfile
+from io import BytesIO
+
+from openpyxl import Workbook
+
+from app.models.base import Grade, Class, Student
+from app.models.event import Event, EventGroup
+from app.core.config import settings
+from app.models.registration import Registration
+from app.services.registration_service import RegistrationService
+
+
+def build_registration_workbook(sheets) -> bytes:
+    """构建报名表，sheets: {工作表名: [行数据]}"""
+    wb = Workbook()
+    wb.remove(wb.active)
+    for title, rows in sheets.items():
+        ws = wb.create_sheet(title)
+        for row in rows:
+            ws.append(list(row))
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def create_events(db_session):
+    """创建项目和组别"""
+    run = Event(name="50米", type="track", unit="秒")
+    jump = Event(name="跳远", type="field", unit="米")
+    db_session.add_all([run, jump])
+    db_session.flush()
+    group = EventGroup(event_id=run.id, name="男子组", gender="M")
+    db_session.add(group)
+    db_session.commit()
+    return run, jump, group
+
+
+HEADER = ("序号", "学号", "姓名", "性别", "项目名称", "组别名称")
+
+
+class TestRegistrationImport:
+    """报名批量导入测试类"""
+    
+    def test_import_creates_students_and_registrations(self, db_session):
+        """自动创建年级、班级、学生，并按组别标题写入报名"""
+        run, jump, group = create_events(db_session)
+        content = build_registration_workbook({
+            "一年级-1班": [
+                ("【50米 - 男子组】（每班限报3人）",),
+                HEADER,
+                (1, "2024001", "张三", "男", "", ""),
+                (2, "2024002", "李四", "女", "跳远", "默认组"),
+            ],
+            "一年级-2班": [
+                HEADER,
+                (1, "2024003", "王五", "男", "50米", "男子组"),
+            ],
+        })
+        
+        result = RegistrationService(db_session).import_registrations(content)
+        
+        assert (result.success, result.failed, result.skipped, result.errors) == (3, 0, 0, [])
+        assert db_session.query(Grade).count() == 1
+        assert {c.name for c in db_session.query(Class)} == {"1班", "2班"}
+        student = db_session.query(Student).filter(Student.student_no == "2024003").one()
+        assert student.class_.name == "2班"
+        registrations = {
+            (r.student.student_no, r.event_id): r.group_id
+            for r in db_session.query(Registration)
+        }
+        assert registrations == {
+            ("2024001", run.id): group.id,
+            ("2024002", jump.id): None,
+            ("2024003", run.id): group.id,
+        }
+    
+    def test_existing_and_duplicate_registrations_are_skipped(self, db_session):
+        """已报名和文件内重复的记录计入跳过数，不作为失败"""
+        run, jump, _ = create_events(db_session)
+        sheets = {
+            "一年级-1班": [
+                HEADER,
+                (1, "2024001", "张三", "男", "50米", ""),
+                (2, "2024001", "张三", "男", "50米", ""),
+                (3, "2024001", "张三", "男", "铅球", ""),
+            ],
+        }
+        service = RegistrationService(db_session)
+        
+        first = service.import_registrations(build_registration_workbook(sheets), filename="a.xlsx")
+        second = service.import_registrations(build_registration_workbook(sheets))
+        
+        assert (first.success, first.skipped, first.failed) == (1, 1, 1)
+        assert first.errors == ["[a.xlsx] [一年级-1班] 第4行: 项目'铅球'不存在"]
+        assert (second.success, second.skipped, second.failed) == (0, 2, 1)
+        assert db_session.query(Registration).count() == 1
+    
+    def test_query_count_does_not_grow_with_rows(self, db_session, capture_queries):
+        """查询次数与数据行数无关"""
+        run, _, _ = create_events(db_session)
+        run.max_per_class = 1000
+        db_session.add(Grade(name="一年级", sort_order=0))
+        db_session.commit()
+        
+        def count_statements(row_count):
+            rows = [HEADER] + [
+                (i, f"{row_count}{i:04d}", f"学生{i}", "男", "50米", "男子组")
+                for i in range(row_count)
+            ]
+            content = build_registration_workbook({f"一年级-{row_count}班": rows})
+            with capture_queries() as statements:
+                result = RegistrationService(db_session).import_registrations(content)
+            assert result.success == row_count
+            return len(statements)
+        
+        assert count_statements(5) == count_statements(200)
+    
+    def test_import_zip_of_class_forms(self, db_session, monkeypatch):
+        """ZIP中的多个班级报名表并行解析，合并写入并返回各文件结果"""
+        run, jump, _ = create_events(db_session)
+        monkeypatch.setattr(settings, "IMPORT_PARSE_WORKERS", 2)
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("一年级-1班.xlsx", build_registration_workbook({
+                "一年级-1班": [HEADER, (1, "2024001", "张三", "男", "50米", "")],
+            }))
+            zf.writestr("一年级-2班.xlsx", build_registration_workbook({
+                "一年级-2班": [
+                    HEADER,
+                    (1, "2024002", "李四", "女", "跳远", ""),
+                    (2, "2024003", "王五", "男", "铅球", ""),
+                ],
+            }))
+            zf.writestr("说明.txt", "请按班级填写")
+        csv_form = "序号,学号,姓名,性别,项目名称\n1,2024004,赵六,男,50米\n".encode("gbk")
+        
+        result = RegistrationService(db_session).import_registration_files([
+            ("报名表.zip", archive.getvalue()),
+            ("一年级-3班.csv", csv_form),
+        ])
+        
+        assert (result.success, result.failed, result.processed) == (3, 1, 4)
+        assert result.errors == ["[一年级-2班.xlsx] [一年级-2班] 第3行: 项目'铅球'不存在"]
+        assert result.files == [
+            {"filename": "一年级-1班.xlsx", "success": 1, "failed": 0, "skipped": 0},
+            {"filename": "一年级-2班.xlsx", "success": 1, "failed": 1, "skipped": 0},
+            {"filename": "一年级-3班.csv", "success": 1, "failed": 0, "skipped": 0},
+        ]
+        assert {c.name for c in db_session.query(Class)} == {"1班", "2班", "3班"}
+        assert db_session.query(Registration).count() == 3
+    
+    def test_limits_are_checked_in_memory(self, db_session):
+        """超出班级限报人数或个人限报项目数的行记为失败，文件内的报名同样计数"""
+        run, jump, _ = create_events(db_session)
+        run.max_per_class = 2
+        run.max_per_student = 1
+        db_session.commit()
+        content = build_registration_workbook({
+            "一年级-1班": [
+                HEADER,
+                (1, "2024001", "张三", "男", "50米", ""),
+                (2, "2024002", "李四", "女", "50米", ""),
+                (3, "2024003", "王五", "男", "50米", ""),
+                (4, "2024001", "张三", "男", "跳远", ""),
+            ],
+        })
+        
+        result = RegistrationService(db_session).import_registrations(content)
+        
+        assert (result.success, result.failed) == (2, 2)
+        assert result.errors == [
+            "[一年级-1班] 第4行: 该班级报名人数已达上限(2人)",
+            "[一年级-1班] 第5行: 该学生报名项目数已达上限(1项)",
+        ]
+    
+    def test_dry_run_reports_outcome_without_writing(self, db_session):
+        """试运行返回与实际导入一致的结果，但不创建班级、学生和报名"""
+        run, _, _ = create_events(db_session)
+        run.max_per_class = 1
+        db_session.commit()
+        content = build_registration_workbook({
+            "二年级-5班": [
+                HEADER,
+                (1, "2024001", "张三", "男", "50米", ""),
+                (2, "2024001", "张三", "男", "50米", ""),
+                (3, "2024002", "李四", "女", "50米", ""),
+                (4, "2024003", "王五", "男", "铅球", ""),
+            ],
+        })
+        
+        preview = RegistrationService(db_session).import_registrations(content, dry_run=True)
+        
+        assert preview.dry_run is True
+        assert (preview.success, preview.skipped, preview.failed) == (1, 1, 2)
+        assert db_session.query(Grade).count() == 0
+        assert db_session.query(Student).count() == 0
+        assert db_session.query(Registration).count() == 0
+        
+        result = RegistrationService(db_session).import_registrations(content)
+        assert (result.success, result.skipped, result.failed) == (1, 1, 2)
+        assert result.errors == preview.errors
@@ -0,0 +1,98 @@
+"""
+报名计数测试
+验证班级和个人限报通过计数行原子校验，并与报名记录保持一致
+"""
+from app.models.registration import Registration, ClassEventQuota, StudentQuota
+from app.services.base_service import BaseService
+from app.services.registration_service import RegistrationService, RegistrationLimits
+from tests.factories import create_students, create_event
+
+
+def quota_counts(db_session):
+    """读取所有计数行"""
+    classes = {
+        (q.class_id, q.event_id): q.count for q in db_session.query(ClassEventQuota).all()
+    }
+    students = {q.student_id: q.count for q in db_session.query(StudentQuota).all()}
+    return classes, students
+
+
+class TestRegistrationQuota:
+    """报名计数测试类"""
+    
+    def test_counters_seeded_from_existing_registrations(self, db_session):
+        """计数行缺失时按已有报名生成，再原子地占用名额"""
+        students = create_students(db_session, 3)
+        event = create_event(db_session, max_per_class=2)
+        db_session.add(Registration(student_id=students[0].id, event_id=event.id))
+        db_session.commit()
+        service = RegistrationService(db_session)
+        
+        registration, error = service.create_registration(students[1].id, event.id)
+        assert error == "" and registration is not None
+        _, error = service.create_registration(students[2].id, event.id)
+        assert error == "该班级报名人数已达上限(2人)"
+        
+        classes, students_counts = quota_counts(db_session)
+        assert classes == {(students[0].class_id, event.id): 2}
+        assert students_counts == {students[1].id: 1}
+    
+    def test_full_counter_rejects_without_counting(self, db_session):
+        """名额已满时条件UPDATE不命中，失败的报名不改变计数"""
+        students = create_students(db_session, 1)
+        event = create_event(db_session, max_per_student=1)
+        other = create_event(db_session, "跳远")
+        service = RegistrationService(db_session)
+        service.create_registration(students[0].id, event.id)
+        
+        _, error = service.create_registration(students[0].id, other.id)
+        
+        assert error == "该学生报名项目数已达上限(1项)"
+        classes, student_counts = quota_counts(db_session)
+        assert classes == {(students[0].class_id, event.id): 1}
+        assert student_counts == {students[0].id: 1}
+        assert db_session.query(Registration).count() == 1
+    
+    def test_delete_releases_quota(self, db_session):
+        """取消报名释放班级和个人名额"""
+        students = create_students(db_session, 2)
+        event = create_event(db_session, max_per_class=1)
+        service = RegistrationService(db_session)
+        registration, _ = service.create_registration(students[0].id, event.id)
+        
+        assert service.delete_registration(registration.id) == (True, "")
+        registration, error = service.create_registration(students[1].id, event.id)
+        
+        assert error == ""
+        classes, student_counts = quota_counts(db_session)
+        assert classes == {(students[0].class_id, event.id): 1}
+        assert student_counts == {students[0].id: 0, students[1].id: 1}
+    
+    def test_batch_writes_back_counters(self, db_session):
+        """批量报名回写计数，之后的单条报名基于最新计数校验"""
+        students = create_students(db_session, 3)
+        event = create_event(db_session, max_per_class=2)
+        service = RegistrationService(db_session)
+        
+        service.create_registrations([(s.id, event.id, None) for s in students[:2]])
+        _, error = service.create_registration(students[2].id, event.id)
+        
+        assert error == "该班级报名人数已达上限(2人)"
+        classes, _ = quota_counts(db_session)
+        assert classes == {(students[0].class_id, event.id): 2}
+    
+    def test_class_change_resets_counters(self, db_session):
+        """学生调班后两个班级的计数按报名记录重新生成"""
+        students = create_students(db_session, 1, "1班")
+        others = create_students(db_session, 1, "2班")
+        event = create_event(db_session, max_per_class=1)
+        service = RegistrationService(db_session)
+        service.create_registration(students[0].id, event.id)
+        
+        BaseService(db_session).update_student(students[0].id, class_id=others[0].class_id)
+        _, error = service.create_registration(others[0].id, event.id)
+        
+        assert error == "该班级报名人数已达上限(1人)"
+        assert RegistrationLimits(db_session).reserve(
+            students[0].id, students[0].class_id, event.id
+        ) == "该班级报名人数已达上限(1人)"
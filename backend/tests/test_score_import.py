@@ -0,0 +1,100 @@
+"""
+成绩批量导入测试
+验证联表解析报名记录 + 批量作废旧成绩 + 批量插入的导入流程
+"""
+from decimal import Decimal
+
+from app.models.score import Score
+from app.services.score_service import ScoreService
+from tests.factories import SCORE_HEADER, build_workbook, create_registrations
+
+
+class TestScoreImport:
+    """成绩批量导入测试类"""
+    
+    def test_import_scores_inserts_and_supersedes(self, db_session):
+        """已有有效成绩被作废，新成绩写入为有效成绩"""
+        registrations = create_registrations(db_session)
+        old = Score(registration_id=registrations[0].id, value=Decimal("13.2"), round="final")
+        db_session.add(old)
+        db_session.commit()
+        content = build_workbook([
+            ("2024001", "100米", 12.5),
+            ("2024001", "跳远", 4.1),
+            ("2024002", "100米", 13.0),
+        ], header=SCORE_HEADER)
+        
+        result = ScoreService(db_session).import_scores(content, created_by=None)
+        
+        assert (result.success, result.failed, result.errors) == (3, 0, [])
+        db_session.refresh(old)
+        assert old.is_valid is False
+        assert old.invalid_reason == "被新成绩覆盖"
+        valid = db_session.query(Score).filter(Score.is_valid == True).all()
+        assert sorted(float(s.value) for s in valid) == [4.1, 12.5, 13.0]
+    
+    def test_import_scores_reports_row_errors(self, db_session):
+        """逐行错误信息与原有格式一致"""
+        create_registrations(db_session)
+        content = build_workbook([
+            ("2024009", "100米", 12.5),
+            ("2024001", "铅球", 8.0),
+            ("2024002", "跳远", 3.9),
+            ("2024001", "100米", "abc"),
+            ("2024001", "100米", 12.8),
+        ], header=SCORE_HEADER)
+        
+        result = ScoreService(db_session).import_scores(content)
+        
+        assert result.success == 1
+        assert result.errors == [
+            "第2行: 学号'2024009'不存在",
+            "第3行: 项目'铅球'不存在",
+            "第4行: 该学生未报名此项目",
+            "第5行: 成绩格式错误",
+        ]
+        assert db_session.query(Score).count() == 1
+    
+    def test_invalid_round_rejects_file(self, db_session):
+        """轮次不合法时整个文件不导入"""
+        create_registrations(db_session)
+        content = build_workbook([("2024001", "100米", 12.5)], header=SCORE_HEADER)
+        
+        result = ScoreService(db_session).import_scores(content, round="semifinal")
+        
+        assert (result.success, result.file_errors) == (0, 1)
+        assert result.errors == ["轮次必须是preliminary(预赛)或final(决赛)"]
+        assert db_session.query(Score).count() == 0
+    
+    def test_duplicate_rows_in_file_keep_last(self, db_session):
+        """同一报名在文件中出现多次时以最后一行为准"""
+        registrations = create_registrations(db_session)
+        content = build_workbook([
+            ("2024001", "100米", 12.9),
+            ("2024001", "100米", 12.4),
+        ], header=SCORE_HEADER)
+        
+        result = ScoreService(db_session).import_scores(content)
+        
+        assert result.success == 2
+        scores = db_session.query(Score).filter(
+            Score.registration_id == registrations[0].id
+        ).order_by(Score.id).all()
+        assert [(float(s.value), s.is_valid) for s in scores] == [(12.9, False), (12.4, True)]
+        assert scores[0].invalid_reason == "被新成绩覆盖"
+    
+    def test_dry_run_does_not_write(self, db_session):
+        """试运行只校验，不作废旧成绩也不写入新成绩"""
+        registrations = create_registrations(db_session)
+        db_session.add(Score(registration_id=registrations[0].id, value=Decimal("13.2"), round="final"))
+        db_session.commit()
+        content = build_workbook([
+            ("2024001", "100米", 12.5),
+            ("2024009", "100米", 12.5),
+        ], header=SCORE_HEADER)
+        
+        result = ScoreService(db_session).import_scores(content, dry_run=True)
+        
+        assert (result.success, result.failed, result.dry_run) == (1, 1, True)
+        scores = db_session.query(Score).all()
+        assert [(float(s.value), s.is_valid) for s in scores] == [(13.2, True)]
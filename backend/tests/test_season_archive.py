@@ -0,0 +1,101 @@
+"""
+届次归档测试
+"""
+from sqlalchemy import select, func
+
+from app.models.archive import Season, ARCHIVE_TABLES
+from app.models.base import Grade, Class, Student
+from app.models.event import Event
+from app.models.registration import Registration, StudentQuota
+from app.models.score import Score
+from app.services.registration_service import RegistrationService
+from app.services.season_service import SeasonService
+from tests.factories import create_students, create_event
+
+
+def create_season_data(db_session):
+    """创建一届的学生、报名和成绩"""
+    students = create_students(db_session, 3)
+    event = create_event(db_session)
+    service = RegistrationService(db_session)
+    registrations = [service.create_registration(s.id, event.id)[0] for s in students]
+    db_session.add(Score(registration_id=registrations[0].id, value=12.5, round="final"))
+    db_session.commit()
+    return students, event
+
+
+def archived_rows(db_session, table_name, season_id):
+    """归档表中某届的行数"""
+    table = ARCHIVE_TABLES[table_name]
+    return db_session.execute(
+        select(func.count()).select_from(table).where(table.c.season_id == season_id)
+    ).scalar()
+
+
+class TestSeasonArchive:
+    """届次归档测试类"""
+    
+    def test_archive_moves_season_and_empties_live_tables(self, db_session):
+        """本届数据复制到归档表，在用表清空，项目设置保留"""
+        students, event = create_season_data(db_session)
+        expected = [(s.id, s.name) for s in students]
+        
+        season, error = SeasonService(db_session).archive_season("2024年秋季运动会", archived_by=None)
+        
+        assert error == ""
+        assert (season.grade_count, season.class_count, season.student_count) == (1, 1, 3)
+        assert (season.registration_count, season.score_count) == (3, 1)
+        for model in (Grade, Class, Student, Registration, Score, StudentQuota):
+            assert db_session.query(model).count() == 0
+        assert db_session.query(Event).count() == 1
+        assert archived_rows(db_session, "students", season.id) == 3
+        assert archived_rows(db_session, "events", season.id) == 1
+        
+        table = ARCHIVE_TABLES["students"]
+        names = db_session.execute(
+            select(table.c.id, table.c.name).where(table.c.season_id == season.id).order_by(table.c.id)
+        ).all()
+        assert names == expected
+    
+    def test_seasons_are_kept_separately(self, db_session):
+        """连续两届归档互不影响，新一届ID重新从1开始"""
+        service = SeasonService(db_session)
+        first_students, _ = create_season_data(db_session)
+        first_id = first_students[0].id
+        first, _ = service.archive_season("第一届")
+        db_session.query(Event).delete()
+        db_session.commit()
+        
+        second_students, _ = create_season_data(db_session)
+        assert second_students[0].id == first_id
+        second, _ = service.archive_season("第二届")
+        
+        assert archived_rows(db_session, "registrations", first.id) == 3
+        assert archived_rows(db_session, "registrations", second.id) == 3
+        assert [s.name for s in service.get_season_list()] == ["第二届", "第一届"]
+    
+    def test_duplicate_name_rejected(self, db_session):
+        """届次名称不能重复"""
+        service = SeasonService(db_session)
+        service.archive_season("2024")
+        
+        assert service.archive_season("2024") == (None, "届次名称已存在")
+        assert db_session.query(Season).count() == 1
+    
+    def test_clear_all_registrations_empties_tables(self, db_session):
+        """没有成绩时整表清空报名和学生数据"""
+        create_season_data(db_session)
+        db_session.query(Score).delete()
+        db_session.commit()
+        
+        assert RegistrationService(db_session).clear_all_registrations() == (3, "")
+        for model in (Grade, Class, Student, Registration, StudentQuota):
+            assert db_session.query(model).count() == 0
+    
+    def test_clear_all_registrations_refuses_with_scores(self, db_session):
+        """已有成绩时拒绝清空，数据保持不变"""
+        create_season_data(db_session)
+        
+        assert RegistrationService(db_session).clear_all_registrations() == (0, "存在成绩记录，请先归档本届数据")
+        assert db_session.query(Registration).count() == 3
+        assert db_session.query(Score).count() == 1
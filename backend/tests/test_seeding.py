@@ -0,0 +1,117 @@
+"""
+分组编排测试
+"""
+from collections import Counter
+
+from app.models.event import EventGroup
+from app.models.registration import Registration
+from app.models.score import Score
+from app.services.seeding_service import SeedingService, serpentine_heats, center_lanes
+from tests.factories import create_students, create_event
+
+
+def register(db_session, students, event, group_id=None):
+    """为学生报名项目"""
+    registrations = [Registration(student_id=s.id, event_id=event.id, group_id=group_id) for s in students]
+    db_session.add_all(registrations)
+    db_session.commit()
+    return registrations
+
+
+def assignments(db_session, event_id):
+    """读取 报名ID -> (组次, 道次)"""
+    return {
+        r.id: (r.heat_no, r.lane_no)
+        for r in db_session.query(Registration).filter(Registration.event_id == event_id)
+    }
+
+
+class TestSeeding:
+    """分组编排测试类"""
+    
+    def test_serpentine_and_center_lanes(self):
+        """蛇形分组与中间道优先"""
+        assert serpentine_heats(7, 3) == [0, 1, 2, 2, 1, 0, 0]
+        assert center_lanes(8) == [4, 5, 3, 6, 2, 7, 1, 8]
+        assert center_lanes(5) == [3, 2, 4, 1, 5]
+    
+    def test_draw_splits_into_balanced_heats(self, db_session):
+        """无预赛成绩时分为人数均衡的组，组内道次不重复"""
+        students = create_students(db_session, 10)
+        event = create_event(db_session)
+        register(db_session, students, event)
+        
+        result = SeedingService(db_session).seed_events(lane_count=4)
+        
+        assert result == {"events": 1, "heats": 3, "registrations": 10}
+        seeded = assignments(db_session, event.id).values()
+        assert sorted(Counter(heat for heat, _ in seeded).items()) == [(1, 3), (2, 3), (3, 4)]
+        for heat in (1, 2, 3):
+            lanes = [lane for h, lane in seeded if h == heat]
+            assert len(set(lanes)) == len(lanes) and set(lanes) <= {1, 2, 3, 4}
+    
+    def test_preliminary_results_seed_center_lanes(self, db_session):
+        """按预赛成绩排定种子：最好的成绩分散到各组并排在中间道"""
+        students = create_students(db_session, 8)
+        event = create_event(db_session)
+        registrations = register(db_session, students, event)
+        db_session.add_all([
+            Score(registration_id=r.id, value=10 + i, round="preliminary") for i, r in enumerate(registrations)
+        ])
+        db_session.commit()
+        
+        SeedingService(db_session).seed_events(lane_count=4)
+        
+        seeded = assignments(db_session, event.id)
+        assert seeded[registrations[0].id] == (1, 2)
+        assert seeded[registrations[1].id] == (2, 2)
+        assert seeded[registrations[2].id] == (2, 3)
+        assert seeded[registrations[7].id] == (1, 4)
+    
+    def test_groups_numbered_within_event(self, db_session):
+        """同一项目的组别分别分组，组次在项目内连续编号"""
+        boys = create_students(db_session, 3, "1班", gender="M")
+        girls = create_students(db_session, 3, "2班", gender="F")
+        event = create_event(db_session)
+        male = EventGroup(event_id=event.id, name="男子组", gender="M")
+        female = EventGroup(event_id=event.id, name="女子组", gender="F")
+        db_session.add_all([male, female])
+        db_session.commit()
+        register(db_session, boys, event, male.id)
+        register(db_session, girls, event, female.id)
+        
+        SeedingService(db_session).seed_events(lane_count=2)
+        
+        heats = {
+            r.group_id: set() for r in db_session.query(Registration)
+        }
+        for r in db_session.query(Registration):
+            heats[r.group_id].add(r.heat_no)
+        assert heats == {male.id: {1, 2}, female.id: {3, 4}}
+    
+    def test_random_draw_is_reproducible_with_seed(self, db_session):
+        """相同随机种子得到相同的编排"""
+        students = create_students(db_session, 12)
+        event = create_event(db_session)
+        register(db_session, students, event)
+        service = SeedingService(db_session)
+        
+        service.seed_events(draw="random", seed=7)
+        first = assignments(db_session, event.id)
+        service.seed_events(draw="random", seed=7)
+        
+        assert assignments(db_session, event.id) == first
+    
+    def test_one_update_per_event(self, db_session, capture_queries):
+        """三次查询加每个项目一次批量UPDATE"""
+        students = create_students(db_session, 30)
+        events = [create_event(db_session, f"项目{i}") for i in range(4)]
+        for event in events:
+            register(db_session, students, event)
+        
+        with capture_queries() as statements:
+            result = SeedingService(db_session).seed_events()
+        
+        assert result["registrations"] == 120
+        assert len([s for s, _ in statements if s.startswith("UPDATE")]) == 4
+        assert len([s for s, _ in statements if s.startswith("SELECT")]) == 3
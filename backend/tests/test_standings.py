@@ -0,0 +1,106 @@
+"""
+班级总分榜、年级奖牌榜测试
+验证榜单在成绩写入的事务中按差值更新，并与从成绩表重新汇总的结果一致
+"""
+from app.models.score import ClassStanding
+from app.services.base_service import BaseService
+from app.services.score_service import ScoreService
+from app.services.statistics_service import StatisticsService, diff_standings, rebuild_standings
+from tests.factories import create_meet
+
+
+def class_totals(db_session):
+    return [
+        (r["class"]["id"], r["total_score"], r["gold"], r["silver"], r["bronze"])
+        for r in StatisticsService(db_session).get_class_total()
+    ]
+
+
+class TestStandings:
+    """榜单测试类"""
+    
+    def test_score_writes_update_standings(self, db_session):
+        """录入、作废成绩和修改计分规则后榜单随之更新，与重新汇总一致"""
+        classes, registrations = create_meet(db_session)
+        service = ScoreService(db_session)
+        
+        service.create_score(registrations[0].id, 12.0)
+        service.create_score(registrations[2].id, 12.5)
+        score, _ = service.create_score(registrations[3].id, 11.5)
+        assert class_totals(db_session) == [(classes[1].id, 15, 1, 0, 1), (classes[0].id, 7, 0, 1, 0)]
+        assert diff_standings(db_session) == []
+        
+        service.invalidate_score(score.id, reason="犯规")
+        assert class_totals(db_session) == [(classes[0].id, 9, 1, 0, 0), (classes[1].id, 7, 0, 1, 0)]
+        assert diff_standings(db_session) == []
+        
+        StatisticsService(db_session).update_scoring_rules({"1": 5, "2": 3})
+        assert class_totals(db_session) == [(classes[0].id, 5, 1, 0, 0), (classes[1].id, 3, 0, 1, 0)]
+        assert diff_standings(db_session) == []
+        
+        medals = StatisticsService(db_session).get_grade_medals()
+        assert [(r["grade"]["name"], r["gold"], r["silver"], r["total"]) for r in medals] == [
+            ("一年级", 1, 0, 1), ("二年级", 0, 1, 1)
+        ]
+    
+    def test_preliminary_scores_not_counted(self, db_session):
+        """预赛成绩不计入榜单"""
+        _, registrations = create_meet(db_session)
+        
+        ScoreService(db_session).create_score(registrations[0].id, 12.0, round="preliminary")
+        
+        assert class_totals(db_session) == []
+        assert db_session.query(ClassStanding).count() == 0
+    
+    def test_student_transfer_moves_points(self, db_session):
+        """学生调班后成绩计入新班级"""
+        classes, registrations = create_meet(db_session)
+        ScoreService(db_session).create_score(registrations[0].id, 12.0)
+        student_id = registrations[0].student_id
+        
+        BaseService(db_session).update_student(student_id, class_id=classes[1].id)
+        
+        assert class_totals(db_session) == [(classes[1].id, 9, 1, 0, 0)]
+        assert diff_standings(db_session) == []
+    
+    def test_class_grade_change_moves_medals(self, db_session):
+        """班级调年级后只移动该班级的成绩，其他班级不变"""
+        classes, registrations = create_meet(db_session)
+        service = ScoreService(db_session)
+        service.create_score(registrations[0].id, 12.0)
+        service.create_score(registrations[2].id, 12.5)
+        
+        BaseService(db_session).update_class(classes[1].id, name="2班", grade_id=classes[0].grade_id)
+        
+        medals = StatisticsService(db_session).get_grade_medals()
+        assert [(r["grade"]["name"], r["gold"], r["silver"]) for r in medals] == [("一年级", 1, 1)]
+        assert diff_standings(db_session) == []
+    
+    def test_rejected_update_keeps_standings(self, db_session):
+        """学号重复时拒绝修改，学生和榜单保持不变"""
+        classes, registrations = create_meet(db_session)
+        ScoreService(db_session).create_score(registrations[0].id, 12.0)
+        
+        _, error = BaseService(db_session).update_student(
+            registrations[0].student_id, class_id=classes[1].id, student_no="S1"
+        )
+        
+        assert error == "学号已存在"
+        db_session.rollback()
+        assert class_totals(db_session) == [(classes[0].id, 9, 1, 0, 0)]
+        assert diff_standings(db_session) == []
+    
+    def test_diff_and_rebuild(self, db_session):
+        """榜单被改动时检查能发现不一致，重建后恢复一致"""
+        classes, registrations = create_meet(db_session)
+        ScoreService(db_session).create_score(registrations[0].id, 12.0)
+        db_session.query(ClassStanding).update({"points": 100})
+        db_session.commit()
+        
+        assert diff_standings(db_session) == [
+            ("class_standings", classes[0].id, (1, 100, 1, 0, 0), (1, 9, 1, 0, 0))
+        ]
+        
+        rebuild_standings(db_session)
+        db_session.commit()
+        assert diff_standings(db_session) == []
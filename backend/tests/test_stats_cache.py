@@ -0,0 +1,67 @@
+"""
+统计结果缓存测试
+验证按数据版本命中、LRU淘汰，以及成绩写入只使对应项目的排名缓存失效
+"""
+from app.core.stats_cache import StatsCache, stats_cache
+from app.services.registration_service import RegistrationService
+from app.services.score_service import ScoreService
+from tests.factories import create_registrations
+
+
+class Counter:
+    """记录调用次数的计算函数"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def __call__(self):
+        self.calls += 1
+        return self.calls
+
+
+class TestStatsCache:
+    """统计结果缓存测试类"""
+    
+    def test_hit_and_lru_eviction(self):
+        """相同接口和参数命中缓存；超过上限时淘汰最久未使用的条目"""
+        cache = StatsCache(max_entries=2)
+        compute = Counter()
+        
+        assert cache.get_or_compute("class-total", (1,), compute) == 1
+        assert cache.get_or_compute("class-total", (1,), compute) == 1
+        assert cache.get_or_compute("class-total", (2,), compute) == 2
+        cache.get_or_compute("class-total", (1,), compute)
+        cache.get_or_compute("grade-medals", (), compute)
+        
+        assert compute.calls == 3
+        assert cache.get_or_compute("class-total", (1,), compute) == 1
+        assert cache.get_or_compute("class-total", (2,), compute) == 4
+        assert cache.stats() == {"entries": 2, "max_entries": 2, "hits": 3, "misses": 4, "version": 0}
+    
+    def test_event_bump_only_invalidates_that_event(self):
+        """项目写入只使该项目的排名和汇总结果失效，公共写入使全部失效"""
+        cache = StatsCache(max_entries=10)
+        compute = Counter()
+        cache.get_or_compute("event-ranking", (1,), compute, event_id=1)
+        cache.get_or_compute("event-ranking", (2,), compute, event_id=2)
+        cache.get_or_compute("class-total", (None,), compute)
+        
+        cache.bump_event(1)
+        assert cache.get_or_compute("event-ranking", (1,), compute, event_id=1) == 4
+        assert cache.get_or_compute("event-ranking", (2,), compute, event_id=2) == 2
+        assert cache.get_or_compute("class-total", (None,), compute) == 5
+        
+        cache.bump_all()
+        assert cache.get_or_compute("event-ranking", (1,), compute, event_id=1) == 6
+        assert cache.get_or_compute("event-ranking", (2,), compute, event_id=2) == 7
+    
+    def test_service_writes_bump_version(self, db_session):
+        """录入成绩、取消报名提交后递增数据版本"""
+        registrations = create_registrations(db_session)
+        
+        version = stats_cache.version
+        ScoreService(db_session).create_score(registrations[0].id, 13.0)
+        assert stats_cache.version == version + 1
+        
+        RegistrationService(db_session).delete_registration(registrations[1].id)
+        assert stats_cache.version == version + 2
@@ -0,0 +1,105 @@
+"""
+学生批量导入测试
+验证预加载维度 + 内存校验 + 批量写入的导入流程
+"""
+from app.core.config import settings
+from app.models.base import Student
+from app.services.base_service import BaseService
+from tests.factories import build_workbook, create_class
+
+
+class TestStudentImport:
+    """学生批量导入测试类"""
+    
+    def test_import_students_inserts_valid_rows(self, db_session):
+        """合法行全部写入，学生归属正确的班级"""
+        class_ = create_class(db_session)
+        content = build_workbook([
+            ("2024001", "张三", "男", "一年级", "1班"),
+            ("2024002", "李四", "女", "一年级", "1班"),
+        ])
+        
+        result = BaseService(db_session).import_students(content)
+        
+        assert (result.success, result.failed, result.errors) == (2, 0, [])
+        assert result.processed == 2
+        students = db_session.query(Student).order_by(Student.student_no).all()
+        assert [s.student_no for s in students] == ["2024001", "2024002"]
+        assert all(s.class_id == class_.id for s in students)
+        assert all(s.created_at is not None for s in students)
+    
+    def test_import_students_reports_row_errors(self, db_session):
+        """逐行错误信息与原有格式一致，文件内重复学号同样被拦截"""
+        create_class(db_session)
+        db_session.add(Student(class_id=1, student_no="2023999", name="王五", gender="M"))
+        db_session.commit()
+        content = build_workbook([
+            ("2024001", "张三", "未知", "一年级", "1班"),
+            ("2024002", "李四", "女", "二年级", "1班"),
+            ("2024003", "赵六", "男", "一年级", "9班"),
+            ("2023999", "王五", "男", "一年级", "1班"),
+            ("2024004", "钱七", "男", "一年级", "1班"),
+            ("2024004", "孙八", "女", "一年级", "1班"),
+        ])
+        
+        result = BaseService(db_session).import_students(content)
+        
+        assert result.success == 1
+        assert result.failed == 5
+        assert result.errors == [
+            "第2行: 性别格式错误，应为'男'或'女'",
+            "第3行: 年级'二年级'不存在",
+            "第4行: 班级'9班'不存在",
+            "第5行: 学号'2023999'已存在",
+            "第7行: 学号'2024004'已存在",
+        ]
+        assert db_session.query(Student).count() == 2
+    
+    def test_import_students_writes_in_chunks(self, db_session, monkeypatch):
+        """超过批次大小的数据分多批写入"""
+        create_class(db_session)
+        monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 3)
+        rows = [(f"2024{i:03d}", f"学生{i}", "男", "一年级", "1班") for i in range(10)]
+        
+        result = BaseService(db_session).import_students(build_workbook(rows))
+        
+        assert (result.success, result.failed) == (10, 0)
+        assert db_session.query(Student).count() == 10
+    
+    def test_import_students_by_class(self, db_session):
+        """按班级导入时所有学生归属指定班级"""
+        class_ = create_class(db_session)
+        content = build_workbook(
+            [("2024001", "张三", "男"), ("2024001", "李四", "女")],
+            header=("学号", "姓名", "性别")
+        )
+        
+        result = BaseService(db_session).import_students_by_class(content, class_.id)
+        
+        assert (result.success, result.failed) == (1, 1)
+        assert result.errors == ["第3行: 学号'2024001'已存在"]
+        assert db_session.query(Student).filter(Student.class_id == class_.id).count() == 1
+    
+    def test_import_students_from_csv(self, db_session):
+        """CSV文件按表头识别列，列顺序可以与模板不同"""
+        class_ = create_class(db_session)
+        content = "班级,年级,姓名,学号,性别\n1班,一年级,张三,2024001,男\n".encode("gbk")
+        
+        result = BaseService(db_session).import_students(content, filename="students.csv")
+        
+        assert (result.success, result.failed, result.errors) == (1, 0, [])
+        student = db_session.query(Student).one()
+        assert (student.student_no, student.name, student.class_id) == ("2024001", "张三", class_.id)
+    
+    def test_import_students_dry_run(self, db_session):
+        """试运行统计将会写入的行数，不写入数据"""
+        create_class(db_session)
+        content = build_workbook([
+            ("2024001", "张三", "男", "一年级", "1班"),
+            ("2024001", "李四", "女", "一年级", "1班"),
+        ])
+        
+        result = BaseService(db_session).import_students(content, dry_run=True)
+        
+        assert (result.success, result.failed, result.dry_run) == (1, 1, True)
+        assert db_session.query(Student).count() == 0
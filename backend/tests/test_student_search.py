@@ -0,0 +1,93 @@
+"""
+学生搜索索引测试
+验证姓名片段/学号前缀检索、增量更新，以及批量写入后的失效重建
+"""
+import pytest
+
+from app.core.student_index import student_index
+from app.models.base import Student
+from app.services.base_service import BaseService
+from tests.factories import create_class, create_students
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    """每个测试使用独立的数据库，索引在前后都标记失效"""
+    student_index.invalidate()
+    yield
+    student_index.invalidate()
+
+
+def add_named_students(db_session, names):
+    """在一年级1班按给定姓名创建学生，学号为 S001 起"""
+    class_ = create_class(db_session)
+    db_session.add_all([
+        Student(class_id=class_.id, student_no=f"S{i:03d}", name=name, gender="M")
+        for i, name in enumerate(names, 1)
+    ])
+    db_session.commit()
+    return class_
+
+
+class TestStudentSearch:
+    """学生搜索测试类"""
+    
+    def test_name_fragment_and_number_prefix(self, db_session):
+        """姓名片段按 n-gram 命中，完全匹配和姓名开头的排在前面；学号按前缀有序返回"""
+        add_named_students(db_session, ["李张三", "张三丰", "张三", "李四"])
+        service = BaseService(db_session)
+        
+        assert [s.name for s in service.search_students("张三")] == ["张三", "张三丰", "李张三"]
+        assert [s.name for s in service.search_students("三丰")] == ["张三丰"]
+        assert [s.name for s in service.search_students("四")] == ["李四"]
+        assert service.search_students("王") == []
+        
+        found = service.search_students("s00", limit=3)
+        assert [s.student_no for s in found] == ["S001", "S002", "S003"]
+        assert found[0].class_name == "1班" and found[0].grade_name == "一年级"
+    
+    def test_filters_by_class(self, db_session):
+        """按班级筛选"""
+        create_students(db_session, 2, class_name="1班")
+        other = create_students(db_session, 2, class_name="2班")
+        
+        found = BaseService(db_session).search_students("学生", class_id=other[0].class_id)
+        assert {s.id for s in found} == {other[0].id, other[1].id}
+    
+    def test_search_does_not_query_database(self, db_session, capture_queries):
+        """索引构建后搜索不再访问数据库"""
+        add_named_students(db_session, ["张三", "李四"])
+        service = BaseService(db_session)
+        service.search_students("张")
+        
+        with capture_queries() as statements:
+            assert [s.name for s in service.search_students("李")] == ["李四"]
+        assert statements == []
+    
+    def test_incremental_updates(self, db_session):
+        """学生增删改后索引立即更新，无需重新构建"""
+        class_ = add_named_students(db_session, ["张三"])
+        service = BaseService(db_session)
+        service.search_students("张")
+        
+        student, _ = service.create_student(class_.id, "S100", "王五", "M")
+        assert [s.id for s in service.search_students("王五")] == [student.id]
+        
+        service.update_student(student.id, name="赵六")
+        assert service.search_students("王五") == []
+        assert [s.name for s in service.search_students("S100")] == ["赵六"]
+        
+        service.delete_student(student.id)
+        assert service.search_students("赵六") == []
+        assert not student_index.stale
+    
+    def test_class_rename_rebuilds_index(self, db_session):
+        """班级改名后索引失效，下次搜索时重新构建"""
+        class_ = add_named_students(db_session, ["张三"])
+        service = BaseService(db_session)
+        service.search_students("张")
+        
+        service.update_class(class_.id, name="3班")
+        assert student_index.stale
+        assert service.search_students("张三")[0].class_name == "3班"
+        assert not student_index.stale